@@ -1,17 +1,365 @@
 """Analytics and monitoring functionality for SASEWaddle Manager."""
 
+import asyncio
+import base64
+import csv
+import io
 import os
 import json
+import queue
+import re
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
-from collections import defaultdict
+from functools import lru_cache, partial
+from typing import Callable, Dict, Iterator, List, Any, Mapping, Optional
 import logging
 
-from database import get_db
+from database import get_db, get_async_pool, prepare_on_async_connect, create_index, drop_index, index_state
 from pydal import DAL
 
 logger = logging.getLogger(__name__)
 
+# Whether this process creates the analytics tables and indexes. Disable on
+# all but one worker (or in CLI tools) so schema changes run once per deployment.
+ANALYTICS_RUN_MIGRATIONS = os.getenv('ANALYTICS_RUN_MIGRATIONS', 'true').lower() == 'true'
+
+# Batched ingest tuning
+ANALYTICS_QUEUE_SIZE = int(os.getenv('ANALYTICS_QUEUE_SIZE', '10000'))
+ANALYTICS_BATCH_SIZE = int(os.getenv('ANALYTICS_BATCH_SIZE', '1000'))
+ANALYTICS_PAGE_SIZE = int(os.getenv('ANALYTICS_PAGE_SIZE', '500'))
+ANALYTICS_FLUSH_INTERVAL = float(os.getenv('ANALYTICS_FLUSH_INTERVAL', '0.5'))  # seconds
+ANALYTICS_MAX_PREPARED = 64  # prepared statements kept per PostgreSQL connection
+PG_TRANSACTION_IDLE = 0  # psycopg2.extensions.TRANSACTION_STATUS_IDLE
+PG_INVALID_STATEMENT_NAME = '26000'  # SQLSTATE of EXECUTE on an unknown statement
+ANALYTICS_COPY_THRESHOLD = int(os.getenv('ANALYTICS_COPY_THRESHOLD', '5000'))  # rows; PostgreSQL only
+
+# Threads (each with its own database connection) running reads for async callers
+ANALYTICS_READ_WORKERS = int(os.getenv('ANALYTICS_READ_WORKERS', '4'))
+
+# Rollup refresh cadence and how many days of history the rollups cover
+ANALYTICS_ROLLUP_INTERVAL = int(os.getenv('ANALYTICS_ROLLUP_INTERVAL', '300'))  # seconds
+ANALYTICS_OS_ROLLUP_DAYS = int(os.getenv('ANALYTICS_OS_ROLLUP_DAYS', '90'))
+
+# Reporting windows (days) the statistics endpoints accept; other values round
+# up to the next bucket so cached results and rollup reads stay few
+ANALYTICS_DAY_BUCKETS = (1, 3, 7, 30, 90)
+
+# In-process cache for dashboard aggregates
+ANALYTICS_CACHE_TTL = int(os.getenv('ANALYTICS_CACHE_TTL', '30'))  # seconds
+ANALYTICS_CACHE_SIZE = 32
+
+# Insert defaults for ingest payloads (payload columns are read from the table definitions)
+CLIENT_ANALYTICS_DEFAULTS = {
+    'connection_duration': 0,
+    'bytes_sent': 0,
+    'bytes_received': 0,
+    'packets_sent': 0,
+    'packets_received': 0
+}
+
+HEADEND_ANALYTICS_DEFAULTS = {
+    'active_connections': 0,
+    'total_connections': 0,
+    'bytes_proxied': 0,
+    'packets_proxied': 0,
+    'network_errors': 0,
+    'auth_successes': 0,
+    'auth_failures': 0
+}
+
+# Columns matched by search_agents_and_headends, and the columns it returns
+AGENT_SEARCH_COLUMNS = ('hostname', 'os_name', 'ip_address', 'client_id', 'os_version')
+HEADEND_SEARCH_COLUMNS = ('hostname', 'headend_id', 'region', 'cluster_id')
+AGENT_SEARCH_RESULT_COLUMNS = (
+    'client_id', 'hostname', 'os_name', 'os_version', 'architecture', 'client_version',
+    'ip_address', 'connected_headend', 'connection_duration', 'bytes_sent',
+    'bytes_received', 'last_seen'
+)
+HEADEND_SEARCH_RESULT_COLUMNS = (
+    'headend_id', 'hostname', 'region', 'cluster_id', 'version', 'active_connections',
+    'total_connections', 'bytes_proxied', 'packets_proxied', 'cpu_usage_percent',
+    'memory_usage_mb', 'disk_usage_percent', 'last_heartbeat',
+    'auth_successes', 'auth_failures'  # folded into auth_success_rate
+)
+
+
+@dataclass(slots=True)
+class AgentSearchResult:
+    """One client in search results; fields follow AGENT_SEARCH_RESULT_COLUMNS."""
+    
+    client_id: str
+    hostname: Optional[str]
+    os_name: Optional[str]
+    os_version: Optional[str]
+    architecture: Optional[str]
+    client_version: Optional[str]
+    ip_address: Optional[str]
+    connected_headend: Optional[str]
+    connection_duration: Optional[int]
+    bytes_sent: Optional[int]
+    bytes_received: Optional[int]
+    last_seen: Any  # datetime from the database, ISO 8601 string once formatted
+    total_bytes: int = 0
+    status: str = ''
+
+
+@dataclass(slots=True)
+class HeadendSearchResult:
+    """One headend in search results; fields follow HEADEND_SEARCH_RESULT_COLUMNS."""
+    
+    headend_id: str
+    hostname: Optional[str]
+    region: Optional[str]
+    cluster_id: Optional[str]
+    version: Optional[str]
+    active_connections: Optional[int]
+    total_connections: Optional[int]
+    bytes_proxied: Optional[int]
+    packets_proxied: Optional[int]
+    cpu_usage_percent: Optional[float]
+    memory_usage_mb: Optional[int]
+    disk_usage_percent: Optional[float]
+    last_heartbeat: Any  # datetime from the database, ISO 8601 string once formatted
+    auth_success_rate: float = 0
+    status: str = ''
+
+
+# Keyset order per (result kind, sort_by): sort column, unique tiebreak column,
+# and whether newest come first (timestamp columns) or alphabetical order
+SEARCH_SORTS = {
+    ('agents', 'last_seen'): ('last_seen', 'client_id', True),
+    ('agents', 'hostname'): ('hostname', 'client_id', False),
+    ('agents', 'os_name'): ('os_name', 'client_id', False),
+    ('headends', 'last_seen'): ('last_heartbeat', 'headend_id', True),
+    ('headends', 'hostname'): ('hostname', 'headend_id', False),
+    ('headends', 'os_name'): ('last_heartbeat', 'headend_id', True)  # headends have no OS
+}
+
+# Columns listed for each client on the headend detail view
+HEADEND_CLIENT_COLUMNS = ('client_id', 'hostname', 'os_name', 'ip_address', 'last_seen')
+
+# table -> (key column, insert defaults, timestamp column)
+INGEST_TABLES = {
+    'client_analytics': ('client_id', CLIENT_ANALYTICS_DEFAULTS, 'last_seen'),
+    'headend_analytics': ('headend_id', HEADEND_ANALYTICS_DEFAULTS, 'last_heartbeat')
+}
+# table -> (unique index the upserts conflict on, plain key index it replaces
+# on databases created before upserts)
+CONFLICT_KEY_INDEXES = {
+    'client_analytics': ('idx_client_analytics_client_id_unique', 'idx_client_analytics_client_id'),
+    'headend_analytics': ('idx_headend_analytics_headend_id_unique', 'idx_headend_analytics_headend_id')
+}
+# PostgreSQL array types the upsert unnests ingest columns from, by pyDAL field type
+PG_ARRAY_TYPES = {
+    'string': 'text',
+    'integer': 'integer',
+    'bigint': 'bigint',
+    'double': 'double precision',
+    'datetime': 'timestamp'
+}
+# Bookkeeping columns an ingest payload can never set
+MANAGED_COLUMNS = ('id', 'created_at', 'updated_at')
+
+# Status buckets by minutes since last contact; a value equal to a threshold
+# falls in the lower bucket
+AGENT_STATUS_THRESHOLDS = (5, 60, 1440)
+AGENT_STATUSES = ('online', 'recently_active', 'offline', 'stale')
+HEADEND_STATUS_THRESHOLDS = (2, 10)
+HEADEND_STATUSES = ('healthy', 'warning', 'critical')
+
+
+def agent_status(minutes_since_seen: float) -> str:
+    """Classify a client by minutes since it was last seen."""
+    return AGENT_STATUSES[bisect_left(AGENT_STATUS_THRESHOLDS, minutes_since_seen)]
+
+
+def headend_status(minutes_since_heartbeat: float) -> str:
+    """Classify a headend by minutes since its last heartbeat."""
+    return HEADEND_STATUSES[bisect_left(HEADEND_STATUS_THRESHOLDS, minutes_since_heartbeat)]
+
+
+def day_bucket(days: int) -> int:
+    """Round a requested reporting window up to the nearest supported bucket."""
+    index = bisect_left(ANALYTICS_DAY_BUCKETS, days)
+    return ANALYTICS_DAY_BUCKETS[min(index, len(ANALYTICS_DAY_BUCKETS) - 1)]
+
+
+@lru_cache(maxsize=256)
+def upsert_sql(table: str, insert_columns: tuple, update_columns: tuple, row_count: int, dialect: str) -> str:
+    """Build (once per shape) a multi-row upsert statement with ``%s`` placeholders."""
+    values = '({})'.format(', '.join(['%s'] * len(insert_columns)))
+    
+    sql = 'INSERT INTO {} ({}) VALUES {}'.format(
+        table, ', '.join(insert_columns), ', '.join([values] * row_count)
+    )
+    return sql + upsert_conflict_clause(table, update_columns, dialect)
+
+
+@lru_cache(maxsize=64)
+def upsert_unnest_sql(table: str, insert_columns: tuple, column_types: tuple, update_columns: tuple) -> str:
+    """Build a PostgreSQL upsert taking one array parameter per column.
+    
+    The rows are unnested server side, so the statement text does not depend
+    on the row count and one prepared statement per column set serves pages
+    of every size.
+    """
+    arrays = ', '.join(f'%s::{column_type}[]' for column_type in column_types)
+    sql = 'INSERT INTO {} ({}) SELECT * FROM unnest({})'.format(table, ', '.join(insert_columns), arrays)
+    return sql + upsert_conflict_clause(table, update_columns, 'postgres')
+
+
+def upsert_conflict_clause(table: str, update_columns: tuple, dialect: str) -> str:
+    """The ON CONFLICT / ON DUPLICATE KEY tail shared by the upsert statements."""
+    if dialect == 'mysql':
+        return ' ON DUPLICATE KEY UPDATE ' + ', '.join(f'{c}=VALUES({c})' for c in update_columns)
+    key = INGEST_TABLES[table][0]
+    return f' ON CONFLICT ({key}) DO UPDATE SET ' + ', '.join(f'{c}=EXCLUDED.{c}' for c in update_columns)
+
+
+def numbered_params(sql: str) -> str:
+    """Rewrite ``%s`` placeholders as PostgreSQL's positional ``$1, $2, ...``.
+    
+    A ``%(now)s`` marker becomes ``$1``, so the timestamp is passed first.
+    """
+    start = 1
+    if '%(now)s' in sql:
+        sql, start = sql.replace('%(now)s', '$1'), 2
+    counter = iter(range(start, start + sql.count('%s')))
+    return re.sub('%s', lambda _: f'${next(counter)}', sql)
+
+
+def bind_now(sql: str, now: datetime, params: List[Any]) -> tuple:
+    """Expand ``%(now)s`` markers into ``%s`` placeholders bound to ``now``."""
+    return sql.replace('%(now)s', '%s'), [now] * sql.count('%(now)s') + params
+
+
+def sql_status_case(column: str, thresholds: tuple, statuses: tuple) -> str:
+    """PostgreSQL CASE expression mirroring agent_status/headend_status.
+    
+    Minutes are measured against a bound ``%(now)s`` parameter rather than
+    now() so results match the Python path regardless of the server clock.
+    """
+    minutes = f"EXTRACT(EPOCH FROM (%(now)s - {column})) / 60"
+    branches = ' '.join(
+        f"WHEN {minutes} <= {threshold} THEN '{status}'"
+        for threshold, status in zip(thresholds, statuses)
+    )
+    return f"CASE {branches} ELSE '{statuses[-1]}' END AS status"
+
+
+def encode_search_cursor(positions: Dict[str, Optional[list]]) -> str:
+    """Opaque search cursor: per result kind, the last (sort value, key) returned or None when exhausted."""
+    return base64.urlsafe_b64encode(json.dumps(positions).encode('utf-8')).decode('ascii')
+
+
+def decode_search_cursor(cursor: str) -> Dict[str, Optional[list]]:
+    """Parse a cursor from encode_search_cursor, raising ValueError if it is malformed."""
+    try:
+        positions = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid search cursor")
+    
+    # Each position is None or [sort value, key]; both are always strings
+    if not isinstance(positions, dict) or not all(
+        position is None or (
+            isinstance(position, list) and len(position) == 2
+            and all(isinstance(part, str) for part in position)
+        )
+        for position in positions.values()
+    ):
+        raise ValueError("Invalid search cursor")
+    return positions
+
+
+def search_document(columns: tuple, dialect: str) -> str:
+    """SQL expression concatenating the searchable columns into one string.
+    
+    On PostgreSQL the same expression backs the trigram index, so the search
+    predicate must use it verbatim for the planner to pick the index.
+    """
+    if dialect == 'mysql':
+        return "CONCAT_WS(' ', {})".format(', '.join(columns))
+    return "(" + " || ' ' || ".join(f"COALESCE({c}, '')" for c in columns) + ")"
+
+
+# Dashboard aggregates, run as prepared statements on PostgreSQL. Reporting
+# windows are bucketed (ANALYTICS_DAY_BUCKETS), so each statement only ever
+# sees a handful of cutoffs and its plan is reused across all of them.
+OS_DISTRIBUTION_SQL = """
+    SELECT os_name, os_version, architecture, SUM(client_count) as count,
+           SUM(total_connection_duration) / SUM(client_count) as avg_duration,
+           SUM(total_bytes) as total_bytes
+    FROM client_os_daily_stats
+    WHERE day >= %s
+    GROUP BY os_name, os_version, architecture
+    ORDER BY count DESC
+"""
+ACTIVE_CLIENTS_SQL = """
+    SELECT COUNT(*), SUM(CASE WHEN last_seen >= %s THEN 1 ELSE 0 END)
+    FROM client_analytics
+    WHERE last_seen >= %s
+"""
+TRAFFIC_TOTALS_SQL = """
+    SELECT SUM(CASE WHEN last_heartbeat >= %s THEN 1 ELSE 0 END),
+           SUM(bytes_proxied), SUM(packets_proxied), SUM(total_connections)
+    FROM headend_analytics
+    WHERE last_heartbeat >= %s
+"""
+TRAFFIC_BY_REGION_SQL = """
+    SELECT region, SUM(bytes_proxied), SUM(packets_proxied), SUM(total_connections)
+    FROM headend_analytics
+    WHERE last_heartbeat >= %s AND region IS NOT NULL AND region <> ''
+    GROUP BY region
+"""
+
+
+# Detail lookups on PostgreSQL, with age, status and auth success rate derived
+# in SQL against the bound ``%(now)s``. Parameters: the client id.
+CLIENT_DETAILS_SQL = f"""
+    SELECT *,
+           EXTRACT(EPOCH FROM (%(now)s - last_seen)) / 60 AS minutes_since_last_seen,
+           {sql_status_case('last_seen', AGENT_STATUS_THRESHOLDS, AGENT_STATUSES)}
+    FROM client_analytics
+    WHERE client_id = %s
+"""
+
+# Headend row plus its most recently seen clients as a JSON array.
+# Parameters: the client limit and the headend id.
+HEADEND_DETAILS_SQL = f"""
+    SELECT h.*,
+           EXTRACT(EPOCH FROM (%(now)s - h.last_heartbeat)) / 60 AS minutes_since_heartbeat,
+           {sql_status_case('h.last_heartbeat', HEADEND_STATUS_THRESHOLDS, HEADEND_STATUSES)},
+           CASE WHEN COALESCE(h.auth_successes, 0) + COALESCE(h.auth_failures, 0) > 0
+                THEN COALESCE(h.auth_successes, 0)::float
+                     / (COALESCE(h.auth_successes, 0) + COALESCE(h.auth_failures, 0)) * 100
+                ELSE 0 END AS auth_success_rate,
+           COALESCE(c.clients, '[]'::json) AS connected_clients
+    FROM headend_analytics h
+    LEFT JOIN LATERAL (
+        SELECT json_agg(recent ORDER BY recent.last_seen DESC) AS clients
+        FROM (
+            SELECT {', '.join(HEADEND_CLIENT_COLUMNS)}
+            FROM client_analytics
+            WHERE connected_headend = h.headend_id
+            ORDER BY last_seen DESC
+            LIMIT %s
+        ) recent
+    ) c ON true
+    WHERE h.headend_id = %s
+"""
+
+
+# Detail lookups as sent through the asyncpg pool, kept as fixed strings so
+# each pool connection prepares them once (see prepare_on_async_connect)
+CLIENT_DETAILS_ASYNC_SQL = numbered_params(CLIENT_DETAILS_SQL)
+HEADEND_DETAILS_ASYNC_SQL = numbered_params(HEADEND_DETAILS_SQL)
+prepare_on_async_connect(CLIENT_DETAILS_ASYNC_SQL, HEADEND_DETAILS_ASYNC_SQL)
+
 
 class AnalyticsManager:
     """Manages analytics data collection and reporting."""
@@ -19,10 +367,51 @@ class AnalyticsManager:
     def __init__(self):
         self.db = get_db()
         self._ensure_analytics_tables()
+        
+        # Payload columns per ingest table, in table order, read from the
+        # definitions so a new column is ingestible without further changes
+        self._ingest_columns: Dict[str, tuple] = {}
+        self._ingest_fields: Dict[str, frozenset] = {}
+        for table, (key, _, stamp_column) in INGEST_TABLES.items():
+            excluded = MANAGED_COLUMNS + (key, stamp_column)
+            columns = tuple(f for f in self.db[table].fields if f not in excluded)
+            self._ingest_columns[table] = columns
+            self._ingest_fields[table] = frozenset(columns)
+        
+        # Short-lived cache of dashboard aggregates: key -> (expires_at, value)
+        self._stats_cache: Dict[tuple, tuple] = {}
+        self._stats_cache_lock = threading.Lock()
+        
+        # Prepared statement names per connection: connection -> {sql: name}.
+        # Weak keys, so a connection the pool discards takes its names along.
+        self._prepared: 'weakref.WeakKeyDictionary[Any, Dict[str, str]]' = weakref.WeakKeyDictionary()
+        self._prepared_lock = threading.Lock()
+        
+        # Blocking reads for async callers run here; pyDAL connections are per
+        # thread, so each worker opens its own on start
+        self._readers = ThreadPoolExecutor(
+            max_workers=ANALYTICS_READ_WORKERS,
+            thread_name_prefix='analytics-read',
+            initializer=self.db._adapter.reconnect
+        )
+        
+        # Ingest writes are queued and written in batches by a background thread
+        self._queue: queue.Queue = queue.Queue(maxsize=ANALYTICS_QUEUE_SIZE)
+        self._dropped_records = 0  # records that failed to write even on their own
+        self._dropped_lock = threading.Lock()
+        self._flusher = threading.Thread(target=self._flush_loop, name='analytics-flusher', daemon=True)
+        self._flusher.start()
+        
+        # Rollups are rebuilt on their own thread so a long refresh never holds
+        # up ingest, and only by the worker that owns the schema
+        if ANALYTICS_RUN_MIGRATIONS:
+            self._rollup_thread = threading.Thread(target=self._rollup_loop, name='analytics-rollup', daemon=True)
+            self._rollup_thread.start()
     
     def _ensure_analytics_tables(self):
-        """Create analytics tables if they don't exist."""
+        """Define analytics tables, creating them and their indexes when migrations are enabled."""
         db = self.db
+        migrate = ANALYTICS_RUN_MIGRATIONS
         
         # Client analytics table
         if 'client_analytics' not in db.tables:
@@ -42,13 +431,9 @@ class AnalyticsManager:
                 db.Field('packets_received', 'bigint', default=0),
                 db.Field('last_seen', 'datetime', required=True),
                 db.Field('created_at', 'datetime', default=datetime.utcnow),
-                db.Field('updated_at', 'datetime', default=datetime.utcnow, update=datetime.utcnow)
+                db.Field('updated_at', 'datetime', default=datetime.utcnow, update=datetime.utcnow),
+                migrate=migrate
             )
-            # Create indexes
-            db.executesql('CREATE INDEX idx_client_analytics_client_id ON client_analytics(client_id)')
-            db.executesql('CREATE INDEX idx_client_analytics_os_name ON client_analytics(os_name)')
-            db.executesql('CREATE INDEX idx_client_analytics_last_seen ON client_analytics(last_seen)')
-            db.executesql('CREATE INDEX idx_client_analytics_headend ON client_analytics(connected_headend)')
         
         # Headend analytics table
         if 'headend_analytics' not in db.tables:
@@ -70,12 +455,9 @@ class AnalyticsManager:
                 db.Field('auth_failures', 'integer', default=0),
                 db.Field('last_heartbeat', 'datetime', required=True),
                 db.Field('created_at', 'datetime', default=datetime.utcnow),
-                db.Field('updated_at', 'datetime', default=datetime.utcnow, update=datetime.utcnow)
+                db.Field('updated_at', 'datetime', default=datetime.utcnow, update=datetime.utcnow),
+                migrate=migrate
             )
-            # Create indexes
-            db.executesql('CREATE INDEX idx_headend_analytics_headend_id ON headend_analytics(headend_id)')
-            db.executesql('CREATE INDEX idx_headend_analytics_region ON headend_analytics(region)')
-            db.executesql('CREATE INDEX idx_headend_analytics_last_heartbeat ON headend_analytics(last_heartbeat)')
         
         # Traffic statistics table (aggregated by time periods)
         if 'traffic_stats' not in db.tables:
@@ -89,176 +471,587 @@ class AnalyticsManager:
                 db.Field('unique_users', 'integer', default=0),
                 db.Field('avg_connection_duration', 'integer', default=0),  # seconds
                 db.Field('peak_concurrent_connections', 'integer', default=0),
-                db.Field('created_at', 'datetime', default=datetime.utcnow)
+                db.Field('created_at', 'datetime', default=datetime.utcnow),
+                migrate=migrate
+            )
+        
+        # Daily OS distribution rollup (rebuilt from client_analytics by refresh_os_rollup)
+        if 'client_os_daily_stats' not in db.tables:
+            db.define_table('client_os_daily_stats',
+                db.Field('day', 'date', required=True),
+                db.Field('os_name', 'string', length=64),
+                db.Field('os_version', 'string', length=128),
+                db.Field('architecture', 'string', length=32),
+                db.Field('client_count', 'integer', default=0),
+                db.Field('total_connection_duration', 'bigint', default=0),  # seconds
+                db.Field('total_bytes', 'bigint', default=0),
+                migrate=migrate
             )
-            # Create indexes
-            db.executesql('CREATE INDEX idx_traffic_stats_type_time ON traffic_stats(stat_type, timestamp)')
-            db.executesql('CREATE INDEX idx_traffic_stats_headend ON traffic_stats(headend_id)')
         
         db.commit()
+        
+        # Upserts cannot run without their conflict keys, so check those first
+        self._ensure_conflict_keys()
+        
+        # Indexes are reconciled on every start so they converge on existing tables too
+        if migrate:
+            self._ensure_analytics_indexes()
+        
         logger.info("Analytics tables ensured")
     
-    def record_client_activity(self, client_data: Dict[str, Any]) -> bool:
-        """Record or update client activity data."""
-        try:
-            db = self.db
-            
-            # Check if client already exists
-            existing = db(db.client_analytics.client_id == client_data['client_id']).select().first()
+    def _ensure_conflict_keys(self) -> None:
+        """Make sure each ingest table has the unique index its upserts conflict on.
+        
+        Databases created before upserts only have a plain index on the key
+        and may hold several rows per key. When migrations are enabled the
+        duplicates are removed, keeping the most recent row, the unique index
+        is built and the old index is dropped. Raises RuntimeError when the
+        unique index is still missing, since every upsert would fail.
+        """
+        db = self.db
+        for table, (name, legacy) in CONFLICT_KEY_INDEXES.items():
+            key = INGEST_TABLES[table][0]
+            if ANALYTICS_RUN_MIGRATIONS:
+                if not index_state(db, name, table):
+                    self._remove_duplicate_keys(table)
+                usable = create_index(db, name, table, f'({key})', unique=True)
+                if usable:
+                    drop_index(db, legacy, table)
+            else:
+                usable = bool(index_state(db, name, table))
+                db.commit()
             
-            if existing:
-                # Update existing record
-                db(db.client_analytics.client_id == client_data['client_id']).update(
-                    hostname=client_data.get('hostname', existing.hostname),
-                    os_name=client_data.get('os_name', existing.os_name),
-                    os_version=client_data.get('os_version', existing.os_version),
-                    architecture=client_data.get('architecture', existing.architecture),
-                    client_version=client_data.get('client_version', existing.client_version),
-                    ip_address=client_data.get('ip_address', existing.ip_address),
-                    connected_headend=client_data.get('connected_headend', existing.connected_headend),
-                    connection_duration=client_data.get('connection_duration', existing.connection_duration),
-                    bytes_sent=client_data.get('bytes_sent', existing.bytes_sent),
-                    bytes_received=client_data.get('bytes_received', existing.bytes_received),
-                    packets_sent=client_data.get('packets_sent', existing.packets_sent),
-                    packets_received=client_data.get('packets_received', existing.packets_received),
-                    last_seen=datetime.utcnow(),
-                    updated_at=datetime.utcnow()
+            if not usable:
+                raise RuntimeError(
+                    f"Analytics table {table} has no usable unique index {name} on {key}; "
+                    f"run the manager with ANALYTICS_RUN_MIGRATIONS=true to create it"
                 )
-            else:
-                # Insert new record
-                db.client_analytics.insert(
-                    client_id=client_data['client_id'],
-                    hostname=client_data.get('hostname'),
-                    os_name=client_data.get('os_name'),
-                    os_version=client_data.get('os_version'),
-                    architecture=client_data.get('architecture'),
-                    client_version=client_data.get('client_version'),
-                    ip_address=client_data.get('ip_address'),
-                    connected_headend=client_data.get('connected_headend'),
-                    connection_duration=client_data.get('connection_duration', 0),
-                    bytes_sent=client_data.get('bytes_sent', 0),
-                    bytes_received=client_data.get('bytes_received', 0),
-                    packets_sent=client_data.get('packets_sent', 0),
-                    packets_received=client_data.get('packets_received', 0),
-                    last_seen=datetime.utcnow()
+    
+    def _remove_duplicate_keys(self, table: str) -> None:
+        """Delete all but the most recent row per key so a unique index can be built."""
+        db = self.db
+        key, _, stamp_column = INGEST_TABLES[table]
+        
+        # MySQL cannot reference the target table in a subquery, so it joins
+        mysql = db._adapter.dbengine == 'mysql'
+        older = 'a' if mysql else table
+        
+        # Row b supersedes row a: a later timestamp (NULL counts as oldest), then a higher id
+        newer = (
+            f'(b.{stamp_column} > {older}.{stamp_column}'
+            f' OR (b.{stamp_column} = {older}.{stamp_column} AND b.id > {older}.id)'
+            f' OR ({older}.{stamp_column} IS NULL AND (b.{stamp_column} IS NOT NULL OR b.id > {older}.id)))'
+        )
+        if mysql:
+            sql = f'DELETE a FROM {table} a JOIN {table} b ON b.{key} = a.{key} AND {newer}'
+        else:
+            sql = f'DELETE FROM {table} WHERE EXISTS (SELECT 1 FROM {table} b WHERE b.{key} = {table}.{key} AND {newer})'
+        
+        try:
+            ((surplus,),) = db.executesql(f'SELECT COUNT(*) - COUNT(DISTINCT {key}) FROM {table}')
+            if surplus:
+                db.executesql(sql)
+                logger.warning(f"Removed {surplus} duplicate {key} rows from {table}")
+            db.commit()
+        except Exception as e:
+            # The unique index build then fails and reports the duplicates
+            logger.error(f"Failed to remove duplicate {key} rows from {table}: {e}")
+            db.rollback()
+    
+    def _ensure_analytics_indexes(self):
+        """Create any missing analytics indexes."""
+        db = self.db
+        postgres = db._adapter.dbengine == 'postgres'
+        
+        create_index(db, 'idx_client_analytics_os_name', 'client_analytics', '(os_name)')
+        create_index(db, 'idx_client_analytics_last_seen', 'client_analytics', '(last_seen)')
+        # Keyset pagination order for search (scanned backwards for newest first)
+        create_index(db, 'idx_client_analytics_last_seen_id', 'client_analytics', '(last_seen, client_id)')
+        if postgres:
+            # Covering index so a headend's most recently seen clients are an
+            # index-only scan
+            included = ', '.join(c for c in HEADEND_CLIENT_COLUMNS if c != 'last_seen')
+            create_index(
+                db, 'idx_client_analytics_headend_last_seen', 'client_analytics',
+                f'(connected_headend, last_seen DESC) INCLUDE ({included})'
+            )
+        else:
+            create_index(
+                db, 'idx_client_analytics_headend_last_seen', 'client_analytics', '(connected_headend, last_seen)'
+            )
+        
+        create_index(db, 'idx_headend_analytics_region', 'headend_analytics', '(region)')
+        create_index(db, 'idx_headend_analytics_last_heartbeat', 'headend_analytics', '(last_heartbeat)')
+        create_index(
+            db, 'idx_headend_analytics_last_heartbeat_id', 'headend_analytics', '(last_heartbeat, headend_id)'
+        )
+        
+        if postgres:
+            # Covering index so the timeline query is served index-only. It
+            # replaces the plain index, which is dropped once this one is usable.
+            if create_index(
+                db, 'idx_traffic_stats_type_time_cover', 'traffic_stats',
+                '(stat_type, timestamp) INCLUDE '
+                '(headend_id, total_bytes, total_packets, client_count, peak_concurrent_connections)'
+            ):
+                drop_index(db, 'idx_traffic_stats_type_time', 'traffic_stats')
+        else:
+            create_index(db, 'idx_traffic_stats_type_time', 'traffic_stats', '(stat_type, timestamp)')
+        create_index(db, 'idx_traffic_stats_headend', 'traffic_stats', '(headend_id)')
+        if postgres:
+            # traffic_stats is append-only in timestamp order, which suits a tiny
+            # BRIN index for range scans such as retention pruning. The
+            # client/headend last_* columns are rewritten in place by upserts
+            # and sorted on by search, so they keep their B-tree indexes.
+            create_index(
+                db, 'idx_traffic_stats_timestamp_brin', 'traffic_stats',
+                'USING brin (timestamp) WITH (pages_per_range = 32)'
+            )
+        
+        create_index(
+            db, 'idx_client_os_daily_stats_day', 'client_os_daily_stats',
+            '(day, os_name, os_version, architecture)'
+        )
+        
+        if postgres:
+            # Trigram indexes over the search documents so substring search
+            # avoids a sequential scan
+            try:
+                db.executesql('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+                db.commit()
+            except Exception as e:
+                # Search still works without the index, just with a sequential scan
+                logger.warning(f"Could not enable pg_trgm, search will not be indexed: {e}")
+                db.rollback()
+                return
+            
+            for table, columns in (('client_analytics', AGENT_SEARCH_COLUMNS),
+                                   ('headend_analytics', HEADEND_SEARCH_COLUMNS)):
+                create_index(
+                    db, f'idx_{table}_search_trgm', table,
+                    f'USING gin ({search_document(columns, "postgres")} gin_trgm_ops)'
                 )
+    
+    def _executesql(self, sql: str, params: Optional[List[Any]] = None, **kwargs) -> List[Any]:
+        """Run raw SQL written with ``%s`` placeholders on any supported dialect."""
+        if params and self.db._adapter.dbengine == 'sqlite':
+            sql = sql.replace('%s', '?')
+        return self.db.executesql(sql, params, **kwargs)
+    
+    def _build_row(self, table: str, values: Dict[str, Any]) -> tuple:
+        """Expand queued values into a full insert row and the columns to update.
+        
+        Only the columns present in ``values`` are overwritten on conflict, so
+        values the caller did not send keep what is already stored. Defaults
+        apply to freshly inserted rows only.
+        """
+        key, defaults, stamp_column = INGEST_TABLES[table]
+        supplied = [c for c in self._ingest_columns[table] if c in values]
+        stamp = values[stamp_column]
+        
+        row = dict(defaults)
+        row.update((c, values[c]) for c in supplied)
+        row[key] = values[key]
+        row[stamp_column] = stamp
+        row['created_at'] = stamp
+        row['updated_at'] = stamp
+        
+        return row, supplied + [stamp_column, 'updated_at']
+    
+    def _execute_upsert(
+        self,
+        table: str,
+        insert_columns: tuple,
+        update_columns: tuple,
+        rows: List[Dict[str, Any]]
+    ) -> None:
+        """Run one multi-row upsert, through a server-side prepared statement on PostgreSQL.
+        
+        PostgreSQL gets one array per column, so the prepared statement is the
+        same for any number of rows. Other dialects get a VALUES list.
+        """
+        db = self.db
+        dialect = db._adapter.dbengine
+        if dialect == 'postgres':
+            column_types = tuple(PG_ARRAY_TYPES[db[table][c].type] for c in insert_columns)
+            params = [[row[c] for row in rows] for c in insert_columns]
+            self._execute_prepared(upsert_unnest_sql(table, insert_columns, column_types, update_columns), params)
+            return
+        
+        params = [row[c] for row in rows for c in insert_columns]
+        self._execute_prepared(upsert_sql(table, insert_columns, update_columns, len(rows), dialect), params)
+    
+    def _execute_prepared(self, sql: str, params: List[Any]) -> List[Any]:
+        """Run a fixed statement, through a server-side prepared statement on PostgreSQL.
+        
+        Each connection prepares a statement once and then only sends EXECUTE
+        with the values, so the server skips parsing and planning on the
+        ingest path and for the bucketed dashboard aggregates. Other dialects
+        run the SQL text directly.
+        """
+        db = self.db
+        if db._adapter.dbengine != 'postgres':
+            return self._executesql(sql, params)
+        
+        connection = db._adapter.connection
+        with self._prepared_lock:
+            prepared = self._prepared.setdefault(connection, {})
+        name = prepared.get(sql)
+        fresh = name is None
+        if fresh:
+            if len(prepared) >= ANALYTICS_MAX_PREPARED:
+                return self._executesql(sql, params)
+            name = f'analytics_stmt_{len(prepared)}'
+            db.executesql(f'PREPARE {name} AS ' + numbered_params(sql))
+            prepared[sql] = name
+        
+        # Nothing to lose by rolling back when no transaction was open yet
+        idle = not fresh and connection.get_transaction_status() == PG_TRANSACTION_IDLE
+        try:
+            return db.executesql('EXECUTE {} ({})'.format(name, ', '.join(['%s'] * len(params))), params)
+        except Exception as e:
+            # The statement vanished server side (e.g. DEALLOCATE ALL, or a
+            # pooler handed us another session); forget them all and prepare again
+            if fresh or getattr(e, 'pgcode', None) != PG_INVALID_STATEMENT_NAME:
+                raise
+            with self._prepared_lock:
+                self._prepared.pop(connection, None)
+            if not idle:
+                raise
+            db.rollback()
+            return self._execute_prepared(sql, params)
+    
+    def _copy_upsert(
+        self,
+        table: str,
+        insert_columns: tuple,
+        update_columns: tuple,
+        rows: List[Dict[str, Any]]
+    ) -> None:
+        """Bulk upsert on PostgreSQL by COPYing into a stage table first.
+        
+        COPY skips per-row statement overhead entirely, and a single
+        INSERT ... SELECT then merges the staged rows into the real table.
+        The stage is a temporary table, so it is private to this connection
+        (concurrent writers never see each other's rows) and is not written
+        to the WAL.
+        """
+        db = self.db
+        stage = f'{table}_stage'
+        columns = ', '.join(insert_columns)
+        
+        db.executesql(
+            f'CREATE TEMP TABLE IF NOT EXISTS {stage} ON COMMIT DELETE ROWS '
+            f'AS SELECT * FROM {table} WITH NO DATA'
+        )
+        
+        # Unquoted empty fields load as NULL; strings (including '') are quoted
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerows([row[c] for c in insert_columns] for row in rows)
+        buffer.seek(0)
+        db._adapter.cursor.copy_expert(f'COPY {stage} ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+        
+        db.executesql(
+            f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {stage}'
+            + upsert_conflict_clause(table, update_columns, 'postgres')
+        )
+        # A batch may stage the same table more than once before committing
+        db.executesql(f'TRUNCATE {stage}')
+    
+    def _write_batch(self, batch: List[tuple], copy_threshold: Optional[int] = None) -> bool:
+        """Write queued records with one upsert statement per table and column set.
+        
+        With ``copy_threshold``, column sets of at least that many rows are
+        loaded with COPY on PostgreSQL instead of multi-row INSERTs. Ingest
+        batches are too small for that to pay off; bulk loads use it.
+        """
+        db = self.db
+        postgres = db._adapter.dbengine == 'postgres'
+        
+        # Collapse repeated updates for the same key; later values win. A single
+        # multi-row upsert may not touch the same row twice.
+        pending: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for table, values in batch:
+            key = INGEST_TABLES[table][0]
+            pending.setdefault(table, {}).setdefault(values[key], {}).update(values)
+        
+        try:
+            for table, records in pending.items():
+                groups: Dict[tuple, List[Dict[str, Any]]] = {}
+                for values in records.values():
+                    row, update_columns = self._build_row(table, values)
+                    groups.setdefault((tuple(row), tuple(update_columns)), []).append(row)
+                
+                for (insert_columns, update_columns), rows in groups.items():
+                    if postgres and copy_threshold and len(rows) >= copy_threshold:
+                        self._copy_upsert(table, insert_columns, update_columns, rows)
+                        continue
+                    for start in range(0, len(rows), ANALYTICS_PAGE_SIZE):
+                        page = rows[start:start + ANALYTICS_PAGE_SIZE]
+                        self._execute_upsert(table, insert_columns, update_columns, page)
             
             db.commit()
             return True
             
         except Exception as e:
-            logger.error(f"Failed to record client activity: {e}")
+            logger.error(f"Failed to write {len(batch)} analytics records: {e}")
             db.rollback()
+            if postgres:
+                # Start over with a clean set of prepared statements on this connection
+                with self._prepared_lock:
+                    self._prepared.pop(db._adapter.connection, None)
+                try:
+                    db.executesql('DEALLOCATE ALL')
+                except Exception as e:
+                    logger.warning(f"Failed to reset prepared analytics statements: {e}")
             return False
     
+    def _write_records(self, batch: List[tuple]) -> int:
+        """Write queued records, retrying them one by one if the batch fails.
+        
+        A record that cannot be written on its own is dropped: it is counted
+        in ingest_stats() and logged with everything needed to replay it, so
+        one bad record cannot take the rest of the batch down with it.
+        Returns how many records were written.
+        """
+        if self._write_batch(batch):
+            return len(batch)
+        if len(batch) > 1:
+            logger.warning(f"Retrying {len(batch)} analytics records one at a time")
+            return sum(self._write_records([record]) for record in batch)
+        
+        table, values = batch[0]
+        with self._dropped_lock:
+            self._dropped_records += 1
+        logger.error(f"ANALYTICS_DROPPED: {json.dumps({'table': table, 'values': values}, default=str)}")
+        return 0
+    
+    def ingest_stats(self) -> Dict[str, int]:
+        """Records waiting in the ingest queue, and records dropped since startup."""
+        with self._dropped_lock:
+            dropped = self._dropped_records
+        return {'queued': self._queue.qsize(), 'dropped': dropped}
+    
+    def _next_batch(self) -> List[tuple]:
+        """Wait for queued records and collect up to a batch worth of them."""
+        try:
+            batch = [self._queue.get(timeout=ANALYTICS_FLUSH_INTERVAL)]
+        except queue.Empty:
+            return []
+        
+        deadline = time.monotonic() + ANALYTICS_FLUSH_INTERVAL
+        while len(batch) < ANALYTICS_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _flush_loop(self) -> None:
+        """Background writer draining the ingest queue."""
+        # pyDAL connections are per thread
+        self.db._adapter.reconnect()
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._write_records(batch)
+    
+    def _rollup_loop(self) -> None:
+        """Background refresh of the rollups every ANALYTICS_ROLLUP_INTERVAL seconds."""
+        self.db._adapter.reconnect()
+        while True:
+            # A failed refresh waits for the next interval rather than retrying hot
+            self.refresh_os_rollup()
+            time.sleep(ANALYTICS_ROLLUP_INTERVAL)
+    
+    def flush(self) -> None:
+        """Synchronously write everything currently queued."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write_records(batch)
+    
+    def _ingest_values(self, table: str, data: Dict[str, Any], stamp: datetime) -> Dict[str, Any]:
+        """Pick the writable columns out of an ingest payload."""
+        key, _, stamp_column = INGEST_TABLES[table]
+        values = {c: data[c] for c in data.keys() & self._ingest_fields[table]}
+        values[key] = data[key]
+        values[stamp_column] = stamp
+        return values
+    
+    def _enqueue(self, table: str, data: Dict[str, Any]) -> bool:
+        """Queue an ingest payload for the background writer."""
+        values = self._ingest_values(table, data, datetime.utcnow())
+        
+        try:
+            self._queue.put_nowait((table, values))
+            return True
+        except queue.Full:
+            # Backpressure: write this record in the caller's thread rather than drop it
+            logger.warning(f"Analytics ingest queue full, writing {table} record synchronously")
+            return self._write_records([(table, values)]) == 1
+    
+    def record_client_activities(self, records: List[Dict[str, Any]]) -> int:
+        """Queue several client activity records; returns how many were accepted or written."""
+        now = datetime.utcnow()
+        batch = [('client_analytics', self._ingest_values('client_analytics', record, now)) for record in records]
+        
+        for accepted, item in enumerate(batch):
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                # Backpressure: write the remainder in the caller's thread rather than drop it
+                logger.warning(
+                    f"Analytics ingest queue full, writing {len(batch) - accepted} client_analytics records synchronously"
+                )
+                return accepted + self._write_records(batch[accepted:])
+        return len(batch)
+    
+    def bulk_load(self, table: str, records: List[Dict[str, Any]]) -> bool:
+        """Synchronously upsert a large set of records, e.g. for a backfill or migration.
+        
+        Bypasses the ingest queue so the whole set is written as one batch,
+        which takes the COPY path on PostgreSQL once it has at least
+        ANALYTICS_COPY_THRESHOLD rows. A record may carry its own
+        last_seen/last_heartbeat; otherwise the current time is used.
+        """
+        stamp_column = INGEST_TABLES[table][2]
+        now = datetime.utcnow()
+        batch = [
+            (table, self._ingest_values(table, record, record.get(stamp_column) or now))
+            for record in records
+        ]
+        return self._write_batch(batch, copy_threshold=ANALYTICS_COPY_THRESHOLD) if batch else True
+    
+    def record_client_activity(self, client_data: Dict[str, Any]) -> bool:
+        """Queue client activity data for the next batched write."""
+        return self._enqueue('client_analytics', client_data)
+    
     def record_headend_stats(self, headend_data: Dict[str, Any]) -> bool:
-        """Record or update headend statistics."""
+        """Queue headend statistics for the next batched write."""
+        return self._enqueue('headend_analytics', headend_data)
+    
+    async def run_read(self, method: Callable[..., Any], *args, **kwargs) -> Any:
+        """Await a blocking read method on the reader threads.
+        
+        Lets async handlers overlap independent queries (e.g. with
+        asyncio.gather) without stalling the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, partial(self._read_in_worker, method, *args, **kwargs))
+    
+    def _read_in_worker(self, method: Callable[..., Any], *args, **kwargs) -> Any:
+        try:
+            return method(*args, **kwargs)
+        finally:
+            # End the read transaction so the long-lived worker connection
+            # never holds an old snapshot
+            self.db.rollback()
+    
+    def refresh_os_rollup(self) -> bool:
+        """Rebuild the daily OS rollup for the reporting window from client_analytics.
+        
+        Each client row is counted on the day of its ``last_seen``, which moves
+        forward as the client reports in, so the whole window is recomputed
+        rather than appending new days only.
+        """
         try:
             db = self.db
+            window_start = (datetime.utcnow() - timedelta(days=ANALYTICS_OS_ROLLUP_DAYS)).date()
             
-            # Check if headend already exists
-            existing = db(db.headend_analytics.headend_id == headend_data['headend_id']).select().first()
-            
-            if existing:
-                # Update existing record
-                db(db.headend_analytics.headend_id == headend_data['headend_id']).update(
-                    hostname=headend_data.get('hostname', existing.hostname),
-                    region=headend_data.get('region', existing.region),
-                    cluster_id=headend_data.get('cluster_id', existing.cluster_id),
-                    version=headend_data.get('version', existing.version),
-                    active_connections=headend_data.get('active_connections', existing.active_connections),
-                    total_connections=headend_data.get('total_connections', existing.total_connections),
-                    bytes_proxied=headend_data.get('bytes_proxied', existing.bytes_proxied),
-                    packets_proxied=headend_data.get('packets_proxied', existing.packets_proxied),
-                    cpu_usage_percent=headend_data.get('cpu_usage_percent', existing.cpu_usage_percent),
-                    memory_usage_mb=headend_data.get('memory_usage_mb', existing.memory_usage_mb),
-                    disk_usage_percent=headend_data.get('disk_usage_percent', existing.disk_usage_percent),
-                    network_errors=headend_data.get('network_errors', existing.network_errors),
-                    auth_successes=headend_data.get('auth_successes', existing.auth_successes),
-                    auth_failures=headend_data.get('auth_failures', existing.auth_failures),
-                    last_heartbeat=datetime.utcnow(),
-                    updated_at=datetime.utcnow()
-                )
-            else:
-                # Insert new record
-                db.headend_analytics.insert(
-                    headend_id=headend_data['headend_id'],
-                    hostname=headend_data.get('hostname'),
-                    region=headend_data.get('region'),
-                    cluster_id=headend_data.get('cluster_id'),
-                    version=headend_data.get('version'),
-                    active_connections=headend_data.get('active_connections', 0),
-                    total_connections=headend_data.get('total_connections', 0),
-                    bytes_proxied=headend_data.get('bytes_proxied', 0),
-                    packets_proxied=headend_data.get('packets_proxied', 0),
-                    cpu_usage_percent=headend_data.get('cpu_usage_percent'),
-                    memory_usage_mb=headend_data.get('memory_usage_mb'),
-                    disk_usage_percent=headend_data.get('disk_usage_percent'),
-                    network_errors=headend_data.get('network_errors', 0),
-                    auth_successes=headend_data.get('auth_successes', 0),
-                    auth_failures=headend_data.get('auth_failures', 0),
-                    last_heartbeat=datetime.utcnow()
-                )
+            self._executesql('DELETE FROM client_os_daily_stats')
+            self._executesql("""
+                INSERT INTO client_os_daily_stats
+                    (day, os_name, os_version, architecture, client_count,
+                     total_connection_duration, total_bytes)
+                SELECT DATE(last_seen), os_name, os_version, architecture, COUNT(*),
+                       SUM(COALESCE(connection_duration, 0)),
+                       SUM(COALESCE(bytes_sent, 0) + COALESCE(bytes_received, 0))
+                FROM client_analytics
+                WHERE last_seen >= %s AND os_name IS NOT NULL
+                GROUP BY DATE(last_seen), os_name, os_version, architecture
+            """, [window_start])
             
             db.commit()
             return True
             
         except Exception as e:
-            logger.error(f"Failed to record headend stats: {e}")
+            logger.error(f"Failed to refresh OS rollup: {e}")
             db.rollback()
             return False
     
+    def _cached(self, key: tuple, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Return a recent result for ``key`` or compute and remember it.
+        
+        Empty results (the error path) are not cached.
+        """
+        now = time.monotonic()
+        with self._stats_cache_lock:
+            entry = self._stats_cache.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+        
+        value = compute()
+        if value:
+            with self._stats_cache_lock:
+                if len(self._stats_cache) >= ANALYTICS_CACHE_SIZE:
+                    self._stats_cache = {k: v for k, v in self._stats_cache.items() if v[0] > now}
+                self._stats_cache[key] = (now + ANALYTICS_CACHE_TTL, value)
+        return value
+    
     def get_os_statistics(self, days_back: int = 7) -> Dict[str, Any]:
         """Get operating system distribution statistics."""
+        return self._cached(('os', days_back), lambda: self._os_statistics(days_back))
+    
+    def _os_statistics(self, days_back: int) -> Dict[str, Any]:
+        """Compute operating system distribution statistics."""
         try:
             db = self.db
-            cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+            now = datetime.utcnow()
+            cutoff_date = now - timedelta(days=days_back)
             
-            # Get OS distribution
-            os_query = """
-                SELECT os_name, os_version, architecture, COUNT(*) as count,
-                       AVG(connection_duration) as avg_duration,
-                       SUM(bytes_sent + bytes_received) as total_bytes
-                FROM client_analytics 
-                WHERE last_seen >= %s AND os_name IS NOT NULL
-                GROUP BY os_name, os_version, architecture
-                ORDER BY count DESC
-            """
+            # Get OS distribution from the daily rollup (kept fresh in the background)
+            os_results = self._execute_prepared(OS_DISTRIBUTION_SQL, [cutoff_date.date()])
             
-            os_results = db.executesql(os_query, [cutoff_date])
+            # Pivot the grouped rows into nested plain dicts
+            total_clients = 0
+            by_os: Dict[str, Dict[str, Any]] = {}
+            by_architecture: Dict[str, int] = {}
+            
+            for os_name, os_version, arch, count, avg_duration, total_bytes in os_results:
+                count = int(count)
+                total_clients += count
+                entry = by_os.setdefault(os_name, {'count': 0, 'versions': {}, 'architectures': {}})
+                entry['count'] += count
+                if os_version:
+                    entry['versions'][os_version] = entry['versions'].get(os_version, 0) + count
+                if arch:
+                    entry['architectures'][arch] = entry['architectures'].get(arch, 0) + count
+                    by_architecture[arch] = by_architecture.get(arch, 0) + count
             
-            # Process results
             os_stats = {
-                'total_clients': 0,
-                'by_os': defaultdict(lambda: {'count': 0, 'versions': defaultdict(int), 'architectures': defaultdict(int)}),
-                'by_architecture': defaultdict(int),
+                'total_clients': total_clients,
+                'by_os': by_os,
+                'by_architecture': by_architecture,
                 'active_last_24h': 0,
                 'active_last_hour': 0
             }
             
-            for row in os_results:
-                os_name, os_version, arch, count, avg_duration, total_bytes = row
-                os_stats['total_clients'] += count
-                os_stats['by_os'][os_name]['count'] += count
-                if os_version:
-                    os_stats['by_os'][os_name]['versions'][os_version] += count
-                if arch:
-                    os_stats['by_os'][os_name]['architectures'][arch] += count
-                    os_stats['by_architecture'][arch] += count
-            
             # Get recent activity counts
-            last_24h = datetime.utcnow() - timedelta(hours=24)
-            last_hour = datetime.utcnow() - timedelta(hours=1)
-            
-            os_stats['active_last_24h'] = db(db.client_analytics.last_seen >= last_24h).count()
-            os_stats['active_last_hour'] = db(db.client_analytics.last_seen >= last_hour).count()
+            last_24h = now - timedelta(hours=24)
+            last_hour = now - timedelta(hours=1)
             
-            # Convert defaultdicts to regular dicts for JSON serialization
-            os_stats['by_os'] = dict(os_stats['by_os'])
-            for os_name in os_stats['by_os']:
-                os_stats['by_os'][os_name]['versions'] = dict(os_stats['by_os'][os_name]['versions'])
-                os_stats['by_os'][os_name]['architectures'] = dict(os_stats['by_os'][os_name]['architectures'])
-            os_stats['by_architecture'] = dict(os_stats['by_architecture'])
+            active_24h, active_hour = self._execute_prepared(ACTIVE_CLIENTS_SQL, [last_hour, last_24h])[0]
+            os_stats['active_last_24h'] = int(active_24h or 0)
+            os_stats['active_last_hour'] = int(active_hour or 0)
             
             return os_stats
             
@@ -266,14 +1059,25 @@ class AnalyticsManager:
             logger.error(f"Failed to get OS statistics: {e}")
             return {}
     
-    def get_traffic_statistics(self, days_back: int = 7) -> Dict[str, Any]:
-        """Get traffic statistics by headend."""
+    def get_traffic_statistics(self, days_back: int = 7, include_detail: bool = False) -> Dict[str, Any]:
+        """Get traffic statistics by headend.
+        
+        Totals and the per-region breakdown are aggregated in SQL; the
+        per-headend ``by_headend`` map is only loaded when ``include_detail``
+        is set.
+        """
+        return self._cached(
+            ('traffic', days_back, include_detail),
+            lambda: self._traffic_statistics(days_back, include_detail)
+        )
+    
+    def _traffic_statistics(self, days_back: int, include_detail: bool) -> Dict[str, Any]:
+        """Compute traffic statistics by headend."""
         try:
             db = self.db
-            cutoff_date = datetime.utcnow() - timedelta(days=days_back)
-            
-            # Get headend traffic stats
-            headend_stats = db(db.headend_analytics.last_heartbeat >= cutoff_date).select()
+            now = datetime.utcnow()
+            cutoff_date = now - timedelta(days=days_back)
+            active_cutoff = now - timedelta(hours=1)
             
             traffic_data = {
                 'total_bytes_proxied': 0,
@@ -281,49 +1085,65 @@ class AnalyticsManager:
                 'total_connections': 0,
                 'active_headends': 0,
                 'by_headend': {},
-                'by_region': defaultdict(lambda: {'bytes': 0, 'packets': 0, 'connections': 0}),
+                'by_region': {},
                 'timeline': []
             }
             
-            for headend in headend_stats:
-                if headend.last_heartbeat >= (datetime.utcnow() - timedelta(hours=1)):
-                    traffic_data['active_headends'] += 1
-                
-                traffic_data['total_bytes_proxied'] += headend.bytes_proxied or 0
-                traffic_data['total_packets_proxied'] += headend.packets_proxied or 0
-                traffic_data['total_connections'] += headend.total_connections or 0
-                
-                # By headend
-                traffic_data['by_headend'][headend.headend_id] = {
-                    'hostname': headend.hostname,
-                    'region': headend.region,
-                    'active_connections': headend.active_connections,
-                    'total_connections': headend.total_connections,
-                    'bytes_proxied': headend.bytes_proxied,
-                    'packets_proxied': headend.packets_proxied,
-                    'cpu_usage': headend.cpu_usage_percent,
-                    'memory_usage': headend.memory_usage_mb,
-                    'last_heartbeat': headend.last_heartbeat.isoformat() if headend.last_heartbeat else None,
-                    'auth_success_rate': (
-                        (headend.auth_successes / (headend.auth_successes + headend.auth_failures + 1)) * 100
-                        if (headend.auth_successes or headend.auth_failures) else 0
-                    )
+            # Totals across all headends reporting in the period
+            totals = self._execute_prepared(TRAFFIC_TOTALS_SQL, [active_cutoff, cutoff_date])[0]
+            (traffic_data['active_headends'], traffic_data['total_bytes_proxied'],
+             traffic_data['total_packets_proxied'], traffic_data['total_connections']) = (
+                int(value or 0) for value in totals
+            )
+            
+            # By region
+            region_rows = self._execute_prepared(TRAFFIC_BY_REGION_SQL, [cutoff_date])
+            for region, region_bytes, region_packets, region_connections in region_rows:
+                traffic_data['by_region'][region] = {
+                    'bytes': int(region_bytes or 0),
+                    'packets': int(region_packets or 0),
+                    'connections': int(region_connections or 0)
                 }
-                
-                # By region
-                if headend.region:
-                    traffic_data['by_region'][headend.region]['bytes'] += headend.bytes_proxied or 0
-                    traffic_data['by_region'][headend.region]['packets'] += headend.packets_proxied or 0
-                    traffic_data['by_region'][headend.region]['connections'] += headend.total_connections or 0
             
-            # Convert defaultdict to regular dict
-            traffic_data['by_region'] = dict(traffic_data['by_region'])
+            # By headend
+            if include_detail:
+                table = db.headend_analytics
+                headend_stats = db(table.last_heartbeat >= cutoff_date).select(
+                    table.headend_id, table.hostname, table.region, table.active_connections,
+                    table.total_connections, table.bytes_proxied, table.packets_proxied,
+                    table.cpu_usage_percent, table.memory_usage_mb, table.last_heartbeat,
+                    table.auth_successes, table.auth_failures
+                )
+                for headend in headend_stats:
+                    traffic_data['by_headend'][headend.headend_id] = {
+                        'hostname': headend.hostname,
+                        'region': headend.region,
+                        'active_connections': headend.active_connections,
+                        'total_connections': headend.total_connections,
+                        'bytes_proxied': headend.bytes_proxied,
+                        'packets_proxied': headend.packets_proxied,
+                        'cpu_usage': headend.cpu_usage_percent,
+                        'memory_usage': headend.memory_usage_mb,
+                        'last_heartbeat': headend.last_heartbeat.isoformat() if headend.last_heartbeat else None,
+                        'auth_success_rate': (
+                            (headend.auth_successes / (headend.auth_successes + headend.auth_failures + 1)) * 100
+                            if (headend.auth_successes or headend.auth_failures) else 0
+                        )
+                    }
             
             # Get timeline data from traffic_stats table
             timeline_query = db(
                 (db.traffic_stats.stat_type == 'hourly') & 
                 (db.traffic_stats.timestamp >= cutoff_date)
-            ).select(orderby=db.traffic_stats.timestamp)
+            ).select(
+                db.traffic_stats.timestamp,
+                db.traffic_stats.headend_id,
+                db.traffic_stats.total_bytes,
+                db.traffic_stats.total_packets,
+                db.traffic_stats.client_count,
+                db.traffic_stats.peak_concurrent_connections,
+                orderby=db.traffic_stats.timestamp
+            )
             
             for stat in timeline_query:
                 traffic_data['timeline'].append({
@@ -341,136 +1161,445 @@ class AnalyticsManager:
             logger.error(f"Failed to get traffic statistics: {e}")
             return {}
     
+    def _search_filter(self, search_columns: tuple, search_term: str, seek: tuple) -> tuple:
+        """Build the WHERE clause and parameters for a substring search resuming at ``seek``."""
+        conditions, params = [], []
+        
+        if search_term:
+            dialect = self.db._adapter.dbengine
+            operator = 'ILIKE' if dialect == 'postgres' else 'LIKE'
+            escaped = search_term.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+            conditions.append(f"{search_document(search_columns, dialect)} {operator} %s ESCAPE '!'")
+            params.append(f'%{escaped}%')
+        
+        seek_condition, seek_params = seek
+        if seek_condition:
+            conditions.append(seek_condition)
+            params.extend(seek_params)
+        
+        if not conditions:
+            return '', []
+        return 'WHERE ' + ' AND '.join(conditions), params
+    
+    def _search_order(self, kind: str, sort_by: str, position: Optional[list]) -> tuple:
+        """Keyset ordering for a search page: ``(sort expression, ORDER BY, seek)``.
+        
+        ``seek`` is the predicate and parameters selecting rows after
+        ``position`` (None on the first page). Rows are ordered by the sort
+        column plus the unique key, so a page resumes exactly where the last
+        one ended without OFFSET. Text columns are compared through COALESCE
+        so rows with NULLs still take part in the row comparison.
+        """
+        column, key, newest_first = SEARCH_SORTS[(kind, sort_by)]
+        sort_expression = column if newest_first else f"COALESCE({column}, '')"
+        direction = ' DESC' if newest_first else ''
+        orderby = f'{sort_expression}{direction}, {key}{direction}'
+        
+        if position is None:
+            return sort_expression, orderby, ('', [])
+        
+        value, key_value = position
+        if newest_first:
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                raise ValueError("Invalid search cursor")
+        operator = '<' if newest_first else '>'
+        return sort_expression, orderby, (f'({sort_expression}, {key}) {operator} (%s, %s)', [value, key_value])
+    
+    @staticmethod
+    def _search_position(kind: str, sort_by: str, columns: tuple, rows: List[tuple], limit: int) -> Optional[list]:
+        """Cursor position after a page of rows, or None when the results are exhausted."""
+        if len(rows) < limit:
+            return None
+        column, key, _ = SEARCH_SORTS[(kind, sort_by)]
+        value = rows[-1][columns.index(column)]
+        value = value.isoformat() if isinstance(value, datetime) else (value or '')
+        return [value, rows[-1][columns.index(key)]]
+    
+    def _search_page(
+        self,
+        table: str,
+        columns: tuple,
+        search_columns: tuple,
+        search_term: str,
+        order: tuple,
+        limit: int
+    ) -> tuple:
+        """Fetch one page of matching rows together with the count of matches from the cursor on.
+        
+        Rows are tuples of ``columns``. The count comes from a window function
+        on the same statement, so the filter is evaluated once instead of once
+        for the page and once more for a separate COUNT query.
+        """
+        _, orderby, seek = order
+        where, params = self._search_filter(search_columns, search_term, seek)
+        sql = 'SELECT {}, COUNT(*) OVER () AS total_count FROM {} {} ORDER BY {} LIMIT %s'.format(
+            ', '.join(columns), table, where, orderby
+        )
+        rows = self._executesql(sql, params + [limit])
+        
+        total = rows[0][-1] if rows else 0
+        return [row[:-1] for row in rows], total
+    
+    def _search_page_json_query(
+        self,
+        table: str,
+        expressions: tuple,
+        search_columns: tuple,
+        search_term: str,
+        order: tuple,
+        key: str,
+        limit: int,
+        now: datetime
+    ) -> tuple:
+        """Build the statement rendering one search page as a JSON array in PostgreSQL.
+        
+        Its single row holds the array, the count of matches from the cursor
+        on, the number of rows on the page, and the last row's sort value and
+        key for the next cursor. ``expressions`` may reference the
+        ``%(now)s`` marker, which is bound to ``now`` so computed columns agree
+        with the Python formatting path.
+        """
+        sort_expression, orderby, seek = order
+        where, params = self._search_filter(search_columns, search_term, seek)
+        select, now_params = bind_now(', '.join(expressions), now, [])
+        
+        sql = f"""
+            SELECT COALESCE(json_agg(to_jsonb(t) - 'total_count' - 'ordinal' - 'sort_value' - 'sort_key'
+                                     ORDER BY t.ordinal), '[]'::json)::text,
+                   COALESCE(MAX(t.total_count), 0),
+                   COUNT(*),
+                   (array_agg(t.sort_value ORDER BY t.ordinal DESC))[1],
+                   (array_agg(t.sort_key ORDER BY t.ordinal DESC))[1]
+            FROM (
+                SELECT {select},
+                       {sort_expression}::text AS sort_value,
+                       {key} AS sort_key,
+                       COUNT(*) OVER () AS total_count,
+                       ROW_NUMBER() OVER (ORDER BY {orderby}) AS ordinal
+                FROM {table} {where}
+                ORDER BY {orderby}
+                LIMIT %s
+            ) t
+        """
+        return sql, now_params + params + [limit]
+    
+    def _search_kinds(self, filter_type: str, after: Optional[str]) -> Dict[str, Optional[list]]:
+        """Result kinds to fetch for a search page, mapped to their cursor position."""
+        positions = decode_search_cursor(after) if after else {}
+        return {
+            kind: positions.get(kind)
+            for kind in ('agents', 'headends')
+            if filter_type in ('all', kind) and not (kind in positions and positions[kind] is None)
+        }
+    
+    @staticmethod
+    def _next_cursor(filter_type: str, positions: Dict[str, Optional[list]]) -> Optional[str]:
+        """Cursor for the page after this one, or None once every kind is exhausted."""
+        positions = {
+            kind: positions.get(kind)
+            for kind in ('agents', 'headends') if filter_type in ('all', kind)
+        }
+        if all(position is None for position in positions.values()):
+            return None
+        return encode_search_cursor(positions)
+    
+    def _search_json_queries(
+        self,
+        search_term: str,
+        filter_type: str,
+        sort_by: str,
+        limit: int,
+        after: Optional[str]
+    ) -> Dict[str, tuple]:
+        """The PostgreSQL JSON page statements for a search, keyed by result kind."""
+        now = datetime.utcnow()
+        kinds = self._search_kinds(filter_type, after)
+        queries = {}
+        
+        if 'agents' in kinds:
+            queries['agents'] = self._search_page_json_query(
+                'client_analytics', AGENT_SEARCH_RESULT_COLUMNS + (
+                    sql_status_case('last_seen', AGENT_STATUS_THRESHOLDS, AGENT_STATUSES),
+                    'COALESCE(bytes_sent, 0) + COALESCE(bytes_received, 0) AS total_bytes'
+                ),
+                AGENT_SEARCH_COLUMNS, search_term,
+                self._search_order('agents', sort_by, kinds['agents']), 'client_id', limit, now
+            )
+        
+        if 'headends' in kinds:
+            queries['headends'] = self._search_page_json_query(
+                'headend_analytics', tuple(
+                    c for c in HEADEND_SEARCH_RESULT_COLUMNS if c not in ('auth_successes', 'auth_failures')
+                ) + (
+                    sql_status_case('last_heartbeat', HEADEND_STATUS_THRESHOLDS, HEADEND_STATUSES),
+                    'CASE WHEN COALESCE(auth_successes, 0) <> 0 OR COALESCE(auth_failures, 0) <> 0 '
+                    'THEN auth_successes::float / (auth_successes + auth_failures + 1) * 100 '
+                    'ELSE 0 END AS auth_success_rate'
+                ),
+                HEADEND_SEARCH_COLUMNS, search_term,
+                self._search_order('headends', sort_by, kinds['headends']), 'headend_id', limit, now
+            )
+        
+        return queries
+    
+    def _search_json_results(self, filter_type: str, limit: int, pages: Dict[str, tuple]) -> Dict[str, Any]:
+        """Assemble search_json's result from the row each page statement returned."""
+        results = {
+            'agents_json': '[]',
+            'headends_json': '[]',
+            'total_agents': 0,
+            'total_headends': 0
+        }
+        positions: Dict[str, Optional[list]] = {}
+        
+        for kind, (rows_json, total, count, sort_value, sort_key) in pages.items():
+            results[f'{kind}_json'] = rows_json
+            results[f'total_{kind}'] = int(total)
+            positions[kind] = [sort_value, sort_key] if count >= limit else None
+        
+        results['next_cursor'] = self._next_cursor(filter_type, positions)
+        return results
+    
+    def search_json(
+        self,
+        search_term: str = "",
+        filter_type: str = "all",  # 'all', 'agents', 'headends'
+        sort_by: str = "last_seen",  # 'last_seen', 'hostname', 'os_name'
+        limit: int = 100,
+        after: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Search agents and headends with the result arrays serialized by the database.
+        
+        Returns ``agents_json``/``headends_json`` as ready-to-send JSON text so
+        no per-row Python dicts are built, or None when the database is not
+        PostgreSQL and the caller should use iter_agents_and_headends instead.
+        """
+        if self.db._adapter.dbengine != 'postgres':
+            return None
+        
+        queries = self._search_json_queries(search_term, filter_type, sort_by, limit, after)
+        pages = {kind: self._executesql(sql, params)[0] for kind, (sql, params) in queries.items()}
+        return self._search_json_results(filter_type, limit, pages)
+    
+    async def fetch_search_json(
+        self,
+        search_term: str = "",
+        filter_type: str = "all",
+        sort_by: str = "last_seen",
+        limit: int = 100,
+        after: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Async search_json, through the asyncpg pool when it is available.
+        
+        Both pages are fetched concurrently on separate pool connections.
+        Without the pool the PyDAL query runs on the reader threads, so the
+        event loop is never blocked while PostgreSQL renders the arrays.
+        """
+        pool = get_async_pool()
+        if pool is None:
+            return await self.run_read(self.search_json, search_term, filter_type, sort_by, limit, after)
+        
+        queries = self._search_json_queries(search_term, filter_type, sort_by, limit, after)
+        rows = await asyncio.gather(*(
+            pool.fetchrow(numbered_params(sql), *params) for sql, params in queries.values()
+        ))
+        return self._search_json_results(filter_type, limit, dict(zip(queries, rows)))
+    
+    def get_headend_details(
+        self,
+        headend_id: str,
+        client_limit: int = 50,
+        now: Optional[datetime] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Fetch a headend row together with its most recently seen clients.
+        
+        On PostgreSQL this is a single round trip: the clients are aggregated
+        into a JSON array by a LATERAL subquery next to the headend row. The
+        row's columns are returned as a dict with the clients under
+        ``connected_clients``, or None if the headend is unknown. Client
+        ``last_seen`` is ISO text from PostgreSQL and a datetime elsewhere;
+        the API serializer writes both the same way. PostgreSQL also returns
+        ``minutes_since_heartbeat``, ``status`` and ``auth_success_rate``
+        computed against ``now``.
+        """
+        if self.db._adapter.dbengine == 'postgres':
+            sql, params = bind_now(HEADEND_DETAILS_SQL, now or datetime.utcnow(), [client_limit, headend_id])
+            rows = self._executesql(sql, params, as_dict=True)
+            return rows[0] if rows else None
+        
+        rows = self._executesql(
+            'SELECT * FROM headend_analytics WHERE headend_id = %s', [headend_id], as_dict=True
+        )
+        if not rows:
+            return None
+        
+        # Only the listed columns come back, zipped into dicts in one pass
+        headend = rows[0]
+        headend['connected_clients'] = [
+            dict(zip(HEADEND_CLIENT_COLUMNS, row))
+            for row in self._executesql(f"""
+                SELECT {', '.join(HEADEND_CLIENT_COLUMNS)}
+                FROM client_analytics
+                WHERE connected_headend = %s
+                ORDER BY last_seen DESC
+                LIMIT %s
+            """, [headend_id, client_limit])
+        ]
+        return headend
+    
+    async def fetch_client(self, client_id: str, now: Optional[datetime] = None) -> Optional[Mapping[str, Any]]:
+        """Fetch one client row, through the asyncpg pool when it is available.
+        
+        On PostgreSQL the row also carries ``minutes_since_last_seen`` and
+        ``status`` computed against ``now``.
+        """
+        now = now or datetime.utcnow()
+        pool = get_async_pool()
+        if pool is not None:
+            row = await pool.fetchrow(CLIENT_DETAILS_ASYNC_SQL, now, client_id)
+            return dict(row) if row is not None else None
+        return await self.run_read(self.get_client, client_id, now)
+    
+    def get_client(self, client_id: str, now: Optional[datetime] = None) -> Optional[Mapping[str, Any]]:
+        """Blocking fetch_client through pyDAL, for use without the asyncpg pool."""
+        now = now or datetime.utcnow()
+        db = self.db
+        if db._adapter.dbengine == 'postgres':
+            sql, params = bind_now(CLIENT_DETAILS_SQL, now, [client_id])
+            rows = self._executesql(sql, params, as_dict=True)
+            return rows[0] if rows else None
+        return db(db.client_analytics.client_id == client_id).select().first()
+    
+    async def fetch_headend_details(
+        self,
+        headend_id: str,
+        client_limit: int = 50,
+        now: Optional[datetime] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Async get_headend_details, through the asyncpg pool when it is available."""
+        now = now or datetime.utcnow()
+        pool = get_async_pool()
+        if pool is None:
+            return await self.run_read(self.get_headend_details, headend_id, client_limit, now)
+        
+        row = await pool.fetchrow(HEADEND_DETAILS_ASYNC_SQL, now, client_limit, headend_id)
+        if row is None:
+            return None
+        
+        # asyncpg leaves json columns as text
+        headend = dict(row)
+        headend['connected_clients'] = json.loads(headend['connected_clients'])
+        return headend
+    
+    def _agent_rows(self, agents: List[tuple]) -> Iterator[AgentSearchResult]:
+        """Yield search result entries for client rows."""
+        now = datetime.utcnow()
+        for row in agents:
+            agent = AgentSearchResult(*row)
+            last_seen_minutes = (now - agent.last_seen).total_seconds() / 60
+            
+            agent.total_bytes = (agent.bytes_sent or 0) + (agent.bytes_received or 0)
+            agent.last_seen = agent.last_seen.isoformat() if agent.last_seen else None
+            agent.status = agent_status(last_seen_minutes)
+            yield agent
+    
+    def _headend_rows(self, headends: List[tuple]) -> Iterator[HeadendSearchResult]:
+        """Yield search result entries for headend rows."""
+        now = datetime.utcnow()
+        for *values, auth_successes, auth_failures in headends:
+            headend = HeadendSearchResult(*values)
+            last_heartbeat_minutes = (now - headend.last_heartbeat).total_seconds() / 60
+            
+            headend.auth_success_rate = (
+                (auth_successes / (auth_successes + auth_failures + 1)) * 100
+                if (auth_successes or auth_failures) else 0
+            )
+            headend.last_heartbeat = headend.last_heartbeat.isoformat() if headend.last_heartbeat else None
+            headend.status = headend_status(last_heartbeat_minutes)
+            yield headend
+    
+    def iter_agents_and_headends(
+        self,
+        search_term: str = "",
+        filter_type: str = "all",  # 'all', 'agents', 'headends'
+        sort_by: str = "last_seen",  # 'last_seen', 'hostname', 'os_name'
+        limit: int = 100,
+        after: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Search agents and headends, returning lazily formatted results.
+        
+        Queries run eagerly so errors surface here, but ``agents`` and
+        ``headends`` are generators that format each entry as it is consumed,
+        letting the HTTP layer serialize rows one at a time. Pass the returned
+        ``next_cursor`` as ``after`` to fetch the following page; totals then
+        count the matches from that point on.
+        """
+        kinds = self._search_kinds(filter_type, after)
+        positions: Dict[str, Optional[list]] = {}
+        results = {
+            'agents': iter(()),
+            'headends': iter(()),
+            'total_agents': 0,
+            'total_headends': 0
+        }
+        
+        # Search agents
+        if 'agents' in kinds:
+            # Search in hostname, OS name, IP address, or client ID
+            agents, results['total_agents'] = self._search_page(
+                'client_analytics', AGENT_SEARCH_RESULT_COLUMNS, AGENT_SEARCH_COLUMNS,
+                search_term, self._search_order('agents', sort_by, kinds['agents']), limit
+            )
+            positions['agents'] = self._search_position('agents', sort_by, AGENT_SEARCH_RESULT_COLUMNS, agents, limit)
+            results['agents'] = self._agent_rows(agents)
+        
+        # Search headends
+        if 'headends' in kinds:
+            # Search in hostname, headend ID, region, or cluster
+            headends, results['total_headends'] = self._search_page(
+                'headend_analytics', HEADEND_SEARCH_RESULT_COLUMNS, HEADEND_SEARCH_COLUMNS,
+                search_term, self._search_order('headends', sort_by, kinds['headends']), limit
+            )
+            positions['headends'] = self._search_position(
+                'headends', sort_by, HEADEND_SEARCH_RESULT_COLUMNS, headends, limit
+            )
+            results['headends'] = self._headend_rows(headends)
+        
+        results['next_cursor'] = self._next_cursor(filter_type, positions)
+        return results
+    
     def search_agents_and_headends(
         self, 
         search_term: str = "",
         filter_type: str = "all",  # 'all', 'agents', 'headends'
         sort_by: str = "last_seen",  # 'last_seen', 'hostname', 'os_name'
-        limit: int = 100
+        limit: int = 100,
+        after: Optional[str] = None
     ) -> Dict[str, Any]:
         """Search and filter agents and headends."""
         try:
-            db = self.db
-            results = {
-                'agents': [],
-                'headends': [],
-                'total_agents': 0,
-                'total_headends': 0
-            }
-            
-            # Search agents
-            if filter_type in ['all', 'agents']:
-                agent_query = db.client_analytics
-                
-                if search_term:
-                    # Search in hostname, OS name, IP address, or client ID
-                    agent_query = agent_query(
-                        (db.client_analytics.hostname.contains(search_term)) |
-                        (db.client_analytics.os_name.contains(search_term)) |
-                        (db.client_analytics.ip_address.contains(search_term)) |
-                        (db.client_analytics.client_id.contains(search_term)) |
-                        (db.client_analytics.os_version.contains(search_term))
-                    )
-                
-                # Sort
-                if sort_by == 'hostname':
-                    orderby = db.client_analytics.hostname
-                elif sort_by == 'os_name':
-                    orderby = db.client_analytics.os_name
-                else:
-                    orderby = ~db.client_analytics.last_seen  # Newest first
-                
-                agents = agent_query.select(limitby=(0, limit), orderby=orderby)
-                results['total_agents'] = agent_query.count()
-                
-                for agent in agents:
-                    # Calculate status
-                    last_seen_minutes = (datetime.utcnow() - agent.last_seen).total_seconds() / 60
-                    if last_seen_minutes <= 5:
-                        status = 'online'
-                    elif last_seen_minutes <= 60:
-                        status = 'recently_active'
-                    elif last_seen_minutes <= 1440:  # 24 hours
-                        status = 'offline'
-                    else:
-                        status = 'stale'
-                    
-                    results['agents'].append({
-                        'client_id': agent.client_id,
-                        'hostname': agent.hostname,
-                        'os_name': agent.os_name,
-                        'os_version': agent.os_version,
-                        'architecture': agent.architecture,
-                        'client_version': agent.client_version,
-                        'ip_address': agent.ip_address,
-                        'connected_headend': agent.connected_headend,
-                        'connection_duration': agent.connection_duration,
-                        'bytes_sent': agent.bytes_sent,
-                        'bytes_received': agent.bytes_received,
-                        'last_seen': agent.last_seen.isoformat() if agent.last_seen else None,
-                        'status': status,
-                        'total_bytes': (agent.bytes_sent or 0) + (agent.bytes_received or 0)
-                    })
-            
-            # Search headends
-            if filter_type in ['all', 'headends']:
-                headend_query = db.headend_analytics
-                
-                if search_term:
-                    # Search in hostname, headend ID, region, or cluster
-                    headend_query = headend_query(
-                        (db.headend_analytics.hostname.contains(search_term)) |
-                        (db.headend_analytics.headend_id.contains(search_term)) |
-                        (db.headend_analytics.region.contains(search_term)) |
-                        (db.headend_analytics.cluster_id.contains(search_term))
-                    )
-                
-                # Sort
-                if sort_by == 'hostname':
-                    orderby = db.headend_analytics.hostname
-                else:
-                    orderby = ~db.headend_analytics.last_heartbeat  # Newest first
-                
-                headends = headend_query.select(limitby=(0, limit), orderby=orderby)
-                results['total_headends'] = headend_query.count()
-                
-                for headend in headends:
-                    # Calculate status
-                    last_heartbeat_minutes = (datetime.utcnow() - headend.last_heartbeat).total_seconds() / 60
-                    if last_heartbeat_minutes <= 2:
-                        status = 'healthy'
-                    elif last_heartbeat_minutes <= 10:
-                        status = 'warning'
-                    else:
-                        status = 'critical'
-                    
-                    results['headends'].append({
-                        'headend_id': headend.headend_id,
-                        'hostname': headend.hostname,
-                        'region': headend.region,
-                        'cluster_id': headend.cluster_id,
-                        'version': headend.version,
-                        'active_connections': headend.active_connections,
-                        'total_connections': headend.total_connections,
-                        'bytes_proxied': headend.bytes_proxied,
-                        'packets_proxied': headend.packets_proxied,
-                        'cpu_usage_percent': headend.cpu_usage_percent,
-                        'memory_usage_mb': headend.memory_usage_mb,
-                        'disk_usage_percent': headend.disk_usage_percent,
-                        'auth_success_rate': (
-                            (headend.auth_successes / (headend.auth_successes + headend.auth_failures + 1)) * 100
-                            if (headend.auth_successes or headend.auth_failures) else 0
-                        ),
-                        'last_heartbeat': headend.last_heartbeat.isoformat() if headend.last_heartbeat else None,
-                        'status': status
-                    })
-            
+            results = self.iter_agents_and_headends(search_term, filter_type, sort_by, limit, after)
+            results['agents'] = [asdict(agent) for agent in results['agents']]
+            results['headends'] = [asdict(headend) for headend in results['headends']]
             return results
             
         except Exception as e:
             logger.error(f"Failed to search agents and headends: {e}")
-            return {'agents': [], 'headends': [], 'total_agents': 0, 'total_headends': 0}
+            return {'agents': [], 'headends': [], 'total_agents': 0, 'total_headends': 0, 'next_cursor': None}
+
+
+# Global analytics manager instance, created on first use
+_analytics_manager: Optional[AnalyticsManager] = None
+_analytics_manager_lock = threading.Lock()
 
 
-# Global analytics manager instance
-analytics_manager = AnalyticsManager()
\ No newline at end of file
+def get_analytics_manager() -> AnalyticsManager:
+    """Get the global analytics manager, creating it on first use."""
+    global _analytics_manager
+    if _analytics_manager is None:
+        with _analytics_manager_lock:
+            if _analytics_manager is None:
+                _analytics_manager = AnalyticsManager()
+    return _analytics_manager
\ No newline at end of file
@@ -1,38 +1,90 @@
 """Analytics dashboard API routes for SASEWaddle Manager."""
 
+import asyncio
 import os
 from datetime import datetime, timedelta
 from py4web import action, request, response, abort, redirect, URL
 from py4web.core import Fixture
 import json
 
-from analytics import analytics_manager
-from web.auth import get_current_user, user_manager
+from analytics import get_analytics_manager, agent_status, headend_status, day_bucket, ANALYTICS_DAY_BUCKETS
+from api.payloads import decode_client_activity, decode_client_activities, decode_headend_stats
+from api.serialization import dumps, generated_at, json_response, JSONFixture
+from cache.redis_cache import get_cache
+from metrics.prometheus import manager_metrics
+from web.auth import AuthFixture, auth_required
+
+# Headends report with the shared HEADEND_API_KEY instead of a user session
+headend_auth_required = AuthFixture(api_key_env='HEADEND_API_KEY')
+
+# Cached aggregate responses: browsers may reuse them briefly and revalidate by ETag
+cached_json_response = JSONFixture(max_age=30)
+
+# Most records accepted by one batch ingest request
+ANALYTICS_MAX_BATCH_RECORDS = 1000
+
+# Seconds a client is told to wait before resending records the ingest queue
+# could not take
+ANALYTICS_RETRY_AFTER = int(os.getenv('ANALYTICS_RETRY_AFTER', '5'))
+
+# Seconds aggregated dashboard responses are shared through Redis
+ANALYTICS_RESPONSE_CACHE_TTL = int(os.getenv('ANALYTICS_RESPONSE_CACHE_TTL', '60'))
+
+# Seconds between background rebuilds of the dashboard overview snapshots
+ANALYTICS_SNAPSHOT_INTERVAL = int(os.getenv('ANALYTICS_SNAPSHOT_INTERVAL', '30'))
+
+
+# Responses being computed after a cache miss, by cache key
+_inflight = {}
+
+
+async def _cached_response(key, compute):
+    """Return the response cached in Redis under ``key``, awaiting ``compute()`` and storing it on a miss.
+    
+    Concurrent misses on the same key share a single computation instead of
+    each running the queries. If Redis is unavailable every request simply
+    computes the response.
+    """
+    cache = await get_cache()
+    cached = await cache.get(key)
+    manager_metrics.record_cache_lookup('analytics', cached is not None)
+    if cached is not None:
+        return cached
+    
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_compute_and_store(cache, key, compute))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shielded so one caller going away does not cancel the others' result
+    return await asyncio.shield(task)
+
+
+async def _compute_and_store(cache, key, compute):
+    result = await compute()
+    await _store(cache, key, result, ANALYTICS_RESPONSE_CACHE_TTL)
+    return result
+
+
+async def _store(cache, key, result, ttl):
+    """Cache a built response unless its queries failed.
+    
+    The statistics queries return empty data on error; such a response is
+    still served, but caching it would repeat the failure for the whole TTL.
+    """
+    if result.get('success'):
+        await cache.set(key, result, ttl)
 
 
 @action('api/analytics/os-stats', method=['GET'])
-@action.uses('json')
+@action.uses('json', auth_required, cached_json_response)
 async def get_os_statistics():
     """Get operating system distribution statistics."""
-    # Check authentication
-    user = get_current_user()
-    if not user:
-        response.status = 401
-        return {"error": "Authentication required"}
-    
     try:
         # Get query parameters
-        days_back = int(request.query.get('days', 7))
-        days_back = min(days_back, 90)  # Limit to 90 days max
-        
-        stats = analytics_manager.get_os_statistics(days_back=days_back)
+        days_back = day_bucket(int(request.query.get('days', 7)))  # 1, 3, 7, 30 or 90
         
-        return {
-            "success": True,
-            "data": stats,
-            "period_days": days_back,
-            "generated_at": datetime.utcnow().isoformat()
-        }
+        return await _cached_response(_os_stats_key(days_back), lambda: _build_os_statistics(days_back))
         
     except ValueError as e:
         response.status = 400
@@ -43,28 +95,19 @@ async def get_os_statistics():
 
 
 @action('api/analytics/traffic-stats', method=['GET'])
-@action.uses('json')
+@action.uses('json', auth_required, cached_json_response)
 async def get_traffic_statistics():
     """Get traffic statistics by headend."""
-    # Check authentication
-    user = get_current_user()
-    if not user:
-        response.status = 401
-        return {"error": "Authentication required"}
-    
     try:
         # Get query parameters
-        days_back = int(request.query.get('days', 7))
-        days_back = min(days_back, 90)  # Limit to 90 days max
+        days_back = day_bucket(int(request.query.get('days', 7)))  # 1, 3, 7, 30 or 90
         
-        stats = analytics_manager.get_traffic_statistics(days_back=days_back)
+        include_detail = request.query.get('detail', 'true').lower() == 'true'
         
-        return {
-            "success": True,
-            "data": stats,
-            "period_days": days_back,
-            "generated_at": datetime.utcnow().isoformat()
-        }
+        return await _cached_response(
+            _traffic_stats_key(days_back, include_detail),
+            lambda: _build_traffic_statistics(days_back, include_detail)
+        )
         
     except ValueError as e:
         response.status = 400
@@ -74,22 +117,55 @@ async def get_traffic_statistics():
         return {"error": str(e)}
 
 
+def _os_stats_key(days_back):
+    """Redis key of the OS statistics response for a reporting window."""
+    return f"analytics:os-stats:{days_back}"
+
+
+async def _build_os_statistics(days_back):
+    """Compose the OS statistics response for a reporting window."""
+    analytics_manager = get_analytics_manager()
+    data = await analytics_manager.run_read(analytics_manager.get_os_statistics, days_back=days_back)
+    return {
+        "success": bool(data),
+        "data": data,
+        "period_days": days_back,
+        "generated_at": generated_at()
+    }
+
+
+def _traffic_stats_key(days_back, include_detail):
+    """Redis key of the traffic statistics response for a reporting window."""
+    return f"analytics:traffic-stats:{days_back}:{int(include_detail)}"
+
+
+async def _build_traffic_statistics(days_back, include_detail):
+    """Compose the traffic statistics response for a reporting window."""
+    analytics_manager = get_analytics_manager()
+    data = await analytics_manager.run_read(
+        analytics_manager.get_traffic_statistics,
+        days_back=days_back,
+        include_detail=include_detail
+    )
+    return {
+        "success": bool(data),
+        "data": data,
+        "period_days": days_back,
+        "generated_at": generated_at()
+    }
+
+
 @action('api/analytics/search', method=['GET'])
-@action.uses('json')
+@action.uses('json', auth_required, json_response)
 async def search_agents_headends():
     """Search and filter agents and headends."""
-    # Check authentication
-    user = get_current_user()
-    if not user:
-        response.status = 401
-        return {"error": "Authentication required"}
-    
     try:
         # Get query parameters
         search_term = request.query.get('q', '').strip()
         filter_type = request.query.get('type', 'all')  # 'all', 'agents', 'headends'
         sort_by = request.query.get('sort', 'last_seen')  # 'last_seen', 'hostname', 'os_name'
         limit = int(request.query.get('limit', 100))
+        after = request.query.get('after') or None  # next_cursor from the previous page
         
         # Validate parameters
         if filter_type not in ['all', 'agents', 'headends']:
@@ -102,23 +178,46 @@ async def search_agents_headends():
         
         limit = min(limit, 500)  # Limit to 500 results max
         
-        results = analytics_manager.search_agents_and_headends(
-            search_term=search_term,
-            filter_type=filter_type,
-            sort_by=sort_by,
-            limit=limit
-        )
-        
-        return {
-            "success": True,
-            "data": results,
+        analytics_manager = get_analytics_manager()
+        meta = {
             "search_term": search_term,
             "filter_type": filter_type,
             "sort_by": sort_by,
             "limit": limit,
-            "generated_at": datetime.utcnow().isoformat()
+            "generated_at": generated_at()
         }
         
+        response.headers['Content-Type'] = 'application/json'
+        
+        # PostgreSQL renders the result arrays itself; pass them through as-is
+        raw = await analytics_manager.fetch_search_json(
+            search_term=search_term,
+            filter_type=filter_type,
+            sort_by=sort_by,
+            limit=limit,
+            after=after
+        )
+        if raw is not None:
+            return (
+                '{"success": true, "data": {"agents": %s, "headends": %s, '
+                '"total_agents": %d, "total_headends": %d, "next_cursor": %s}, ' % (
+                    raw['agents_json'], raw['headends_json'],
+                    raw['total_agents'], raw['total_headends'], json.dumps(raw['next_cursor'])
+                )
+                + json.dumps(meta)[1:]
+            )
+        
+        # Queries run on the reader threads; rows are formatted as the body is sent
+        results = await analytics_manager.run_read(
+            analytics_manager.iter_agents_and_headends,
+            search_term=search_term,
+            filter_type=filter_type,
+            sort_by=sort_by,
+            limit=limit,
+            after=after
+        )
+        return _stream_search_response(results, meta)
+        
     except ValueError as e:
         response.status = 400
         return {"error": f"Invalid parameter: {str(e)}"}
@@ -127,68 +226,69 @@ async def search_agents_headends():
         return {"error": str(e)}
 
 
+def _stream_search_response(results, meta):
+    """Serialize search results one row at a time in the usual response envelope."""
+    yield '{"success": true, "data": {"agents": ['
+    for index, agent in enumerate(results['agents']):
+        yield (',' if index else '') + dumps(agent).decode()
+    yield '], "headends": ['
+    for index, headend in enumerate(results['headends']):
+        yield (',' if index else '') + dumps(headend).decode()
+    yield '], "total_agents": %d, "total_headends": %d, "next_cursor": %s}, ' % (
+        results['total_agents'], results['total_headends'], json.dumps(results['next_cursor'])
+    )
+    yield json.dumps(meta)[1:]
+
+
 @action('api/analytics/client/<client_id>/details', method=['GET'])
-@action.uses('json')
+@action.uses('json', auth_required, json_response)
 async def get_client_details(client_id):
     """Get detailed information about a specific client."""
-    # Check authentication
-    user = get_current_user()
-    if not user:
-        response.status = 401
-        return {"error": "Authentication required"}
-    
     try:
-        db = analytics_manager.db
-        
-        # Get client details
-        client = db(db.client_analytics.client_id == client_id).select().first()
+        # Get client details; on PostgreSQL age and status come back with the row
+        now = datetime.utcnow()
+        client = await get_analytics_manager().fetch_client(client_id, now)
         
         if not client:
             response.status = 404
             return {"error": f"Client {client_id} not found"}
         
         # Calculate additional metrics
-        last_seen_minutes = (datetime.utcnow() - client.last_seen).total_seconds() / 60
-        total_bytes = (client.bytes_sent or 0) + (client.bytes_received or 0)
-        
-        if last_seen_minutes <= 5:
-            status = 'online'
-        elif last_seen_minutes <= 60:
-            status = 'recently_active'
-        elif last_seen_minutes <= 1440:  # 24 hours
-            status = 'offline'
-        else:
-            status = 'stale'
+        last_seen_minutes = client.get('minutes_since_last_seen')
+        if last_seen_minutes is None:
+            last_seen_minutes = (now - client['last_seen']).total_seconds() / 60
+        total_bytes = (client['bytes_sent'] or 0) + (client['bytes_received'] or 0)
+        status = client.get('status') or agent_status(last_seen_minutes)
         
         # Get connection history (if we have it)
         connection_history = []
         # This would query a connection_logs table if we had one
         
         client_details = {
-            "client_id": client.client_id,
-            "hostname": client.hostname,
+            "client_id": client['client_id'],
+            "hostname": client['hostname'],
             "os_info": {
-                "name": client.os_name,
-                "version": client.os_version,
-                "architecture": client.architecture
+                "name": client['os_name'],
+                "version": client['os_version'],
+                "architecture": client['architecture']
             },
-            "client_version": client.client_version,
+            "client_version": client['client_version'],
             "network_info": {
-                "ip_address": client.ip_address,
-                "connected_headend": client.connected_headend
+                "ip_address": client['ip_address'],
+                "connected_headend": client['connected_headend']
             },
             "connection_stats": {
-                "duration": client.connection_duration,
-                "bytes_sent": client.bytes_sent,
-                "bytes_received": client.bytes_received,
-                "packets_sent": client.packets_sent,
-                "packets_received": client.packets_received,
+                "duration": client['connection_duration'],
+                "bytes_sent": client['bytes_sent'],
+                "bytes_received": client['bytes_received'],
+                "packets_sent": client['packets_sent'],
+                "packets_received": client['packets_received'],
                 "total_bytes": total_bytes
             },
             "timestamps": {
-                "created_at": client.created_at.isoformat() if client.created_at else None,
-                "last_seen": client.last_seen.isoformat() if client.last_seen else None,
-                "updated_at": client.updated_at.isoformat() if client.updated_at else None,
+                "created_at": client['created_at'],
+                "last_seen": client['last_seen'],
+                "updated_at": client['updated_at'],
                 "minutes_since_last_seen": int(last_seen_minutes)
             },
             "status": status,
@@ -198,7 +298,7 @@ async def get_client_details(client_id):
         return {
             "success": True,
             "data": client_details,
-            "generated_at": datetime.utcnow().isoformat()
+            "generated_at": generated_at()
         }
         
     except Exception as e:
@@ -207,85 +307,62 @@ async def get_client_details(client_id):
 
 
 @action('api/analytics/headend/<headend_id>/details', method=['GET'])
-@action.uses('json')
+@action.uses('json', auth_required, json_response)
 async def get_headend_details(headend_id):
     """Get detailed information about a specific headend."""
-    # Check authentication
-    user = get_current_user()
-    if not user:
-        response.status = 401
-        return {"error": "Authentication required"}
-    
     try:
-        db = analytics_manager.db
-        
-        # Get headend details
-        headend = db(db.headend_analytics.headend_id == headend_id).select().first()
+        # Headend row and its 50 most recently seen clients in one call
+        now = datetime.utcnow()
+        headend = await get_analytics_manager().fetch_headend_details(headend_id, client_limit=50, now=now)
         
         if not headend:
             response.status = 404
             return {"error": f"Headend {headend_id} not found"}
         
-        # Calculate additional metrics
-        last_heartbeat_minutes = (datetime.utcnow() - headend.last_heartbeat).total_seconds() / 60
-        auth_total = (headend.auth_successes or 0) + (headend.auth_failures or 0)
-        auth_success_rate = (headend.auth_successes / auth_total * 100) if auth_total > 0 else 0
-        
-        if last_heartbeat_minutes <= 2:
-            status = 'healthy'
-        elif last_heartbeat_minutes <= 10:
-            status = 'warning'
-        else:
-            status = 'critical'
-        
-        # Get connected clients
-        connected_clients = db(db.client_analytics.connected_headend == headend_id).select(
-            limitby=(0, 50),  # Limit to 50 most recent
-            orderby=~db.client_analytics.last_seen
-        )
+        # Calculate additional metrics not already derived in SQL
+        last_heartbeat_minutes = headend.get('minutes_since_heartbeat')
+        if last_heartbeat_minutes is None:
+            last_heartbeat_minutes = (now - headend['last_heartbeat']).total_seconds() / 60
+        auth_total = (headend['auth_successes'] or 0) + (headend['auth_failures'] or 0)
+        auth_success_rate = headend.get('auth_success_rate')
+        if auth_success_rate is None:
+            auth_success_rate = (headend['auth_successes'] / auth_total * 100) if auth_total > 0 else 0
+        status = headend.get('status') or headend_status(last_heartbeat_minutes)
         
-        client_list = []
-        for client in connected_clients:
-            client_list.append({
-                "client_id": client.client_id,
-                "hostname": client.hostname,
-                "os_name": client.os_name,
-                "ip_address": client.ip_address,
-                "last_seen": client.last_seen.isoformat() if client.last_seen else None
-            })
+        client_list = headend['connected_clients']
         
         headend_details = {
-            "headend_id": headend.headend_id,
-            "hostname": headend.hostname,
+            "headend_id": headend['headend_id'],
+            "hostname": headend['hostname'],
             "location_info": {
-                "region": headend.region,
-                "cluster_id": headend.cluster_id
+                "region": headend['region'],
+                "cluster_id": headend['cluster_id']
             },
-            "version": headend.version,
+            "version": headend['version'],
             "connection_stats": {
-                "active_connections": headend.active_connections,
-                "total_connections": headend.total_connections,
-                "bytes_proxied": headend.bytes_proxied,
-                "packets_proxied": headend.packets_proxied
+                "active_connections": headend['active_connections'],
+                "total_connections": headend['total_connections'],
+                "bytes_proxied": headend['bytes_proxied'],
+                "packets_proxied": headend['packets_proxied']
             },
             "system_metrics": {
-                "cpu_usage_percent": headend.cpu_usage_percent,
-                "memory_usage_mb": headend.memory_usage_mb,
-                "disk_usage_percent": headend.disk_usage_percent
+                "cpu_usage_percent": headend['cpu_usage_percent'],
+                "memory_usage_mb": headend['memory_usage_mb'],
+                "disk_usage_percent": headend['disk_usage_percent']
             },
             "auth_stats": {
-                "successes": headend.auth_successes,
-                "failures": headend.auth_failures,
-                "success_rate": round(auth_success_rate, 2),
+                "successes": headend['auth_successes'],
+                "failures": headend['auth_failures'],
+                "success_rate": round(float(auth_success_rate), 2),
                 "total_attempts": auth_total
             },
             "error_stats": {
-                "network_errors": headend.network_errors
+                "network_errors": headend['network_errors']
             },
             "timestamps": {
-                "created_at": headend.created_at.isoformat() if headend.created_at else None,
-                "last_heartbeat": headend.last_heartbeat.isoformat() if headend.last_heartbeat else None,
-                "updated_at": headend.updated_at.isoformat() if headend.updated_at else None,
+                "created_at": headend['created_at'],
+                "last_heartbeat": headend['last_heartbeat'],
+                "updated_at": headend['updated_at'],
                 "minutes_since_heartbeat": int(last_heartbeat_minutes)
             },
             "status": status,
@@ -296,7 +373,7 @@ async def get_headend_details(headend_id):
         return {
             "success": True,
             "data": headend_details,
-            "generated_at": datetime.utcnow().isoformat()
+            "generated_at": generated_at()
         }
         
     except Exception as e:
@@ -305,31 +382,25 @@ async def get_headend_details(headend_id):
 
 
 @action('api/analytics/record/client', method=['POST'])
-@action.uses('json')
+@action.uses('json', auth_required, json_response)
 async def record_client_activity():
     """Record client activity data (called by clients or headends)."""
-    # Check authentication
-    user = get_current_user()
-    if not user:
-        response.status = 401
-        return {"error": "Authentication required"}
-    
     try:
-        # Get client data from request
-        data = await request.json()
-        
-        # Validate required fields
-        if 'client_id' not in data:
+        # Parse and validate the client data in one pass
+        try:
+            data = decode_client_activity(request.body.read())
+        except ValueError as e:
             response.status = 400
-            return {"error": "client_id is required"}
+            return {"error": str(e)}
         
         # Record the activity
-        success = analytics_manager.record_client_activity(data)
+        success = get_analytics_manager().record_client_activity(data)
         
         if success:
+            response.status = 202
             return {
                 "success": True,
-                "message": "Client activity recorded",
+                "message": "Client activity accepted",
                 "client_id": data['client_id']
             }
         else:
@@ -341,35 +412,71 @@ async def record_client_activity():
         return {"error": str(e)}
 
 
+@action('api/analytics/record/clients', method=['POST'])
+@action.uses('json', auth_required, json_response)
+async def record_client_activities():
+    """Record a batch of client activity data in one request."""
+    try:
+        # Parse and validate the whole batch in one pass
+        try:
+            records = decode_client_activities(request.body.read())
+        except ValueError as e:
+            response.status = 400
+            return {"error": str(e)}
+        
+        if not records:
+            response.status = 400
+            return {"error": "records must be a non-empty list"}
+        
+        if len(records) > ANALYTICS_MAX_BATCH_RECORDS:
+            response.status = 400
+            return {"error": f"At most {ANALYTICS_MAX_BATCH_RECORDS} records per request"}
+        
+        # Record the activity
+        accepted = get_analytics_manager().record_client_activities(records)
+        
+        if accepted == len(records):
+            response.status = 202
+            return {
+                "success": True,
+                "message": "Client activity accepted",
+                "accepted": accepted
+            }
+        else:
+            # Backpressure, not a server bug: the rejected records can be resent
+            response.status = 503
+            response.headers['Retry-After'] = str(ANALYTICS_RETRY_AFTER)
+            return {
+                "error": "Analytics ingest is busy; retry the rejected records",
+                "accepted": accepted,
+                "rejected": len(records) - accepted
+            }
+        
+    except Exception as e:
+        response.status = 500
+        return {"error": str(e)}
+
+
 @action('api/analytics/record/headend', method=['POST'])
-@action.uses('json')
+@action.uses('json', headend_auth_required, json_response)
 async def record_headend_stats():
     """Record headend statistics (called by headends)."""
-    # Check authentication - could be API key or token-based for headends
-    user = get_current_user()
-    if not user:
-        # Try API key authentication for headend services
-        api_key = request.headers.get('X-API-Key')
-        if not api_key or api_key != os.getenv('HEADEND_API_KEY'):
-            response.status = 401
-            return {"error": "Authentication required"}
-    
     try:
-        # Get headend data from request
-        data = await request.json()
-        
-        # Validate required fields
-        if 'headend_id' not in data:
+        # Parse and validate the headend data in one pass
+        try:
+            data = decode_headend_stats(request.body.read())
+        except ValueError as e:
             response.status = 400
-            return {"error": "headend_id is required"}
+            return {"error": str(e)}
         
         # Record the stats
-        success = analytics_manager.record_headend_stats(data)
+        success = get_analytics_manager().record_headend_stats(data)
         
         if success:
+            response.status = 202
             return {
                 "success": True,
-                "message": "Headend stats recorded",
+                "message": "Headend stats accepted",
                 "headend_id": data['headend_id']
             }
         else:
@@ -382,69 +489,104 @@ async def record_headend_stats():
 
 
 @action('api/analytics/dashboard/overview', method=['GET'])
-@action.uses('json')
+@action.uses('json', auth_required, cached_json_response)
 async def get_dashboard_overview():
     """Get overview dashboard data combining all analytics."""
-    # Check authentication
-    user = get_current_user()
-    if not user:
-        response.status = 401
-        return {"error": "Authentication required"}
-    
     try:
         # Get query parameters
-        days_back = int(request.query.get('days', 7))
-        days_back = min(days_back, 90)  # Limit to 90 days max
-        
-        # Gather all dashboard data
-        os_stats = analytics_manager.get_os_statistics(days_back=days_back)
-        traffic_stats = analytics_manager.get_traffic_statistics(days_back=days_back)
+        days_back = day_bucket(int(request.query.get('days', 7)))  # 1, 3, 7, 30 or 90
         
-        # Get recent activity summary
-        search_results = analytics_manager.search_agents_and_headends(
-            search_term="",
-            filter_type="all",
-            sort_by="last_seen",
-            limit=10
+        # Normally served from the snapshot kept warm by refresh_dashboard_snapshots()
+        return await _cached_response(
+            _dashboard_key(days_back), lambda: _build_dashboard_overview(days_back)
         )
         
-        overview = {
-            "summary": {
-                "total_clients": os_stats.get('total_clients', 0),
-                "active_clients_24h": os_stats.get('active_last_24h', 0),
-                "active_clients_1h": os_stats.get('active_last_hour', 0),
-                "active_headends": traffic_stats.get('active_headends', 0),
-                "total_bytes_proxied": traffic_stats.get('total_bytes_proxied', 0),
-                "total_connections": traffic_stats.get('total_connections', 0)
-            },
-            "os_distribution": os_stats.get('by_os', {}),
-            "architecture_distribution": os_stats.get('by_architecture', {}),
-            "traffic_by_region": traffic_stats.get('by_region', {}),
-            "top_headends": [
-                {
-                    "headend_id": hid,
-                    "hostname": hdata.get('hostname'),
-                    "region": hdata.get('region'),
-                    "bytes_proxied": hdata.get('bytes_proxied', 0),
-                    "active_connections": hdata.get('active_connections', 0),
-                    "status": "healthy" if hdata.get('last_heartbeat') else "unknown"
-                }
-                for hid, hdata in list(traffic_stats.get('by_headend', {}).items())[:5]
-            ],
-            "recent_agents": search_results.get('agents', [])[:5],
-            "recent_headends": search_results.get('headends', [])[:5],
-            "period_days": days_back,
-            "generated_at": datetime.utcnow().isoformat()
-        }
-        
-        return {
-            "success": True,
-            "data": overview
-        }
-        
     except ValueError as e:
         response.status = 400
         return {"error": f"Invalid parameter: {str(e)}"}
     except Exception as e:
         response.status = 500
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+
+def _dashboard_key(days_back):
+    """Redis key of the dashboard overview for a reporting window."""
+    return f"analytics:dashboard-overview:{days_back}"
+
+
+async def _build_dashboard_overview(days_back):
+    """Compose the dashboard overview response for a reporting window."""
+    # Gather all dashboard data; the three reads touch independent
+    # tables, so they run concurrently on the reader threads
+    analytics_manager = get_analytics_manager()
+    os_stats, traffic_stats, search_results = await asyncio.gather(
+        analytics_manager.run_read(analytics_manager.get_os_statistics, days_back=days_back),
+        analytics_manager.run_read(
+            analytics_manager.get_traffic_statistics, days_back=days_back, include_detail=True
+        ),
+        # Recent activity summary
+        analytics_manager.run_read(
+            analytics_manager.search_agents_and_headends,
+            search_term="",
+            filter_type="all",
+            sort_by="last_seen",
+            limit=10
+        )
+    )
+    
+    overview = {
+        "summary": {
+            "total_clients": os_stats.get('total_clients', 0),
+            "active_clients_24h": os_stats.get('active_last_24h', 0),
+            "active_clients_1h": os_stats.get('active_last_hour', 0),
+            "active_headends": traffic_stats.get('active_headends', 0),
+            "total_bytes_proxied": traffic_stats.get('total_bytes_proxied', 0),
+            "total_connections": traffic_stats.get('total_connections', 0)
+        },
+        "os_distribution": os_stats.get('by_os', {}),
+        "architecture_distribution": os_stats.get('by_architecture', {}),
+        "traffic_by_region": traffic_stats.get('by_region', {}),
+        "top_headends": [
+            {
+                "headend_id": hid,
+                "hostname": hdata.get('hostname'),
+                "region": hdata.get('region'),
+                "bytes_proxied": hdata.get('bytes_proxied', 0),
+                "active_connections": hdata.get('active_connections', 0),
+                "status": "healthy" if hdata.get('last_heartbeat') else "unknown"
+            }
+            for hid, hdata in list(traffic_stats.get('by_headend', {}).items())[:5]
+        ],
+        "recent_agents": search_results.get('agents', [])[:5],
+        "recent_headends": search_results.get('headends', [])[:5],
+        "period_days": days_back,
+        "generated_at": generated_at()
+    }
+    
+    return {
+        "success": bool(os_stats and traffic_stats),
+        "data": overview
+    }
+
+
+async def refresh_dashboard_snapshots():
+    """Rebuild the cached dashboard and statistics responses for every reporting window.
+    
+    Run periodically in the background so requests, from any worker, are
+    answered from Redis instead of aggregating on demand. Windows are
+    bucketed, so this covers every response those endpoints can produce.
+    The snapshots outlive a few missed refreshes and then expire, after
+    which requests build the responses themselves again.
+    """
+    cache = await get_cache()
+    ttl = ANALYTICS_SNAPSHOT_INTERVAL * 3
+    for days_back in ANALYTICS_DAY_BUCKETS:
+        await _store(cache, _dashboard_key(days_back), await _build_dashboard_overview(days_back), ttl)
+        await _store(cache, _os_stats_key(days_back), await _build_os_statistics(days_back), ttl)
+        for include_detail in (True, False):
+            await _store(
+                cache,
+                _traffic_stats_key(days_back, include_detail),
+                await _build_traffic_statistics(days_back, include_detail),
+                ttl
+            )
@@ -1,61 +1,138 @@
 """Audit logging and compliance reporting API endpoints."""
 
-import json
+import os
 import logging
+import operator
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from functools import reduce
+from typing import Dict, Any, List, Optional
 
 from py4web import action, request, response, abort, URL, HTTP
 from py4web.utils.cors import cors
+from pydal.objects import Expression
 
 from database import get_db
-from ..audit import audit_logger, AuditEventType, ComplianceFramework
-from ..audit.compliance import compliance_reporter
-from ..security.middleware import security_fixture, require_admin_role
+from ..audit import audit_logger, AuditEventType, ComplianceFramework, encode_page_cursor, keyset_after
+from ..audit.compliance import compliance_reporter, REPORT_TYPES
+from ..security.middleware import security_fixture, require_admin_role, client_ip
+from .payloads import RequestSchema, REQUIRED
+from .serialization import json_response, compressed_json_response, compress_body, loads, PrebuiltJSON
 
 logger = logging.getLogger(__name__)
 
+# Request values are validated with dict lookups built once at import rather
+# than by constructing enums (or scanning lists) per request
+_EVENT_TYPES = {event_type.value: event_type for event_type in AuditEventType}
+_COMPLIANCE_FRAMEWORKS = {framework.value: framework for framework in ComplianceFramework}
+
+# Query string and body schemas, validated and coerced in one pass
+_EVENTS_QUERY = RequestSchema('AuditEventsQuery', {
+    'page': (int, 1),
+    'limit': (int, 100),
+    'cursor': (str, None),
+    'start_date': (datetime, None),
+    'end_date': (datetime, None),
+    'user_id': (str, None),
+    'event_types': (str, None),
+    'severity': (str, None),
+    'compliance_framework': (str, None),
+})
+_STATISTICS_QUERY = RequestSchema('AuditStatisticsQuery', {
+    'start_date': (datetime, None),
+    'end_date': (datetime, None),
+    'compliance_framework': (str, None),
+})
+_INTEGRITY_REQUEST = RequestSchema('IntegrityRequest', {
+    'start_date': (datetime, REQUIRED),
+    'end_date': (datetime, REQUIRED),
+})
+_REPORTS_QUERY = RequestSchema('ComplianceReportsQuery', {
+    'framework': (str, None),
+    'status': (str, None),
+    'page': (int, 1),
+    'limit': (int, 50),
+    'cursor': (str, None),
+})
+_REPORT_REQUEST = RequestSchema('ComplianceReportRequest', {
+    'framework': (str, REQUIRED),
+    'start_date': (datetime, REQUIRED),
+    'end_date': (datetime, REQUIRED),
+})
+
+# Columns of a report in the list response, in response order
+_REPORT_LIST_COLUMNS = (
+    'report_id', 'framework', 'report_type', 'start_date', 'end_date',
+    'generated_by', 'status', 'created_at', 'completed_at', 'file_path'
+)
+
+
+def _request_data() -> Dict[str, Any]:
+    """Decode the JSON request body; an empty body is an empty object."""
+    body = request.body.read()
+    return loads(body) if body else {}
+
+
+def _pagination(page: int, limit: int, total_count: Optional[int], next_cursor, cursor,
+                has_more: Optional[bool] = None, total_count_estimate: Optional[int] = None) -> Dict[str, Any]:
+    """Pagination block of a list response.
+    
+    Page numbers only apply to offset paging with a known total; once a
+    client follows ``next_cursor``, or the total was too large to count,
+    they are left out. ``has_more`` and ``total_count_estimate`` are
+    included when the listing provides them.
+    """
+    pagination = {
+        'limit': limit,
+        'total_count': total_count,
+        'next_cursor': next_cursor
+    }
+    if has_more is not None:
+        pagination['has_more'] = has_more
+        pagination['total_count_estimate'] = total_count_estimate
+    if not cursor and total_count is not None:
+        pagination['page'] = page
+        pagination['total_pages'] = (total_count + limit - 1) // limit
+    return pagination
+
 
 @action('api/audit/events', method=['GET'])
-@action.uses(security_fixture, cors())
+@action.uses(security_fixture, cors(), compressed_json_response)
 @require_admin_role
 def get_audit_events():
     """Get audit events with filtering and pagination."""
     try:
         # Parse query parameters
-        page = int(request.query.get('page', 1))
-        limit = min(int(request.query.get('limit', 100)), 1000)  # Max 1000 events
-        offset = (page - 1) * limit
-        
-        # Date filters
-        start_date_str = request.query.get('start_date')
-        end_date_str = request.query.get('end_date')
-        
-        start_date = None
-        end_date = None
+        try:
+            params = _EVENTS_QUERY.convert(request.query)
+        except ValueError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
         
-        if start_date_str:
-            start_date = datetime.fromisoformat(start_date_str.replace('Z', '+00:00'))
-        if end_date_str:
-            end_date = datetime.fromisoformat(end_date_str.replace('Z', '+00:00'))
+        page = params['page']
+        limit = min(params['limit'], 1000)  # Max 1000 events
+        offset = (page - 1) * limit
+        cursor = params['cursor']  # next_cursor of the previous page
         
-        # Other filters
-        user_id = request.query.get('user_id')
-        event_types_str = request.query.get('event_types')
-        severity_filter_str = request.query.get('severity')
-        compliance_framework_str = request.query.get('compliance_framework')
+        start_date = params['start_date']
+        end_date = params['end_date']
+        user_id = params['user_id']
+        event_types_str = params['event_types']
+        severity_filter_str = params['severity']
+        compliance_framework_str = params['compliance_framework']
         
         # Parse event types
         event_types = None
         if event_types_str:
-            try:
-                event_type_names = event_types_str.split(',')
-                event_types = [AuditEventType(name.strip()) for name in event_type_names]
-            except ValueError as e:
+            event_type_names = [name.strip() for name in event_types_str.split(',')]
+            unknown = [name for name in event_type_names if name not in _EVENT_TYPES]
+            if unknown:
                 return {
                     'success': False,
-                    'error': f'Invalid event type: {e}'
+                    'error': f'Invalid event type: {", ".join(unknown)}'
                 }
+            event_types = [_EVENT_TYPES[name] for name in event_type_names]
         
         # Parse severity filter
         severity_filter = None
@@ -65,55 +142,41 @@ def get_audit_events():
         # Parse compliance framework
         compliance_framework = None
         if compliance_framework_str:
-            try:
-                compliance_framework = ComplianceFramework(compliance_framework_str)
-            except ValueError:
+            compliance_framework = _COMPLIANCE_FRAMEWORKS.get(compliance_framework_str)
+            if compliance_framework is None:
                 return {
                     'success': False,
                     'error': f'Invalid compliance framework: {compliance_framework_str}'
                 }
         
-        # Get events
-        events = audit_logger.get_audit_events(
-            start_date=start_date,
-            end_date=end_date,
-            user_id=user_id,
-            event_types=event_types,
-            compliance_framework=compliance_framework,
-            severity_filter=severity_filter,
-            limit=limit,
-            offset=offset
-        )
-        
-        # Get total count for pagination
-        db = get_db()
-        query = db.audit_events.archived == False
-        
-        if start_date:
-            query &= (db.audit_events.timestamp >= start_date)
-        if end_date:
-            query &= (db.audit_events.timestamp <= end_date)
-        if user_id:
-            query &= (db.audit_events.user_id == user_id)
-        if event_types:
-            type_values = [et.value for et in event_types]
-            query &= db.audit_events.event_type.belongs(type_values)
-        if severity_filter:
-            query &= db.audit_events.severity.belongs(severity_filter)
-        
-        total_count = db(query).count()
-        total_pages = (total_count + limit - 1) // limit
+        # Get events, with a capped count of all matches for pagination
+        try:
+            events_page = audit_logger.get_audit_events_page(
+                start_date=start_date,
+                end_date=end_date,
+                user_id=user_id,
+                event_types=event_types,
+                compliance_framework=compliance_framework,
+                severity_filter=severity_filter,
+                limit=limit,
+                offset=offset,
+                cursor=cursor
+            )
+        except ValueError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
         
         return {
             'success': True,
             'data': {
-                'events': events,
-                'pagination': {
-                    'page': page,
-                    'limit': limit,
-                    'total_count': total_count,
-                    'total_pages': total_pages
-                }
+                'events': events_page['events'],
+                'pagination': _pagination(
+                    page, limit, events_page['total_count'], events_page['next_cursor'], cursor,
+                    has_more=events_page['has_more'],
+                    total_count_estimate=events_page['total_count_estimate']
+                )
             }
         }
     
@@ -126,11 +189,11 @@ def get_audit_events():
 
 
 @action('api/audit/events', method=['POST'])
-@action.uses(security_fixture, cors())
+@action.uses(security_fixture, cors(), json_response)
 def log_audit_event():
     """Log a new audit event."""
     try:
-        data = request.json or {}
+        data = _request_data()
         
         # Validate required fields
         if 'event_type' not in data:
@@ -146,27 +209,20 @@ def log_audit_event():
             }
         
         # Parse event type
-        try:
-            event_type = AuditEventType(data['event_type'])
-        except ValueError:
+        event_type = _EVENT_TYPES.get(data['event_type']) if isinstance(data['event_type'], str) else None
+        if event_type is None:
             return {
                 'success': False,
                 'error': f'Invalid event type: {data["event_type"]}'
             }
         
-        # Extract client IP
-        ip_address = request.environ.get('HTTP_X_FORWARDED_FOR', 
-                                       request.environ.get('HTTP_X_REAL_IP',
-                                       request.environ.get('REMOTE_ADDR', 'unknown')))
-        if ',' in ip_address:
-            ip_address = ip_address.split(',')[0].strip()
-        
-        # Log the event
+        # Log the event; ?sync=1 waits until it is stored instead of queueing it
+        sync = request.query.get('sync') in ('1', 'true')
         event_id = audit_logger.log_event(
             event_type=event_type,
             user_id=data.get('user_id'),
             user_email=data.get('user_email'),
-            ip_address=ip_address,
+            ip_address=client_ip(request.environ),
             user_agent=request.environ.get('HTTP_USER_AGENT', ''),
             resource_type=data.get('resource_type'),
             resource_id=data.get('resource_id'),
@@ -176,9 +232,15 @@ def log_audit_event():
             session_id=data.get('session_id'),
             request_id=data.get('request_id'),
             outcome=data.get('outcome', 'success'),
-            custom_risk_score=data.get('risk_score')
+            custom_risk_score=data.get('risk_score'),
+            sync=sync
         )
         
+        # A stored event shows up in statistics right away; queued ones once
+        # the cached statistics expire
+        if sync:
+            audit_logger.invalidate_statistics_cache()
+        
         return {
             'success': True,
             'data': {
@@ -195,33 +257,30 @@ def log_audit_event():
 
 
 @action('api/audit/statistics', method=['GET'])
-@action.uses(security_fixture, cors())
+@action.uses(security_fixture, cors(), json_response)
 @require_admin_role
 def get_audit_statistics():
     """Get audit statistics for a time period."""
     try:
         # Parse query parameters
-        start_date_str = request.query.get('start_date')
-        end_date_str = request.query.get('end_date')
-        compliance_framework_str = request.query.get('compliance_framework')
+        try:
+            params = _STATISTICS_QUERY.convert(request.query)
+        except ValueError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+        compliance_framework_str = params['compliance_framework']
         
         # Default to last 30 days if no dates provided
-        if not start_date_str:
-            start_date = datetime.utcnow() - timedelta(days=30)
-        else:
-            start_date = datetime.fromisoformat(start_date_str.replace('Z', '+00:00'))
-        
-        if not end_date_str:
-            end_date = datetime.utcnow()
-        else:
-            end_date = datetime.fromisoformat(end_date_str.replace('Z', '+00:00'))
+        start_date = params['start_date'] or datetime.utcnow() - timedelta(days=30)
+        end_date = params['end_date'] or datetime.utcnow()
         
         # Parse compliance framework
         compliance_framework = None
         if compliance_framework_str:
-            try:
-                compliance_framework = ComplianceFramework(compliance_framework_str)
-            except ValueError:
+            compliance_framework = _COMPLIANCE_FRAMEWORKS.get(compliance_framework_str)
+            if compliance_framework is None:
                 return {
                     'success': False,
                     'error': f'Invalid compliance framework: {compliance_framework_str}'
@@ -244,25 +303,21 @@ def get_audit_statistics():
 
 
 @action('api/audit/integrity/verify', method=['POST'])
-@action.uses(security_fixture, cors())
+@action.uses(security_fixture, cors(), json_response)
 @require_admin_role
 def verify_audit_integrity():
     """Verify audit trail integrity for a date range."""
     try:
-        data = request.json or {}
-        
-        # Parse dates
-        start_date_str = data.get('start_date')
-        end_date_str = data.get('end_date')
-        
-        if not start_date_str or not end_date_str:
+        try:
+            data = _INTEGRITY_REQUEST.decode(request.body.read())
+        except ValueError as e:
             return {
                 'success': False,
-                'error': 'start_date and end_date are required'
+                'error': str(e)
             }
         
-        start_date = datetime.fromisoformat(start_date_str.replace('Z', '+00:00')).date()
-        end_date = datetime.fromisoformat(end_date_str.replace('Z', '+00:00')).date()
+        start_date = data['start_date'].date()
+        end_date = data['end_date'].date()
         
         # Verify integrity
         integrity_result = audit_logger.verify_audit_integrity(start_date, end_date)
@@ -281,7 +336,7 @@ def verify_audit_integrity():
 
 
 @action('api/audit/compliance/reports', method=['GET'])
-@action.uses(security_fixture, cors())
+@action.uses(security_fixture, cors(), compressed_json_response)
 @require_admin_role
 def get_compliance_reports():
     """Get list of compliance reports."""
@@ -289,56 +344,75 @@ def get_compliance_reports():
         db = get_db()
         
         # Parse query parameters
-        framework = request.query.get('framework')
-        status = request.query.get('status')
-        page = int(request.query.get('page', 1))
-        limit = min(int(request.query.get('limit', 50)), 100)
+        try:
+            params = _REPORTS_QUERY.convert(request.query)
+        except ValueError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+        
+        framework = params['framework']
+        status = params['status']
+        page = params['page']
+        limit = min(params['limit'], 100)
         offset = (page - 1) * limit
+        cursor = params['cursor']  # next_cursor of the previous page
         
-        # Build query
-        query = db.compliance_reports.id > 0
+        # Build query, folding the filters together once
+        predicates = [db.compliance_reports.id > 0]
         
         if framework:
-            query &= (db.compliance_reports.framework == framework)
+            predicates.append(db.compliance_reports.framework == framework)
         if status:
-            query &= (db.compliance_reports.status == status)
+            predicates.append(db.compliance_reports.status == status)
         
-        # Get reports
-        reports = db(query).select(
-            orderby=~db.compliance_reports.created_at,
+        # Seek past the previous page instead of skipping rows
+        if cursor:
+            try:
+                predicates.append(keyset_after(db.compliance_reports, db.compliance_reports.created_at, cursor))
+            except ValueError as e:
+                return {
+                    'success': False,
+                    'error': str(e)
+                }
+            offset = 0
+        query = reduce(operator.and_, predicates)
+        
+        # Get reports, selecting only the listed columns, with the number of
+        # matching reports counted by the same query
+        total = Expression(db, 'COUNT(*) OVER ()', type='integer')
+        rows = db(query).select(
+            db.compliance_reports.id,
+            *[db.compliance_reports[column] for column in _REPORT_LIST_COLUMNS],
+            total,
+            orderby=~db.compliance_reports.created_at | ~db.compliance_reports.id,
             limitby=(offset, offset + limit)
         )
         
-        # Get total count
-        total_count = db(query).count()
-        total_pages = (total_count + limit - 1) // limit
-        
-        # Format reports
-        formatted_reports = []
-        for report in reports:
-            formatted_reports.append({
-                'report_id': report.report_id,
-                'framework': report.framework,
-                'report_type': report.report_type,
-                'start_date': report.start_date.isoformat() if report.start_date else None,
-                'end_date': report.end_date.isoformat() if report.end_date else None,
-                'generated_by': report.generated_by,
-                'status': report.status,
-                'created_at': report.created_at.isoformat() if report.created_at else None,
-                'completed_at': report.completed_at.isoformat() if report.completed_at else None,
-                'file_path': report.file_path
-            })
+        # Past the last page there are no rows to carry the count
+        if rows:
+            total_count = rows[0][total]
+        else:
+            total_count = db(query).count() if offset else 0
+        
+        next_cursor = None
+        if len(rows) == limit:
+            last = rows.last().compliance_reports
+            next_cursor = encode_page_cursor(last.created_at, last.id)
+        
+        # The id only positions the cursor
+        reports = []
+        for row in rows:
+            report = row.compliance_reports.as_dict()
+            del report['id']
+            reports.append(report)
         
         return {
             'success': True,
             'data': {
-                'reports': formatted_reports,
-                'pagination': {
-                    'page': page,
-                    'limit': limit,
-                    'total_count': total_count,
-                    'total_pages': total_pages
-                }
+                'reports': reports,
+                'pagination': _pagination(page, limit, total_count, next_cursor, cursor)
             }
         }
     
@@ -351,54 +425,46 @@ def get_compliance_reports():
 
 
 @action('api/audit/compliance/reports', method=['POST'])
-@action.uses(security_fixture, cors())
+@action.uses(security_fixture, cors(), json_response)
 @require_admin_role
 def generate_compliance_report():
-    """Generate a new compliance report."""
+    """Queue a new compliance report.
+    
+    Responds 202 with the report id straight away; the report is generated
+    in the background and its status is polled with the GET endpoint.
+    """
     try:
-        data = request.json or {}
-        
-        # Validate required fields
-        required_fields = ['framework', 'start_date', 'end_date']
-        for field in required_fields:
-            if field not in data:
-                return {
-                    'success': False,
-                    'error': f'{field} is required'
-                }
+        try:
+            data = _REPORT_REQUEST.decode(request.body.read())
+        except ValueError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
         
         # Parse framework
         framework = data['framework'].upper()
-        if framework not in ['SOC2', 'GDPR', 'HIPAA', 'PCI_DSS']:
+        if framework not in REPORT_TYPES:
             return {
                 'success': False,
                 'error': f'Unsupported framework: {framework}'
             }
         
-        # Parse dates
-        start_date = datetime.fromisoformat(data['start_date'].replace('Z', '+00:00'))
-        end_date = datetime.fromisoformat(data['end_date'].replace('Z', '+00:00'))
+        start_date = data['start_date']
+        end_date = data['end_date']
         
         # Get user info
         user = request.environ.get('user', {})
         generated_by = user.get('username', 'unknown')
         
-        # Generate report based on framework
-        if framework == 'SOC2':
-            report_id = compliance_reporter.generate_soc2_report(start_date, end_date, generated_by)
-        elif framework == 'GDPR':
-            report_id = compliance_reporter.generate_gdpr_report(start_date, end_date, generated_by)
-        elif framework == 'HIPAA':
-            report_id = compliance_reporter.generate_hipaa_report(start_date, end_date, generated_by)
-        elif framework == 'PCI_DSS':
-            report_id = compliance_reporter.generate_pci_dss_report(start_date, end_date, generated_by)
+        report_id = compliance_reporter.queue_report(framework, start_date, end_date, generated_by)
         
         # Log the report generation
         audit_logger.log_event(
             event_type=AuditEventType.ADMIN_ACTION,
             user_id=user.get('id'),
             user_email=user.get('email'),
-            ip_address=request.environ.get('REMOTE_ADDR', 'unknown'),
+            ip_address=client_ip(request.environ),
             user_agent=request.environ.get('HTTP_USER_AGENT', ''),
             resource_type='compliance_report',
             resource_id=report_id,
@@ -412,11 +478,13 @@ def generate_compliance_report():
             outcome='success'
         )
         
+        response.status = 202
         return {
             'success': True,
             'data': {
                 'report_id': report_id,
-                'message': f'{framework} compliance report generated successfully'
+                'status': 'queued',
+                'message': f'{framework} compliance report queued'
             }
         }
     
@@ -429,10 +497,14 @@ def generate_compliance_report():
 
 
 @action('api/audit/compliance/reports/<report_id>', method=['GET'])
-@action.uses(security_fixture, cors())
+@action.uses(security_fixture, cors(), compressed_json_response)
 @require_admin_role
 def get_compliance_report(report_id):
-    """Get a specific compliance report."""
+    """Get a specific compliance report.
+    
+    With ``?raw=1`` the stored report file is returned as-is, without the
+    metadata wrapper, so it is never parsed or re-encoded.
+    """
     try:
         db = get_db()
         
@@ -446,26 +518,42 @@ def get_compliance_report(report_id):
             }
         
         # Read report data from file if available
-        report_data = None
+        raw_report = None
         if report.file_path and os.path.exists(report.file_path):
             try:
-                with open(report.file_path, 'r') as f:
-                    report_data = json.load(f)
+                with open(report.file_path, 'rb') as f:
+                    raw_report = f.read()
             except Exception as e:
                 logger.warning(f"Could not read report file: {e}")
         
+        if request.query.get('raw') in ('1', 'true'):
+            if raw_report is None:
+                return {
+                    'success': False,
+                    'error': 'Report file not available'
+                }
+            response.headers['Content-Type'] = 'application/json'
+            return compress_body(raw_report)
+        
+        report_data = None
+        if raw_report is not None:
+            try:
+                report_data = loads(raw_report)
+            except ValueError as e:
+                logger.warning(f"Could not parse report file: {e}")
+        
         # Format response
         response_data = {
             'report_id': report.report_id,
             'framework': report.framework,
             'report_type': report.report_type,
-            'start_date': report.start_date.isoformat() if report.start_date else None,
-            'end_date': report.end_date.isoformat() if report.end_date else None,
+            'start_date': report.start_date,
+            'end_date': report.end_date,
             'generated_by': report.generated_by,
             'status': report.status,
-            'created_at': report.created_at.isoformat() if report.created_at else None,
-            'completed_at': report.completed_at.isoformat() if report.completed_at else None,
-            'summary': json.loads(report.report_data) if report.report_data else {},
+            'created_at': report.created_at,
+            'completed_at': report.completed_at,
+            'summary': loads(report.report_data) if report.report_data else {},
             'full_report': report_data
         }
         
@@ -482,67 +570,69 @@ def get_compliance_report(report_id):
         }
 
 
+# Static metadata responses, serialized once at import
+COMPLIANCE_FRAMEWORKS_RESPONSE = PrebuiltJSON({
+    'success': True,
+    'data': {
+        'frameworks': [
+            {
+                'code': 'SOC2',
+                'name': 'SOC 2',
+                'description': 'Service Organization Control 2 - Security, Availability, Confidentiality'
+            },
+            {
+                'code': 'GDPR',
+                'name': 'GDPR',
+                'description': 'General Data Protection Regulation - EU Privacy Law'
+            },
+            {
+                'code': 'HIPAA',
+                'name': 'HIPAA',
+                'description': 'Health Insurance Portability and Accountability Act'
+            },
+            {
+                'code': 'PCI_DSS',
+                'name': 'PCI DSS',
+                'description': 'Payment Card Industry Data Security Standard'
+            },
+            {
+                'code': 'ISO27001',
+                'name': 'ISO 27001',
+                'description': 'Information Security Management Systems'
+            },
+            {
+                'code': 'NIST',
+                'name': 'NIST Cybersecurity Framework',
+                'description': 'National Institute of Standards and Technology Framework'
+            }
+        ]
+    }
+})
+
+AUDIT_EVENT_TYPES_RESPONSE = PrebuiltJSON({
+    'success': True,
+    'data': {
+        'event_types': [
+            {
+                'code': event_type.value,
+                'name': event_type.name,
+                'description': event_type.value.replace('_', ' ').title()
+            }
+            for event_type in AuditEventType
+        ]
+    }
+})
+
+
 @action('api/audit/compliance/frameworks', method=['GET'])
 @action.uses(security_fixture, cors())
 def get_compliance_frameworks():
     """Get list of supported compliance frameworks."""
-    frameworks = [
-        {
-            'code': 'SOC2',
-            'name': 'SOC 2',
-            'description': 'Service Organization Control 2 - Security, Availability, Confidentiality'
-        },
-        {
-            'code': 'GDPR',
-            'name': 'GDPR',
-            'description': 'General Data Protection Regulation - EU Privacy Law'
-        },
-        {
-            'code': 'HIPAA',
-            'name': 'HIPAA',
-            'description': 'Health Insurance Portability and Accountability Act'
-        },
-        {
-            'code': 'PCI_DSS',
-            'name': 'PCI DSS',
-            'description': 'Payment Card Industry Data Security Standard'
-        },
-        {
-            'code': 'ISO27001',
-            'name': 'ISO 27001',
-            'description': 'Information Security Management Systems'
-        },
-        {
-            'code': 'NIST',
-            'name': 'NIST Cybersecurity Framework',
-            'description': 'National Institute of Standards and Technology Framework'
-        }
-    ]
-    
-    return {
-        'success': True,
-        'data': {
-            'frameworks': frameworks
-        }
-    }
+    return COMPLIANCE_FRAMEWORKS_RESPONSE.serve()
 
 
 @action('api/audit/event-types', method=['GET'])
 @action.uses(security_fixture, cors())
 def get_audit_event_types():
     """Get list of audit event types."""
-    event_types = []
-    
-    for event_type in AuditEventType:
-        event_types.append({
-            'code': event_type.value,
-            'name': event_type.name,
-            'description': event_type.value.replace('_', ' ').title()
-        })
-    
-    return {
-        'success': True,
-        'data': {
-            'event_types': event_types
-        }
-    }
\ No newline at end of file
+    return AUDIT_EVENT_TYPES_RESPONSE.serve()
@@ -1,28 +1,38 @@
 """Backup and restore API routes for SASEWaddle Manager."""
 
 import os
+import asyncio
 from datetime import datetime
+from functools import partial
 from py4web import action, request, response, abort, redirect, URL
 from py4web.core import Fixture
 import json
+import structlog
 
-from backup import BackupManager
-from web.auth import get_current_user, user_manager
+from backup import BackupManager, BACKUP_MAGICS
+from web.auth import admin_required, auth_required, user_manager
+from api.serialization import dumps, json_response, not_modified, state_etag
+
+logger = structlog.get_logger()
+
+# Read size for streamed backup downloads and uploads
+BACKUP_CHUNK_SIZE = 1 << 20
 
 # Initialize backup manager
 backup_manager = BackupManager(
     backup_dir=os.getenv('BACKUP_DIR', '/data/backups')
 )
 
+async def _run_blocking(func, *args, **kwargs):
+    """Run a blocking backup or S3 call off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, partial(func, *args, **kwargs))
+
 @action('api/backup/create', method=['POST'])
-@action.uses('json')
+@action.uses('json', admin_required)
 async def create_backup():
     """Create a database backup."""
-    # Check authentication and permissions
-    user = get_current_user()
-    if not user or not user_manager.has_permission(user, 'admin'):
-        response.status = 403
-        return {"error": "Admin permission required"}
+    user = request.user
     
     try:
         # Get backup options from request
@@ -30,24 +40,27 @@ async def create_backup():
         
         backup_name = data.get('name')
         compress = data.get('compress', True)
+        compression = data.get('compression', 'zstd')
         encrypt = data.get('encrypt', False)
         encryption_key = data.get('encryption_key')
         upload_to_s3 = data.get('upload_to_s3')
+        local_copy = data.get('local_copy', True)
         
         # Create backup
-        result = backup_manager.create_backup(
+        result = await _run_blocking(
+            backup_manager.create_backup,
             backup_name=backup_name,
             compress=compress,
             encrypt=encrypt,
             encryption_key=encryption_key,
-            upload_to_s3=upload_to_s3
+            upload_to_s3=upload_to_s3,
+            compression=compression,
+            local_copy=local_copy
         )
         
         # Log the backup operation
-        import structlog
-        logger = structlog.get_logger()
         logger.info("Backup created",
-                   user_id=user['id'],
+                   user_id=user.id,
                    backup_name=result['backup_name'],
                    size_bytes=result['size_bytes'])
         
@@ -61,14 +74,10 @@ async def create_backup():
         return {"error": str(e)}
 
 @action('api/backup/restore', method=['POST'])
-@action.uses('json')
+@action.uses('json', admin_required)
 async def restore_backup():
     """Restore database from backup."""
-    # Check authentication and permissions
-    user = get_current_user()
-    if not user or not user_manager.has_permission(user, 'admin'):
-        response.status = 403
-        return {"error": "Admin permission required"}
+    user = request.user
     
     try:
         # Get restore options from request
@@ -85,7 +94,8 @@ async def restore_backup():
         from_s3 = data.get('from_s3', False)
         
         # Perform restore
-        result = backup_manager.restore_backup(
+        result = await _run_blocking(
+            backup_manager.restore_backup,
             backup_path=backup_path,
             decrypt=decrypt,
             decryption_key=decryption_key,
@@ -94,10 +104,8 @@ async def restore_backup():
         )
         
         # Log the restore operation
-        import structlog
-        logger = structlog.get_logger()
         logger.warning("Database restored from backup",
-                      user_id=user['id'],
+                      user_id=user.id,
                       backup_path=backup_path,
                       rows_restored=result['total_rows_restored'])
         
@@ -111,61 +119,60 @@ async def restore_backup():
         return {"error": str(e)}
 
 @action('api/backup/list', method=['GET'])
-@action.uses('json')
+@action.uses('json', auth_required, json_response)
 async def list_backups():
     """List available backups."""
-    # Check authentication
-    user = get_current_user()
-    if not user:
-        response.status = 401
-        return {"error": "Authentication required"}
+    user = request.user
     
     try:
-        backups = backup_manager.list_backups()
+        is_admin = user_manager.has_permission(user, 'admin')
         
-        # Filter based on user permissions
-        if not user_manager.has_permission(user, 'admin'):
-            # Non-admins can only see backup metadata, not paths
-            backups = [
-                {
-                    'backup_name': b['backup_name'],
-                    'created_at': b['created_at'],
-                    'size_bytes': b.get('size_bytes', 0),
-                    'compressed': b.get('compressed', False),
-                    'encrypted': b.get('encrypted', False)
-                }
-                for b in backups
-            ]
+        # Local-only listings only change with the backup directory, so a
+        # polling client can be answered before the list is built; S3
+        # contents can change at any time and are always listed
+        if not backup_manager.s3_config.enabled:
+            etag = state_etag('backups', backup_manager.local_backups_version(), is_admin)
+            if not_modified(etag):
+                return b''
         
-        return {
-            "success": True,
-            "backups": backups,
-            "count": len(backups)
-        }
+        backups = await _run_blocking(backup_manager.list_backups)
+        
+        response.headers['Content-Type'] = 'application/json'
+        return _stream_backup_list(backups, is_admin)
         
     except Exception as e:
         response.status = 500
         return {"error": str(e)}
 
+def _stream_backup_list(backups, is_admin):
+    """Serialize the backup list one entry at a time in the usual response envelope."""
+    yield b'{"success": true, "backups": ['
+    for index, backup in enumerate(backups):
+        if not is_admin:
+            # Non-admins can only see backup metadata, not paths
+            backup = {
+                'backup_name': backup['backup_name'],
+                'created_at': backup['created_at'],
+                'size_bytes': backup.get('size_bytes', 0),
+                'compressed': backup.get('compressed', False),
+                'encrypted': backup.get('encrypted', False)
+            }
+        yield (b',' if index else b'') + dumps(backup)
+    yield b'], "count": %d}' % len(backups)
+
 @action('api/backup/delete/<backup_name>', method=['DELETE'])
-@action.uses('json')
+@action.uses('json', admin_required)
 async def delete_backup(backup_name):
     """Delete a backup."""
-    # Check authentication and permissions
-    user = get_current_user()
-    if not user or not user_manager.has_permission(user, 'admin'):
-        response.status = 403
-        return {"error": "Admin permission required"}
+    user = request.user
     
     try:
         deleted = backup_manager.delete_backup(backup_name)
         
         if deleted:
             # Log the deletion
-            import structlog
-            logger = structlog.get_logger()
             logger.warning("Backup deleted",
-                          user_id=user['id'],
+                          user_id=user.id,
                           backup_name=backup_name)
             
             return {
@@ -181,14 +188,10 @@ async def delete_backup(backup_name):
         return {"error": str(e)}
 
 @action('api/backup/schedule', method=['POST'])
-@action.uses('json')
+@action.uses('json', admin_required)
 async def schedule_backup():
     """Schedule automatic backups."""
-    # Check authentication and permissions
-    user = get_current_user()
-    if not user or not user_manager.has_permission(user, 'admin'):
-        response.status = 403
-        return {"error": "Admin permission required"}
+    user = request.user
     
     try:
         data = await request.json()
@@ -198,24 +201,16 @@ async def schedule_backup():
             response.status = 400
             return {"error": "cron_expression is required"}
         
-        # Get backup options
-        backup_options = {
-            'compress': data.get('compress', True),
-            'encrypt': data.get('encrypt', False),
-            'encryption_key': data.get('encryption_key')
-        }
-        
         # Schedule the backup
-        schedule_id = backup_manager.schedule_backup(
-            cron_expression=cron_expression,
-            **backup_options
-        )
+        try:
+            schedule_id = backup_manager.schedule_backup(**_schedule_options(data))
+        except ValueError as e:
+            response.status = 400
+            return {"error": str(e)}
         
         # Log the scheduling
-        import structlog
-        logger = structlog.get_logger()
         logger.info("Backup scheduled",
-                   user_id=user['id'],
+                   user_id=user.id,
                    schedule_id=schedule_id,
                    cron_expression=cron_expression)
         
@@ -229,50 +224,152 @@ async def schedule_backup():
         response.status = 500
         return {"error": str(e)}
 
+@action('api/backup/schedule/bulk', method=['POST'])
+@action.uses('json', admin_required)
+async def schedule_backups_bulk():
+    """Schedule several automatic backups in one request; all or none are added."""
+    user = request.user
+    
+    try:
+        data = await request.json()
+        
+        schedules = data.get('schedules')
+        if not isinstance(schedules, list) or not schedules:
+            response.status = 400
+            return {"error": "schedules must be a non-empty list"}
+        if not all(isinstance(schedule, dict) and schedule.get('cron_expression') for schedule in schedules):
+            response.status = 400
+            return {"error": "cron_expression is required in every schedule"}
+        
+        try:
+            schedule_ids = backup_manager.schedule_backups([_schedule_options(schedule) for schedule in schedules])
+        except ValueError as e:
+            response.status = 400
+            return {"error": str(e)}
+        
+        # Log the scheduling
+        logger.info("Backups scheduled",
+                   user_id=user.id,
+                   schedule_ids=schedule_ids)
+        
+        return {
+            "success": True,
+            "schedules": [
+                {"schedule_id": schedule_id, "cron_expression": schedule['cron_expression']}
+                for schedule_id, schedule in zip(schedule_ids, schedules)
+            ]
+        }
+        
+    except Exception as e:
+        response.status = 500
+        return {"error": str(e)}
+
+def _schedule_options(data):
+    """Schedule and backup options from one schedule request object."""
+    return {
+        'cron_expression': data['cron_expression'],
+        'max_instances': int(data.get('max_instances', 1)),
+        'compress': data.get('compress', True),
+        'compression': data.get('compression', 'zstd'),
+        'encrypt': data.get('encrypt', False),
+        'encryption_key': data.get('encryption_key')
+    }
+
 @action('api/backup/download/<backup_name>', method=['GET'])
+@action.uses(admin_required)
 async def download_backup(backup_name):
     """Download a backup file."""
-    # Check authentication and permissions
-    user = get_current_user()
-    if not user or not user_manager.has_permission(user, 'admin'):
-        response.status = 403
-        return {"error": "Admin permission required"}
-    
     try:
         # Find the backup file
-        backups = backup_manager.list_backups()
-        backup = next((b for b in backups if b['backup_name'] == backup_name), None)
+        backup = backup_manager.get_backup(backup_name)
         
         if not backup:
             response.status = 404
             return {"error": f"Backup {backup_name} not found"}
         
+        # Open once and size the open file, rather than stat-ing the path
+        # separately for the existence check and Content-Length
         file_path = backup['file_path']
-        
-        if not os.path.exists(file_path):
+        try:
+            f = open(file_path, 'rb')
+        except FileNotFoundError:
             response.status = 404
             return {"error": "Backup file not found on disk"}
         
-        # Set headers for file download
+        # Set headers for file download; a known length lets the server send
+        # the body as-is instead of chunked
         response.headers['Content-Type'] = 'application/octet-stream'
         response.headers['Content-Disposition'] = f'attachment; filename="{os.path.basename(file_path)}"'
+        response.headers['Content-Length'] = str(os.fstat(f.fileno()).st_size)
         
-        # Stream the file
-        with open(file_path, 'rb') as f:
-            return f.read()
+        # Stream the file; servers offering wsgi.file_wrapper can sendfile() it
+        file_wrapper = request.environ.get('wsgi.file_wrapper')
+        if file_wrapper:
+            return file_wrapper(f, BACKUP_CHUNK_SIZE)
+        return _iter_file(f)
             
     except Exception as e:
         response.status = 500
         return {"error": str(e)}
 
+def _iter_file(f, chunk_size=None):
+    """Yield an open file in fixed-size chunks so downloads never buffer it whole."""
+    chunk_size = chunk_size or BACKUP_CHUNK_SIZE
+    with f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+def _preallocate(fd, content_length):
+    """Reserve disk space for an upload in one go, where the OS supports it."""
+    if not content_length or not hasattr(os, 'posix_fallocate'):
+        return
+    try:
+        os.posix_fallocate(fd, 0, int(content_length))
+    except (OSError, ValueError):
+        # Filesystems without fallocate support simply grow the file
+        pass
+
+def _store_upload(source, final_path, content_length):
+    """Copy an uploaded backup into place; returns its size, or None if invalid.
+    
+    The data goes to a .part file next to the final name, the first chunk
+    is checked for a known backup format (basic validation), and the file
+    is only renamed into place once complete, so a partial upload is never
+    listed as a backup. Every step blocks, so callers run it off the loop.
+    """
+    tmp_path = final_path + '.part'
+    try:
+        with open(tmp_path, 'wb') as out:
+            chunk = source.read(BACKUP_CHUNK_SIZE)
+            if not chunk.startswith(BACKUP_MAGICS):
+                out.close()
+                os.remove(tmp_path)
+                return None
+            # May write every block where fallocate is emulated
+            _preallocate(out.fileno(), content_length)
+            while chunk:
+                out.write(chunk)
+                chunk = source.read(BACKUP_CHUNK_SIZE)
+            # The request length includes the multipart framing
+            out.truncate()
+            out.flush()
+            os.fsync(out.fileno())
+            size = out.tell()
+        os.replace(tmp_path, final_path)
+        return size
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 @action('api/backup/upload', method=['POST'])
+@action.uses(admin_required)
 async def upload_backup():
     """Upload a backup file for restoration."""
-    # Check authentication and permissions
-    user = get_current_user()
-    if not user or not user_manager.has_permission(user, 'admin'):
-        response.status = 403
-        return {"error": "Admin permission required"}
+    user = request.user
     
     try:
         # Get uploaded file
@@ -283,45 +380,36 @@ async def upload_backup():
         
         backup_file = files['backup']
         
-        # Save to backup directory
-        import tempfile
-        temp_dir = tempfile.mkdtemp(prefix='sasewaddle_upload_')
-        file_path = os.path.join(temp_dir, backup_file.filename)
-        
-        with open(file_path, 'wb') as f:
-            f.write(backup_file.file.read())
+        # Never let the client-supplied name reach outside the backup directory
+        filename = os.path.basename(backup_file.filename or '')
+        backup_dir = os.getenv('BACKUP_DIR', '/data/backups')
+        final_path = os.path.join(backup_dir, filename)
+        if (not filename or filename.startswith('.')
+                or os.path.dirname(os.path.realpath(final_path)) != os.path.realpath(backup_dir)):
+            response.status = 400
+            return {"error": "Invalid backup file name"}
         
-        # Validate backup file
-        with open(file_path, 'rb') as f:
-            # Check if it's a valid backup (basic validation)
-            content = f.read(100)
-            is_gzip = content.startswith(b'\x1f\x8b')  # gzip magic number
-            is_json = content.startswith(b'{')
-            
-            if not (is_gzip or is_json):
-                os.remove(file_path)
-                response.status = 400
-                return {"error": "Invalid backup file format"}
+        await _run_blocking(os.makedirs, backup_dir, exist_ok=True)
         
-        # Move to backup directory
-        import shutil
-        backup_dir = os.getenv('BACKUP_DIR', '/data/backups')
-        final_path = os.path.join(backup_dir, backup_file.filename)
-        shutil.move(file_path, final_path)
+        # Reading a multi-GB upload and writing it out would stall the event loop
+        size = await _run_blocking(
+            _store_upload, backup_file.file, final_path, request.headers.get('Content-Length')
+        )
+        if size is None:
+            response.status = 400
+            return {"error": "Invalid backup file format"}
         
         # Log the upload
-        import structlog
-        logger = structlog.get_logger()
         logger.info("Backup uploaded",
-                   user_id=user['id'],
-                   filename=backup_file.filename,
-                   size_bytes=os.path.getsize(final_path))
+                   user_id=user.id,
+                   filename=filename,
+                   size_bytes=size)
         
         return {
             "success": True,
             "message": "Backup uploaded successfully",
             "file_path": final_path,
-            "filename": backup_file.filename
+            "filename": filename
         }
         
     except Exception as e:
@@ -329,15 +417,9 @@ async def upload_backup():
         return {"error": str(e)}
 
 @action('api/backup/s3/status', method=['GET'])
-@action.uses('json')
+@action.uses('json', auth_required, json_response)
 async def s3_backup_status():
     """Get S3 backup configuration status."""
-    # Check authentication
-    user = get_current_user()
-    if not user:
-        response.status = 401
-        return {"error": "Authentication required"}
-    
     try:
         s3_config = backup_manager.s3_config
         
@@ -352,11 +434,10 @@ async def s3_backup_status():
         
         # Test connection if enabled
         if s3_config.enabled and backup_manager.s3_client:
-            try:
-                backup_manager.s3_client.head_bucket(Bucket=s3_config.bucket)
-                status["connection_test"] = "success"
-            except Exception as e:
-                status["connection_test"] = f"failed: {str(e)}"
+            status["connection_test"] = await _run_blocking(backup_manager.check_s3_connection)
+        
+        if not_modified(state_etag('s3_status', *status.values())):
+            return b''
         
         return {
             "success": True,
@@ -368,15 +449,9 @@ async def s3_backup_status():
         return {"error": str(e)}
 
 @action('api/backup/s3/list', method=['GET'])
-@action.uses('json')
+@action.uses('json', auth_required)
 async def list_s3_backups():
     """List backups stored in S3."""
-    # Check authentication
-    user = get_current_user()
-    if not user:
-        response.status = 401
-        return {"error": "Authentication required"}
-    
     try:
         if not backup_manager.s3_config.enabled:
             return {
@@ -385,7 +460,7 @@ async def list_s3_backups():
                 "message": "S3 backup storage is disabled"
             }
         
-        s3_backups = backup_manager.list_s3_backups()
+        s3_backups = await _run_blocking(backup_manager.list_s3_backups)
         
         return {
             "success": True,
@@ -398,28 +473,22 @@ async def list_s3_backups():
         return {"error": str(e)}
 
 @action('api/backup/s3/delete/<backup_name>', method=['DELETE'])
-@action.uses('json')
+@action.uses('json', admin_required)
 async def delete_s3_backup(backup_name):
     """Delete a backup from S3."""
-    # Check authentication and permissions
-    user = get_current_user()
-    if not user or not user_manager.has_permission(user, 'admin'):
-        response.status = 403
-        return {"error": "Admin permission required"}
+    user = request.user
     
     try:
         if not backup_manager.s3_config.enabled:
             response.status = 400
             return {"error": "S3 backup storage is disabled"}
         
-        deleted = backup_manager.delete_s3_backup(backup_name)
+        deleted = await _run_blocking(backup_manager.delete_s3_backup, backup_name)
         
         if deleted:
             # Log the deletion
-            import structlog
-            logger = structlog.get_logger()
             logger.warning("S3 backup deleted",
-                          user_id=user['id'],
+                          user_id=user.id,
                           backup_name=backup_name)
             
             return {
@@ -0,0 +1,204 @@
+"""Request payload decoding for SASEWaddle Manager ingest routes."""
+
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+try:
+    import msgspec
+    from msgspec import UNSET, UnsetType
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+try:
+    import ciso8601
+    CISO8601_AVAILABLE = True
+except ImportError:
+    CISO8601_AVAILABLE = False
+
+
+if MSGSPEC_AVAILABLE:
+    # Optional fields default to UNSET so a report that omits a column leaves
+    # the stored value alone, exactly like the dict payloads they replace
+
+    class ClientActivity(msgspec.Struct):
+        client_id: str
+        hostname: str | None | UnsetType = UNSET
+        os_name: str | None | UnsetType = UNSET
+        os_version: str | None | UnsetType = UNSET
+        architecture: str | None | UnsetType = UNSET
+        client_version: str | None | UnsetType = UNSET
+        ip_address: str | None | UnsetType = UNSET
+        connected_headend: str | None | UnsetType = UNSET
+        connection_duration: int | None | UnsetType = UNSET
+        bytes_sent: int | UnsetType = UNSET
+        bytes_received: int | UnsetType = UNSET
+        packets_sent: int | UnsetType = UNSET
+        packets_received: int | UnsetType = UNSET
+
+    class ClientActivityBatch(msgspec.Struct):
+        records: List[ClientActivity]
+
+    class HeadendStats(msgspec.Struct):
+        headend_id: str
+        hostname: str | None | UnsetType = UNSET
+        region: str | None | UnsetType = UNSET
+        cluster_id: str | None | UnsetType = UNSET
+        version: str | None | UnsetType = UNSET
+        active_connections: int | UnsetType = UNSET
+        total_connections: int | UnsetType = UNSET
+        bytes_proxied: int | UnsetType = UNSET
+        packets_proxied: int | UnsetType = UNSET
+        cpu_usage_percent: float | None | UnsetType = UNSET
+        memory_usage_mb: int | None | UnsetType = UNSET
+        disk_usage_percent: float | None | UnsetType = UNSET
+        network_errors: int | UnsetType = UNSET
+        auth_successes: int | UnsetType = UNSET
+        auth_failures: int | UnsetType = UNSET
+
+    _client_activity_decoder = msgspec.json.Decoder(ClientActivity)
+    _client_batch_decoder = msgspec.json.Decoder(ClientActivityBatch)
+    _headend_stats_decoder = msgspec.json.Decoder(HeadendStats)
+
+
+def _decode(decoder, body: bytes) -> Any:
+    """Parse and validate a body in one pass; invalid payloads raise ValueError."""
+    try:
+        return msgspec.to_builtins(decoder.decode(body))
+    except msgspec.DecodeError as e:
+        # ValidationError is a DecodeError, and its message names the bad field
+        raise ValueError(str(e)) from e
+
+
+def _load_object(body: bytes, key: str) -> Dict[str, Any]:
+    """Stdlib fallback: parse a JSON object and check its key is present."""
+    try:
+        data = json.loads(body)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON: {e}") from e
+    if not isinstance(data, dict) or key not in data:
+        raise ValueError(f"{key} is required")
+    return data
+
+
+def decode_client_activity(body: bytes) -> Dict[str, Any]:
+    """Decode one client activity report."""
+    if MSGSPEC_AVAILABLE:
+        return _decode(_client_activity_decoder, body)
+    return _load_object(body, 'client_id')
+
+
+def decode_client_activities(body: bytes) -> List[Dict[str, Any]]:
+    """Decode a ``{"records": [...]}`` batch of client activity reports."""
+    if MSGSPEC_AVAILABLE:
+        return _decode(_client_batch_decoder, body)['records']
+
+    records = _load_object(body, 'records')['records']
+    if not isinstance(records, list):
+        raise ValueError("records must be a list")
+    if not all(isinstance(record, dict) and 'client_id' in record for record in records):
+        raise ValueError("client_id is required in every record")
+    return records
+
+
+def decode_headend_stats(body: bytes) -> Dict[str, Any]:
+    """Decode one headend statistics report."""
+    if MSGSPEC_AVAILABLE:
+        return _decode(_headend_stats_decoder, body)
+    return _load_object(body, 'headend_id')
+
+
+def parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO 8601 request value, accepting a ``Z`` suffix.
+    
+    Empty values give None; malformed ones raise ValueError.
+    """
+    if not value:
+        return None
+    try:
+        if CISO8601_AVAILABLE:
+            return ciso8601.parse_datetime(value)
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError(f"Invalid date: {value}")
+
+
+# Default marking a RequestSchema field as mandatory
+REQUIRED = object()
+
+
+def _coerce(field: str, kind: type, value: Any) -> Any:
+    """Stdlib fallback: convert one query or body value to ``kind``."""
+    if kind is datetime and isinstance(value, str):
+        return parse_datetime(value)
+    try:
+        if kind is int and not isinstance(value, bool):
+            return int(value)
+        if kind is str and isinstance(value, str):
+            return value
+    except (ValueError, TypeError):
+        pass
+    raise ValueError(f"Expected `{kind.__name__}` - at `$.{field}`")
+
+
+class RequestSchema:
+    """Named, typed request fields validated and coerced in one pass.
+    
+    ``fields`` maps each name to ``(type, default)`` where the type is int,
+    str or datetime and a ``REQUIRED`` default makes the field mandatory.
+    Empty values count as missing and unknown names are ignored. With
+    msgspec the schema compiles to a Struct; otherwise values are coerced
+    one by one. Invalid input raises ValueError either way.
+    """
+    
+    def __init__(self, name: str, fields: Dict[str, Tuple[type, Any]]):
+        self.fields = fields
+        # msgspec only takes full RFC 3339 timestamps, so dates are read as
+        # strings and parsed with parse_datetime, which also accepts plain dates
+        self._dates = [field for field, (kind, _) in fields.items() if kind is datetime]
+        if MSGSPEC_AVAILABLE:
+            self._struct = msgspec.defstruct(name, [
+                (field, str if kind is datetime else kind) if default is REQUIRED
+                else (field, Optional[str if kind is datetime else kind], default)
+                for field, (kind, default) in fields.items()
+            ], kw_only=True)
+    
+    def convert(self, values: Mapping[str, Any]) -> Dict[str, Any]:
+        """Validate a mapping such as ``request.query``."""
+        values = {
+            field: value for field, value in values.items()
+            if field in self.fields and value is not None and value != ''
+        }
+        if MSGSPEC_AVAILABLE:
+            try:
+                result = msgspec.structs.asdict(msgspec.convert(values, self._struct, strict=False))
+            except msgspec.ValidationError as e:
+                raise ValueError(str(e)) from e
+            for field in self._dates:
+                if isinstance(result[field], str):
+                    result[field] = parse_datetime(result[field])
+            return result
+        
+        result = {}
+        for field, (kind, default) in self.fields.items():
+            if field in values:
+                result[field] = _coerce(field, kind, values[field])
+            elif default is REQUIRED:
+                raise ValueError(f"Object missing required field `{field}`")
+            else:
+                result[field] = default
+        return result
+    
+    def decode(self, body: bytes) -> Dict[str, Any]:
+        """Validate a JSON object request body; an empty body has no fields."""
+        if not body:
+            return self.convert({})
+        try:
+            data = msgspec.json.decode(body) if MSGSPEC_AVAILABLE else json.loads(body)
+        except ValueError as e:
+            # msgspec.DecodeError is a ValueError as well
+            raise ValueError(f"Invalid JSON: {e}") from e
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object")
+        return self.convert(data)
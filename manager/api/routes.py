@@ -1,13 +1,197 @@
 from py4web import action, request, response, abort
+import asyncio
+import hashlib
 import json
+import os
+import threading
+import time
 import structlog
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
 import uuid
 
 logger = structlog.get_logger()
 
+# The release never changes while the process runs
+try:
+    with open(".version") as f:
+        VERSION = f.read().strip()
+except OSError:
+    VERSION = "unknown"
+
+# Seconds a resolved API key is trusted before it is authenticated again
+API_KEY_CACHE_TTL = float(os.getenv('API_KEY_CACHE_TTL', '60'))
+# Seconds a verified JWT is trusted before its signature and revocation
+# state are checked again; never longer than the token's own expiry
+JWT_CACHE_TTL = float(os.getenv('JWT_CACHE_TTL', '30'))
+AUTH_CACHE_MAX_SIZE = 10000
+
+# Seconds a /status response is reused; monitoring polls it constantly
+STATUS_CACHE_TTL = float(os.getenv('STATUS_CACHE_TTL', '5'))
+
+# sha256(api key) -> (expires at, client or cluster)
+_client_auth_cache: Dict[str, Tuple[float, Any]] = {}
+_cluster_auth_cache: Dict[str, Tuple[float, Any]] = {}
+# sha256(token) -> (expires at, JWT payload)
+_jwt_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+# PEM of the JWT signing key, fetched once per process
+_public_key: Optional[str] = None
+# "status" -> (expires at, response)
+_status_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_auth_cache_lock = threading.Lock()
+
+# Headend configuration that is the same for every cluster. Responses share
+# these nested dicts, so they must never be modified per request.
+_HEADEND_CONFIG_DEFAULTS = {
+    # Server ports
+    "http_port": "8443",
+    "tcp_port": "8444",
+    "udp_port": "8445",
+    "metrics_port": "9090",
+    "cert_file": "/certs/headend.crt",
+    "key_file": "/certs/headend.key",
+    
+    # Traffic mirroring configuration
+    "mirror": {
+        "enabled": False,  # Default disabled
+        "destinations": [],
+        "protocol": "VXLAN",
+        "buffer_size": 1000,
+        "sample_rate": 100,
+        "filter": ""
+    },
+    
+    # Proxy configuration
+    "proxy": {
+        "skip_tls_verify": False,
+        "timeout_seconds": 30,
+        "max_idle_conns": 100
+    }
+}
+
+# OAuth2 config (if needed)
+_HEADEND_OAUTH2_DEFAULTS = {
+    "issuer": "",
+    "client_id": "",
+    "client_secret": "",
+    "redirect_url": ""
+}
+
+# SAML2 config (if needed); sp_entity_id is set per cluster
+_HEADEND_SAML2_DEFAULTS = {
+    "idp_metadata_url": "",
+    "sso_url": "",
+    "slo_url": ""
+}
+
+_HEADEND_WIREGUARD_DEFAULTS = {
+    "interface": "wg0",
+    "listen_port": 51820,
+    "network": "10.200.0.0/16"
+}
+
+# The fields a headend gets for each WireGuard peer, and nothing else
+_HEADEND_PEER_FIELDS = frozenset(('node_id', 'node_type', 'public_key', 'allowed_ips', 'endpoint'))
+
+# Fields each registration or node request body must carry
+_REQUIRED_CLUSTER_FIELDS = frozenset(('name', 'region', 'datacenter', 'headend_url'))
+_REQUIRED_CLIENT_FIELDS = frozenset(('name', 'type', 'public_key'))
+_REQUIRED_NODE_FIELDS = frozenset(('node_id', 'node_type', 'api_key'))
+_VALID_CLIENT_TYPES = frozenset(('docker', 'native'))
+
+def _missing_field(data: Any, required: frozenset) -> Optional[str]:
+    """Name a required field the request body lacks, or None if it has them all."""
+    missing = required - data.keys() if isinstance(data, dict) else required
+    return min(missing) if missing else None
+
+def _key_hash(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+def _cache_get(cache: Dict[str, Tuple[float, Any]], key: str) -> Optional[Any]:
+    cached = cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    return None
+
+def _cache_put(cache: Dict[str, Tuple[float, Any]], key: str, ttl: float, value: Any) -> None:
+    """Store a value for ``ttl`` seconds, dropping expired entries when full."""
+    if ttl <= 0:
+        return
+    with _auth_cache_lock:
+        if len(cache) >= AUTH_CACHE_MAX_SIZE:
+            now = time.monotonic()
+            for k in [k for k, (expires, _) in cache.items() if expires <= now]:
+                del cache[k]
+            if len(cache) >= AUTH_CACHE_MAX_SIZE:
+                cache.clear()
+        cache[key] = (time.monotonic() + ttl, value)
+
+def _cache_drop(cache: Dict[str, Tuple[float, Any]], key: str) -> None:
+    with _auth_cache_lock:
+        cache.pop(key, None)
+
+def _cache_drop_payloads(claim: str, value: Any) -> None:
+    """Forget cached JWTs whose payload ``claim`` equals ``value``."""
+    with _auth_cache_lock:
+        for k in [k for k, (_, payload) in _jwt_cache.items() if payload.get(claim) == value]:
+            del _jwt_cache[k]
+
+def invalidate_public_key() -> None:
+    """Forget the cached JWT public key, e.g. after the signing key is rotated."""
+    global _public_key
+    _public_key = None
+
 def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manager):
     
+    async def _authenticate_client(api_key: str):
+        """Authenticate a client API key, reusing recent results for the same key."""
+        key = _key_hash(api_key)
+        client = _cache_get(_client_auth_cache, key)
+        # A rotated or removed key must not outlive its client record
+        if client and client.api_key_hash == key and await client_registry.get_client(client.id) is client:
+            client_registry.mark_seen(client)
+            return client
+        
+        client = await client_registry.authenticate_client(api_key)
+        if client:
+            _cache_put(_client_auth_cache, key, API_KEY_CACHE_TTL, client)
+        else:
+            _cache_drop(_client_auth_cache, key)
+        return client
+    
+    async def _authenticate_cluster(api_key: str):
+        """Authenticate a cluster API key, reusing recent results for the same key."""
+        key = _key_hash(api_key)
+        cluster = _cache_get(_cluster_auth_cache, key)
+        if cluster and await cluster_manager.get_cluster(cluster.id) is cluster:
+            return cluster
+        
+        cluster = await cluster_manager.authenticate_cluster(api_key)
+        if cluster:
+            _cache_put(_cluster_auth_cache, key, API_KEY_CACHE_TTL, cluster)
+        else:
+            _cache_drop(_cluster_auth_cache, key)
+        return cluster
+    
+    async def _validate_token(token: str) -> Optional[Dict[str, Any]]:
+        """Validate a JWT, verifying the signature of a given token at most once per TTL."""
+        key = _key_hash(token)
+        payload = _cache_get(_jwt_cache, key)
+        if payload:
+            return payload
+        
+        payload = await jwt_manager.validate_token(token)
+        if payload:
+            ttl = min(JWT_CACHE_TTL, payload.get('exp', 0) - time.time())
+            _cache_put(_jwt_cache, key, ttl, payload)
+        return payload
+    
+    async def _get_public_key() -> str:
+        global _public_key
+        if _public_key is None:
+            _public_key = await jwt_manager.get_public_key()
+        return _public_key
+    
     @action("api/v1/clusters/register", method=["POST"])
     @action.uses("json")
     async def register_cluster():
@@ -15,11 +199,19 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
             data = await request.json()
             
             # Validate required fields
-            required = ['name', 'region', 'datacenter', 'headend_url']
-            for field in required:
-                if field not in data:
-                    response.status = 400
-                    return {"error": f"Missing required field: {field}"}
+            field = _missing_field(data, _REQUIRED_CLUSTER_FIELDS)
+            if field:
+                response.status = 400
+                return {"error": f"Missing required field: {field}"}
+            
+            # The headend certificate is issued for the headend's host name
+            try:
+                headend_host = urlsplit(data['headend_url']).hostname
+            except (TypeError, AttributeError, ValueError):
+                headend_host = None
+            if not headend_host:
+                response.status = 400
+                return {"error": "Invalid headend_url"}
             
             # Generate cluster ID
             data['id'] = str(uuid.uuid4())
@@ -31,7 +223,7 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
             key, cert, ca = await cert_manager.generate_headend_certificate(
                 cluster.id,
                 cluster.name,
-                [cluster.headend_url.split("://")[1].split(":")[0]]
+                [headend_host]
             )
             
             return {
@@ -97,14 +289,13 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
             data = await request.json()
             
             # Validate required fields
-            required = ['name', 'type', 'public_key']
-            for field in required:
-                if field not in data:
-                    response.status = 400
-                    return {"error": f"Missing required field: {field}"}
+            field = _missing_field(data, _REQUIRED_CLIENT_FIELDS)
+            if field:
+                response.status = 400
+                return {"error": f"Missing required field: {field}"}
             
             # Validate client type
-            if data['type'] not in ['docker', 'native']:
+            if data['type'] not in _VALID_CLIENT_TYPES:
                 response.status = 400
                 return {"error": "Invalid client type"}
             
@@ -123,6 +314,8 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
             
             # Register client
             client, api_key = await client_registry.register_client(data)
+            # The new key's first authenticated request should not miss the cache
+            _cache_put(_client_auth_cache, _key_hash(api_key), API_KEY_CACHE_TTL, client)
             
             # Generate client certificate
             key, cert, ca = await cert_manager.generate_client_certificate(
@@ -160,7 +353,7 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
                 return {"error": "Invalid authorization header"}
             
             api_key = auth_header[7:]
-            client = await client_registry.authenticate_client(api_key)
+            client = await _authenticate_client(api_key)
             
             if not client or client.id != client_id:
                 response.status = 401
@@ -204,13 +397,13 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
             token = auth_header[7:]
             
             # Try JWT first (for admin access)
-            user_info = jwt_manager.validate_token(token)
+            user_info = await _validate_token(token)
             if user_info and user_info.get('role') == 'admin':
                 # Admin can update any client
                 pass
             else:
                 # Try client API key
-                client = await client_registry.authenticate_client(token)
+                client = await _authenticate_client(token)
                 if not client or client.id != client_id:
                     response.status = 401
                     return {"error": "Unauthorized"}
@@ -292,7 +485,7 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
                 return {"error": "Invalid authorization header"}
             
             api_key = auth_header[7:]
-            client = await client_registry.authenticate_client(api_key)
+            client = await _authenticate_client(api_key)
             
             if not client or client.id != client_id:
                 response.status = 401
@@ -300,6 +493,9 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
             
             # Rotate API key
             new_api_key = await client_registry.rotate_api_key(client_id)
+            _cache_drop(_client_auth_cache, _key_hash(api_key))
+            if new_api_key:
+                _cache_put(_client_auth_cache, _key_hash(new_api_key), API_KEY_CACHE_TTL, client)
             
             if not new_api_key:
                 response.status = 500
@@ -334,7 +530,7 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
                 return {"error": "Invalid authorization header"}
             
             api_key = auth_header[7:]
-            client = await client_registry.authenticate_client(api_key)
+            client = await _authenticate_client(api_key)
             
             if not client or client.id != client_id:
                 response.status = 401
@@ -385,7 +581,7 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
             
             # Validate headend authentication
             # For now, we'll use JWT validation
-            user_info = jwt_manager.validate_token(token)
+            user_info = await _validate_token(token)
             if not user_info:
                 response.status = 401
                 return {"error": "Unauthorized"}
@@ -490,11 +686,10 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
             data = await request.json()
             
             # Validate required fields for JWT generation
-            required = ['node_id', 'node_type', 'api_key']
-            for field in required:
-                if field not in data:
-                    response.status = 400
-                    return {"error": f"Missing required field: {field}"}
+            field = _missing_field(data, _REQUIRED_NODE_FIELDS)
+            if field:
+                response.status = 400
+                return {"error": f"Missing required field: {field}"}
             
             node_id = data['node_id']
             node_type = data['node_type']
@@ -507,7 +702,7 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
             
             if node_type in ['kubernetes_node', 'raw_compute']:
                 # Authenticate cluster/headend nodes
-                cluster = await cluster_manager.authenticate_cluster(api_key)
+                cluster = await _authenticate_cluster(api_key)
                 if cluster:
                     authenticated = True
                     permissions = ['headend', 'proxy', 'wireguard', 'mirror_traffic']
@@ -518,7 +713,7 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
                     }
             elif node_type in ['client_docker', 'client_native']:
                 # Authenticate client nodes
-                client = await client_registry.authenticate_client(api_key)
+                client = await _authenticate_client(api_key)
                 if client and client.id == node_id:
                     authenticated = True
                     permissions = ['connect', 'tunnel', 'route']
@@ -589,7 +784,7 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
             token = auth_header[7:]  # Remove 'Bearer ' prefix
             
             # Validate the token
-            payload = await jwt_manager.validate_token(token)
+            payload = await _validate_token(token)
             
             if not payload:
                 response.status = 401
@@ -619,10 +814,12 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
             if 'node_id' in data:
                 # Revoke all tokens for a node
                 count = await jwt_manager.revoke_all_tokens(data['node_id'])
+                _cache_drop_payloads('sub', data['node_id'])
                 return {"revoked": count, "node_id": data['node_id']}
             elif 'jti' in data:
                 # Revoke specific token by JTI
                 success = await jwt_manager.revoke_token(data['jti'])
+                _cache_drop_payloads('jti', data['jti'])
                 return {"revoked": success, "jti": data['jti']}
             else:
                 response.status = 400
@@ -638,7 +835,7 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
     async def get_jwt_public_key():
         """Get public key for JWT verification (for headend servers)"""
         try:
-            public_key = await jwt_manager.get_public_key()
+            public_key = await _get_public_key()
             return {
                 "public_key": public_key,
                 "algorithm": "RS256",
@@ -657,11 +854,10 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
         try:
             data = await request.json()
             
-            required = ['node_id', 'node_type', 'api_key']
-            for field in required:
-                if field not in data:
-                    response.status = 400
-                    return {"error": f"Missing required field: {field}"}
+            field = _missing_field(data, _REQUIRED_NODE_FIELDS)
+            if field:
+                response.status = 400
+                return {"error": f"Missing required field: {field}"}
             
             node_id = data['node_id']
             node_type = data['node_type']
@@ -671,31 +867,35 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
             authenticated = False
             
             if node_type in ['kubernetes_node', 'raw_compute', 'headend']:
-                cluster = await cluster_manager.authenticate_cluster(api_key)
+                cluster = await _authenticate_cluster(api_key)
                 authenticated = cluster is not None
             elif node_type in ['client_docker', 'client_native']:
-                client = await client_registry.authenticate_client(api_key)
+                client = await _authenticate_client(api_key)
                 authenticated = client is not None and client.id == node_id
             
             if not authenticated:
                 response.status = 401
                 return {"error": "Authentication failed"}
             
-            # Generate WireGuard keys and assign IP
-            wg_config = await cert_manager.generate_wireguard_keys(node_id, node_type)
-            
-            # Generate X.509 certificate for WireGuard authentication
+            # Generate WireGuard keys and assign IP, plus the X.509 certificate
+            # for WireGuard authentication
             if node_type in ['headend', 'kubernetes_node', 'raw_compute']:
+                # The headend certificate names the assigned WireGuard IP
+                wg_config = await cert_manager.generate_wireguard_keys(node_id, node_type)
                 cert_key, cert_pem, ca_cert = await cert_manager.generate_headend_certificate(
                     node_id,
                     f"{node_type}-{node_id}",
                     [wg_config['ip_address']]
                 )
             else:
-                cert_key, cert_pem, ca_cert = await cert_manager.generate_client_certificate(
-                    node_id,
-                    f"{node_type}-{node_id}",
-                    node_type
+                # Client certificates don't depend on the keys, so overlap the two
+                wg_config, (cert_key, cert_pem, ca_cert) = await asyncio.gather(
+                    cert_manager.generate_wireguard_keys(node_id, node_type),
+                    cert_manager.generate_client_certificate(
+                        node_id,
+                        f"{node_type}-{node_id}",
+                        node_type
+                    )
                 )
             
             logger.info("Generated WireGuard keys and certificate", 
@@ -738,13 +938,13 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
             token = auth_header[7:]
             
             # Try JWT validation first
-            jwt_payload = await jwt_manager.validate_token(token)
+            jwt_payload = await _validate_token(token)
             if jwt_payload and 'headend' in jwt_payload.get('permissions', []):
                 # Authenticated via JWT
                 pass
             else:
                 # Try API key validation
-                cluster = await cluster_manager.authenticate_cluster(token)
+                cluster = await _authenticate_cluster(token)
                 if not cluster:
                     response.status = 401
                     return {"error": "Authentication failed"}
@@ -799,64 +999,45 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
                 return {"error": "Invalid authorization header"}
             
             api_key = auth_header[7:]
-            cluster = await cluster_manager.authenticate_cluster(api_key)
+            cluster = await _authenticate_cluster(api_key)
             
             if not cluster or cluster.id != cluster_id:
                 response.status = 401
                 return {"error": "Authentication failed"}
             
-            # Get WireGuard configuration for this cluster
-            wg_config = await cert_manager.get_wireguard_config(cluster_id)
+            # This cluster's WireGuard config, all peers of its WireGuard network
+            # and the JWT public key are independent, so fetch them together
+            wg_config, peers, public_key = await asyncio.gather(
+                cert_manager.get_wireguard_config(cluster_id),
+                cert_manager.get_all_wireguard_peers(),
+                _get_public_key()
+            )
             if not wg_config:
                 # Generate WireGuard config for headend if not exists
                 wg_config = await cert_manager.generate_wireguard_keys(cluster_id, "headend")
             
-            # Get all peers for this cluster's WireGuard network
-            peers = await cert_manager.get_all_wireguard_peers()
-            
-            # Build headend configuration
+            # Build headend configuration on top of the per-cluster constants
             config = {
-                # Server ports
-                "http_port": "8443",
-                "tcp_port": "8444", 
-                "udp_port": "8445",
-                "metrics_port": "9090",
-                "cert_file": "/certs/headend.crt",
-                "key_file": "/certs/headend.key",
+                **_HEADEND_CONFIG_DEFAULTS,
                 
                 # Authentication configuration
                 "auth": {
                     "type": "jwt",  # Default to JWT, can be overridden by env vars
                     "manager_url": request.url_root.rstrip('/'),
-                    "jwt_public_key": await jwt_manager.get_public_key(),
-                    
-                    # OAuth2 config (if needed)
-                    "oauth2": {
-                        "issuer": "",
-                        "client_id": "",
-                        "client_secret": "",
-                        "redirect_url": ""
-                    },
-                    
-                    # SAML2 config (if needed)  
-                    "saml2": {
-                        "idp_metadata_url": "",
-                        "sp_entity_id": f"headend-{cluster_id}",
-                        "sso_url": "",
-                        "slo_url": ""
-                    }
+                    "jwt_public_key": public_key,
+                    "oauth2": _HEADEND_OAUTH2_DEFAULTS,
+                    "saml2": {**_HEADEND_SAML2_DEFAULTS, "sp_entity_id": f"headend-{cluster_id}"}
                 },
                 
                 # WireGuard configuration
                 "wireguard": {
-                    "interface": "wg0",
+                    **_HEADEND_WIREGUARD_DEFAULTS,
                     "private_key": wg_config.get('private_key', ''),
                     "public_key": wg_config.get('public_key', ''),
-                    "listen_port": 51820,
-                    "network": "10.200.0.0/16",
                     "ip_address": wg_config.get('ip_address', '10.200.0.1'),
+                    # Peers already in headend shape are sent as they are
                     "peers": [
-                        {
+                        peer if peer.keys() == _HEADEND_PEER_FIELDS else {
                             "node_id": peer['node_id'],
                             "node_type": peer['node_type'],
                             "public_key": peer['public_key'],
@@ -864,23 +1045,6 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
                             "endpoint": peer.get('endpoint')
                         } for peer in peers
                     ]
-                },
-                
-                # Traffic mirroring configuration
-                "mirror": {
-                    "enabled": False,  # Default disabled
-                    "destinations": [],
-                    "protocol": "VXLAN",
-                    "buffer_size": 1000,
-                    "sample_rate": 100,
-                    "filter": ""
-                },
-                
-                # Proxy configuration
-                "proxy": {
-                    "skip_tls_verify": False,
-                    "timeout_seconds": 30,
-                    "max_idle_conns": 100
                 }
             }
             
@@ -896,18 +1060,26 @@ def setup_routes(app, cluster_manager, client_registry, cert_manager, jwt_manage
     @action.uses("json")
     async def get_status():
         try:
-            return {
+            status = _cache_get(_status_cache, 'status')
+            if status:
+                return status
+            
+            cluster_counts = await cluster_manager.get_status_counts()
+            client_counts = await client_registry.get_status_counts()
+            status = {
                 "service": "SASEWaddle Manager API",
-                "version": open(".version").read().strip(),
+                "version": VERSION,
                 "clusters": {
-                    "total": await cluster_manager.get_cluster_count(),
-                    "active": len([c for c in await cluster_manager.get_all_clusters() if c.status == 'active'])
+                    "total": sum(cluster_counts.values()),
+                    "active": cluster_counts.get('active', 0)
                 },
                 "clients": {
-                    "total": await client_registry.get_client_count(),
-                    "active": len([c for c in await client_registry.get_all_clients() if c.status == 'active'])
+                    "total": sum(client_counts.values()),
+                    "active": client_counts.get('active', 0)
                 }
             }
+            _cache_put(_status_cache, 'status', STATUS_CACHE_TTL, status)
+            return status
         except Exception as e:
             logger.error(f"Status error: {e}")
             response.status = 500
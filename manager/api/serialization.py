@@ -0,0 +1,192 @@
+"""JSON response serialization for SASEWaddle Manager API routes."""
+
+import dataclasses
+import gzip
+import hashlib
+import json
+import os
+import time
+from datetime import date, datetime
+from typing import Any, Optional
+
+from py4web import request, response
+from py4web.core import Fixture
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Bodies smaller than this are sent uncompressed; the saving would not pay
+# for the compression
+RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESS_MIN_BYTES', '1024'))
+
+
+def _default(value: Any) -> Any:
+    """Fallback for values the stdlib encoder cannot handle, matching orjson's output."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize a response body, with orjson when it is installed.
+
+    Datetimes are written as ISO 8601 and dataclasses as objects either way,
+    so handlers can return them as-is instead of converting each one.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value)
+    return json.dumps(value, default=_default).encode('utf-8')
+
+
+def loads(data: bytes) -> Any:
+    """Parse a JSON document, with orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# (second, ISO string) of the last generated_at() call
+_generated_at = (0, '')
+
+
+def generated_at() -> str:
+    """The current UTC time in ISO 8601, truncated to the second.
+    
+    The string is built once per second and shared, so otherwise identical
+    responses within that second are byte-identical and keep their ETag.
+    """
+    global _generated_at
+    second = int(time.time())
+    if _generated_at[0] != second:
+        _generated_at = (second, datetime.utcfromtimestamp(second).isoformat())
+    return _generated_at[1]
+
+
+def _etag(body: bytes) -> str:
+    """Strong ETag for a response body."""
+    return '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def _etag_matches(etag: str) -> bool:
+    """Whether the request's If-None-Match already names ``etag``."""
+    if_none_match = request.headers.get('If-None-Match', '')
+    return etag in (tag.strip() for tag in if_none_match.split(','))
+
+
+def state_etag(*state: Any) -> str:
+    """ETag for a response derived from the state it is built from.
+
+    Lets a handler answer a revalidation before building or serializing
+    the body; ``state`` must change whenever the body would.
+    """
+    return _etag(repr(state).encode('utf-8'))
+
+
+def not_modified(etag: str) -> bool:
+    """Tag the response with ``etag``; True (status set to 304) when the client holds it."""
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'private, no-cache'
+    if _etag_matches(etag):
+        response.status = 304
+        return True
+    return False
+
+
+def compress_body(body: bytes) -> bytes:
+    """Compress a response body with zstd or gzip when the client accepts it.
+
+    Sets Content-Encoding and Vary accordingly. Output is deterministic (gzip
+    without a timestamp), so ETags over compressed bodies stay stable.
+    """
+    if len(body) < RESPONSE_COMPRESS_MIN_BYTES:
+        return body
+
+    accepted = {
+        coding.split(';')[0].strip().lower()
+        for coding in request.headers.get('Accept-Encoding', '').split(',')
+    }
+    if ZSTD_AVAILABLE and 'zstd' in accepted:
+        body = zstandard.ZstdCompressor(level=3).compress(body)
+        encoding = 'zstd'
+    elif 'gzip' in accepted:
+        body = gzip.compress(body, compresslevel=6, mtime=0)
+        encoding = 'gzip'
+    else:
+        return body
+
+    response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    return body
+
+
+class JSONFixture(Fixture):
+    """py4web Fixture serializing dict responses with dumps().
+
+    With ``max_age`` set, successful GET responses also carry an ETag (a hash
+    of the body) and a private Cache-Control lifetime, and a request whose
+    If-None-Match still matches gets an empty 304 instead of the body. With
+    ``compress`` set, large bodies go through compress_body().
+    """
+
+    def __init__(self, max_age: Optional[int] = None, compress: bool = False):
+        self.__prerequisites__ = []
+        self.max_age = max_age
+        self.compress = compress
+
+    def on_success(self, context):
+        output = context.get('output')
+        if not isinstance(output, dict):
+            return
+
+        body = dumps(output)
+        response.headers['Content-Type'] = 'application/json'
+        if self.compress:
+            body = compress_body(body)
+
+        if self.max_age is not None and request.method == 'GET' and response.status_code == 200:
+            etag = _etag(body)
+            response.headers['ETag'] = etag
+            response.headers['Cache-Control'] = f'private, max-age={self.max_age}'
+
+            if _etag_matches(etag):
+                response.status = 304
+                body = b''
+
+        context['output'] = body
+
+
+json_response = JSONFixture()
+compressed_json_response = JSONFixture(compress=True)
+
+
+class PrebuiltJSON:
+    """A constant JSON response, serialized and tagged once at import.
+
+    ``serve()`` returns the stored body, or an empty 304 when the client
+    already holds it, so repeat requests skip serialization entirely.
+    """
+
+    def __init__(self, value: Any, max_age: int = 3600):
+        self.body = dumps(value)
+        self.etag = _etag(self.body)
+        self.cache_control = f'public, max-age={max_age}, immutable'
+
+    def serve(self) -> bytes:
+        response.headers['ETag'] = self.etag
+        response.headers['Cache-Control'] = self.cache_control
+        if _etag_matches(self.etag):
+            response.status = 304
+            return b''
+        response.headers['Content-Type'] = 'application/json'
+        return self.body
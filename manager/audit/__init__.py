@@ -2,18 +2,52 @@
 
 import os
 import json
+import atexit
+import queue
+import operator
+import base64
 import logging
 import hashlib
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple, Union
 from dataclasses import dataclass, asdict
+from functools import reduce
 from enum import Enum
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
-from database import get_db
+from pydal.objects import Expression
+
+from database import get_db, create_index
 
 logger = logging.getLogger(__name__)
 
+# Seconds audit statistics are reused in-process
+AUDIT_STATS_CACHE_TTL = int(os.getenv('AUDIT_STATS_CACHE_TTL', '60'))
+AUDIT_STATS_CACHE_SIZE = 512
+
+# log_event queues events for a background writer, which inserts up to
+# AUDIT_BATCH_SIZE of them per statement at least every AUDIT_FLUSH_INTERVAL
+AUDIT_QUEUE_SIZE = int(os.getenv('AUDIT_QUEUE_SIZE', '10000'))
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '200'))
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', '0.1'))  # seconds
+
+# Event listings count matching rows exactly up to this many; past it the
+# total is reported as unknown (or estimated when the listing is unfiltered)
+AUDIT_EXACT_COUNT_LIMIT = int(os.getenv('AUDIT_EXACT_COUNT_LIMIT', '10000'))
+
+# Integrity verification runs in chunks of this many days on a small thread
+# pool; results for chunks that ended before today are reused for a while
+AUDIT_INTEGRITY_CHUNK_DAYS = int(os.getenv('AUDIT_INTEGRITY_CHUNK_DAYS', '7'))
+AUDIT_INTEGRITY_WORKERS = int(os.getenv('AUDIT_INTEGRITY_WORKERS', '4'))
+AUDIT_INTEGRITY_CACHE_TTL = int(os.getenv('AUDIT_INTEGRITY_CACHE_TTL', '300'))
+
+# Seconds between refreshes of the daily statistics rollup by the background
+# writer (0 disables them, e.g. on all but one worker)
+AUDIT_ROLLUP_INTERVAL = int(os.getenv('AUDIT_ROLLUP_INTERVAL', '3600'))
+
 
 class AuditEventType(Enum):
     """Audit event types for compliance tracking."""
@@ -99,6 +133,31 @@ class AuditEvent:
     risk_score: int  # 1-10 scale
 
 
+def encode_page_cursor(timestamp: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for the row a page ended on."""
+    position = json.dumps([timestamp.isoformat(), row_id])
+    return base64.urlsafe_b64encode(position.encode('utf-8')).decode('ascii')
+
+
+def decode_page_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Parse a cursor from encode_page_cursor, raising ValueError if it is malformed."""
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Invalid page cursor")
+
+
+def keyset_after(table, column, cursor: str):
+    """Query for rows after ``cursor`` in ``column DESC, id DESC`` order.
+    
+    Spelled out as OR/AND rather than a row-value comparison so pyDAL can
+    render it on every supported database.
+    """
+    timestamp, row_id = decode_page_cursor(cursor)
+    return (column < timestamp) | ((column == timestamp) & (table.id < row_id))
+
+
 class AuditLogger:
     """Comprehensive audit logging system for compliance requirements."""
     
@@ -108,6 +167,35 @@ class AuditLogger:
         
         # Initialize compliance mapping
         self.compliance_mapping = self._load_compliance_mapping()
+        
+        # Short-lived cache of statistics: key -> (expires_at, value). Bumping
+        # the generation makes every cached entry unreachable at once.
+        self._stats_cache: Dict[tuple, tuple] = {}
+        self._stats_cache_lock = threading.Lock()
+        self._stats_generation = 0
+        
+        # Integrity chunks verify on their own threads; pyDAL connections are
+        # per thread, so each worker opens its own on start
+        self._integrity_workers = ThreadPoolExecutor(
+            max_workers=AUDIT_INTEGRITY_WORKERS,
+            thread_name_prefix='audit-integrity',
+            initializer=self.db._adapter.reconnect
+        )
+        self._integrity_cache: Dict[tuple, tuple] = {}
+        self._integrity_cache_lock = threading.Lock()
+        
+        # Maximum lengths of the bounded string columns, checked before queueing
+        # so one oversized event cannot fail a batch write
+        self._column_lengths = {
+            field.name: field.length for field in self.db.audit_events
+            if field.type == 'string' and field.length
+        }
+        
+        # Events are queued and written in batches by a background thread
+        self._queue: queue.Queue = queue.Queue(maxsize=AUDIT_QUEUE_SIZE)
+        self._stopping = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name='audit-flusher', daemon=True)
+        self._flusher.start()
     
     def _ensure_audit_tables(self):
         """Create audit-related database tables."""
@@ -136,17 +224,33 @@ class AuditLogger:
                 self.db.Field('archived', 'boolean', default=False)
             )
             
-            # Create indexes for performance and compliance queries
-            try:
-                self.db.executesql('CREATE INDEX idx_audit_events_timestamp ON audit_events(timestamp)')
-                self.db.executesql('CREATE INDEX idx_audit_events_user_id ON audit_events(user_id)')
-                self.db.executesql('CREATE INDEX idx_audit_events_event_type ON audit_events(event_type)')
-                self.db.executesql('CREATE INDEX idx_audit_events_ip_address ON audit_events(ip_address)')
-                self.db.executesql('CREATE INDEX idx_audit_events_resource ON audit_events(resource_type, resource_id)')
-                self.db.executesql('CREATE INDEX idx_audit_events_compliance ON audit_events(compliance_frameworks(255))')
-                logger.info("Created indexes for audit_events table")
-            except Exception as e:
-                logger.warning(f"Could not create audit indexes (may already exist): {e}")
+            # Listings only read unarchived events. PostgreSQL indexes just
+            # those rows (partial indexes); elsewhere archived leads the key.
+            if self.db._adapter.dbengine == 'postgres':
+                active_key = ''
+                active_rows = f" WHERE archived = {self.db._adapter.represent(False, 'boolean')}"
+            else:
+                active_key = 'archived, '
+                active_rows = ''
+            
+            # Indexes for performance and compliance queries, built CONCURRENTLY
+            # on PostgreSQL so a large existing table stays writable
+            for name, definition in (
+                ('idx_audit_events_timestamp', '(timestamp)'),
+                ('idx_audit_events_user_id', '(user_id)'),
+                ('idx_audit_events_event_type', '(event_type)'),
+                ('idx_audit_events_ip_address', '(ip_address)'),
+                ('idx_audit_events_resource', '(resource_type, resource_id)'),
+                # Keyset pagination order (scanned backwards for newest first),
+                # alone and behind the user and event type filters
+                ('idx_audit_events_archived_timestamp', f'({active_key}timestamp, id){active_rows}'),
+                ('idx_audit_events_archived_user_timestamp', f'({active_key}user_id, timestamp, id){active_rows}'),
+                ('idx_audit_events_archived_type_timestamp', f'({active_key}event_type, timestamp, id){active_rows}'),
+            ):
+                create_index(self.db, name, 'audit_events', definition)
+            if self.db._adapter.dbengine == 'mysql':
+                # Key prefix index on the JSON column; MySQL syntax only
+                create_index(self.db, 'idx_audit_events_compliance', 'audit_events', '(compliance_frameworks(255))')
         
         # Compliance reports table
         if 'compliance_reports' not in self.db.tables:
@@ -163,6 +267,12 @@ class AuditLogger:
                 self.db.Field('created_at', 'datetime', default=datetime.utcnow),
                 self.db.Field('completed_at', 'datetime')
             )
+            
+            # Report listings filter by framework and status, newest first
+            create_index(
+                self.db, 'idx_compliance_reports_framework_status', 'compliance_reports',
+                '(framework, status, created_at, id)'
+            )
         
         # Audit trail integrity table (for tamper detection)
         if 'audit_integrity' not in self.db.tables:
@@ -174,6 +284,23 @@ class AuditLogger:
                 self.db.Field('created_at', 'datetime', default=datetime.utcnow)
             )
         
+        # Per-day event counts (rebuilt from audit_events by refresh_daily_rollup)
+        if 'audit_events_daily' not in self.db.tables:
+            self.db.define_table('audit_events_daily',
+                self.db.Field('day', 'date', required=True),
+                self.db.Field('event_type', 'string', length=64),
+                self.db.Field('severity', 'string', length=16),
+                self.db.Field('event_count', 'bigint', default=0),
+                self.db.Field('high_risk_count', 'bigint', default=0),
+                self.db.Field('failed_count', 'bigint', default=0),
+                self.db.Field('risk_score_sum', 'bigint', default=0)
+            )
+            
+            create_index(
+                self.db, 'idx_audit_events_daily_key', 'audit_events_daily',
+                '(day, event_type, severity)', unique=True
+            )
+        
         self.db.commit()
         logger.info("Audit tables ensured")
     
@@ -226,10 +353,16 @@ class AuditLogger:
                   resource_id: Optional[str] = None, action: str = "",
                   details: Optional[Dict[str, Any]] = None, severity: str = "info",
                   session_id: Optional[str] = None, request_id: Optional[str] = None,
-                  outcome: str = "success", custom_risk_score: Optional[int] = None) -> str:
+                  outcome: str = "success", custom_risk_score: Optional[int] = None,
+                  sync: bool = False) -> str:
         """
         Log an audit event with full compliance tracking.
         
+        The event is queued for the background writer and stored within
+        ``AUDIT_FLUSH_INTERVAL``. With ``sync``, and for critical events, it
+        is written before returning instead, and a failed write raises.
+        Values too long for their column raise ValueError before queueing.
+        
         Returns:
             event_id: Unique identifier for the audit event
         """
@@ -243,68 +376,145 @@ class AuditLogger:
         # Calculate risk score if not provided
         risk_score = custom_risk_score or self._calculate_risk_score(event_type, severity, outcome)
         
-        # Create audit event
-        audit_event = AuditEvent(
-            event_id=event_id,
-            event_type=event_type,
-            timestamp=datetime.utcnow(),
-            user_id=user_id,
-            user_email=user_email,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            action=action,
-            details=details or {},
-            severity=severity,
-            compliance_frameworks=compliance_frameworks,
-            session_id=session_id,
-            request_id=request_id,
-            outcome=outcome,
-            risk_score=risk_score
-        )
+        now = datetime.utcnow()
+        values = {
+            'event_id': event_id,
+            'event_type': event_type.value,
+            'timestamp': now,
+            'user_id': user_id,
+            'user_email': user_email,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'resource_type': resource_type,
+            'resource_id': resource_id,
+            'action': action,
+            'details': json.dumps(details or {}),
+            'severity': severity,
+            'compliance_frameworks': json.dumps([f.value for f in compliance_frameworks]),
+            'session_id': session_id,
+            'request_id': request_id,
+            'outcome': outcome,
+            'risk_score': risk_score,
+            'created_at': now,
+            'archived': False
+        }
+        
+        for column, length in self._column_lengths.items():
+            value = values[column]
+            if isinstance(value, str) and len(value) > length:
+                raise ValueError(f"Audit event {column} is longer than {length} characters")
+        
+        if sync or severity == 'critical':
+            if not self._write_events([values]):
+                raise RuntimeError(f"Failed to store audit event {event_id}")
+        else:
+            try:
+                self._queue.put_nowait(values)
+            except queue.Full:
+                # Backpressure: write this event in the caller's thread rather than drop it
+                logger.warning("Audit event queue full, writing event synchronously")
+                self._write_events([values])
+        
+        # Log to application logs as well
+        log_level = {
+            'debug': logger.debug,
+            'info': logger.info,
+            'warning': logger.warning,
+            'error': logger.error,
+            'critical': logger.critical
+        }.get(severity, logger.info)
+        
+        log_level(f"AUDIT: {event_type.value} - User: {user_id} - Action: {action} - Outcome: {outcome}")
+        
+        return event_id
+    
+    def _write_events(self, batch: List[Dict[str, Any]]) -> bool:
+        """Store events with one multi-row INSERT per AUDIT_BATCH_SIZE events.
+        
+        If a batch fails its events are retried one by one, so a bad event
+        cannot take the rest of the batch down with it.
+        """
+        db = self.db
+        table = db.audit_events
+        columns = list(batch[0])
+        fields = [table[column] for column in columns]
+        insert = 'INSERT INTO audit_events ({}) VALUES '.format(', '.join(columns))
         
-        # Store in database
         try:
-            self.db.audit_events.insert(
-                event_id=audit_event.event_id,
-                event_type=audit_event.event_type.value,
-                timestamp=audit_event.timestamp,
-                user_id=audit_event.user_id,
-                user_email=audit_event.user_email,
-                ip_address=audit_event.ip_address,
-                user_agent=audit_event.user_agent,
-                resource_type=audit_event.resource_type,
-                resource_id=audit_event.resource_id,
-                action=audit_event.action,
-                details=json.dumps(audit_event.details),
-                severity=audit_event.severity,
-                compliance_frameworks=json.dumps([f.value for f in audit_event.compliance_frameworks]),
-                session_id=audit_event.session_id,
-                request_id=audit_event.request_id,
-                outcome=audit_event.outcome,
-                risk_score=audit_event.risk_score
-            )
-            self.db.commit()
-            
-            # Log to application logs as well
-            log_level = {
-                'debug': logger.debug,
-                'info': logger.info,
-                'warning': logger.warning,
-                'error': logger.error,
-                'critical': logger.critical
-            }.get(severity, logger.info)
+            for start in range(0, len(batch), AUDIT_BATCH_SIZE):
+                rows = (
+                    '({})'.format(', '.join(
+                        db._adapter.represent(values[field.name], field.type) for field in fields
+                    ))
+                    for values in batch[start:start + AUDIT_BATCH_SIZE]
+                )
+                db.executesql(insert + ', '.join(rows))
+            db.commit()
+            return True
             
-            log_level(f"AUDIT: {event_type.value} - User: {user_id} - Action: {action} - Outcome: {outcome}")
+        except Exception as e:
+            db.rollback()
+            if len(batch) > 1:
+                logger.warning(f"Failed to log {len(batch)} audit events, retrying one at a time: {e}")
+                results = [self._write_events([values]) for values in batch]
+                return all(results)
             
-            return event_id
+            values = batch[0]
+            logger.error(f"Failed to log audit event {values['event_id']}: {e}")
+            # Still log to application logs as fallback, with everything needed to replay it
+            logger.error(f"AUDIT_FALLBACK: {json.dumps(values, default=str)}")
+            return False
+    
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        """Wait for queued events and collect up to a batch worth of them."""
+        try:
+            batch = [self._queue.get(timeout=AUDIT_FLUSH_INTERVAL)]
+        except queue.Empty:
+            return []
+        
+        deadline = time.monotonic() + AUDIT_FLUSH_INTERVAL
+        while len(batch) < AUDIT_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _flush_loop(self) -> None:
+        """Background writer draining the event queue and keeping the rollup fresh."""
+        # pyDAL connections are per thread
+        self.db._adapter.reconnect()
+        next_rollup = 0.0
+        while not self._stopping.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._write_events(batch)
             
-        except Exception as e:
-            logger.error(f"Failed to log audit event: {e}")
-            # Still log to application logs as fallback
-            logger.error(f"AUDIT_FALLBACK: {event_type.value} - User: {user_id} - Action: {action}")
-            raise
+            # A failed refresh waits for the next interval rather than retrying hot
+            now = time.monotonic()
+            if AUDIT_ROLLUP_INTERVAL > 0 and now >= next_rollup:
+                next_rollup = now + AUDIT_ROLLUP_INTERVAL
+                self.refresh_daily_rollup()
+    
+    def flush(self) -> None:
+        """Synchronously write everything currently queued."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write_events(batch)
+    
+    def close(self) -> None:
+        """Stop the background writer and store everything still queued."""
+        self._stopping.set()
+        self._flusher.join(timeout=AUDIT_FLUSH_INTERVAL * 10 + 5)
+        self.flush()
     
     def _calculate_risk_score(self, event_type: AuditEventType, severity: str, outcome: str) -> int:
         """Calculate risk score (1-10) based on event characteristics."""
@@ -358,32 +568,80 @@ class AuditLogger:
                         event_types: Optional[List[AuditEventType]] = None,
                         compliance_framework: Optional[ComplianceFramework] = None,
                         severity_filter: Optional[List[str]] = None,
-                        limit: int = 1000, offset: int = 0) -> List[Dict[str, Any]]:
-        """Retrieve audit events with filtering for compliance reporting."""
+                        limit: int = 1000, offset: int = 0,
+                        with_total: bool = False) -> Union[List[Dict[str, Any]], Tuple[List[Dict[str, Any]], int]]:
+        """Retrieve audit events with filtering for compliance reporting.
+        
+        With ``with_total`` the number of events matching the filters is
+        returned as well, as ``(events, total)``; the total is None when it
+        exceeds ``AUDIT_EXACT_COUNT_LIMIT``.
+        """
+        page = self.get_audit_events_page(
+            start_date=start_date, end_date=end_date, user_id=user_id,
+            event_types=event_types, compliance_framework=compliance_framework,
+            severity_filter=severity_filter, limit=limit, offset=offset
+        )
+        if with_total:
+            return page['events'], page['total_count']
+        return page['events']
+    
+    def get_audit_events_page(self, start_date: Optional[datetime] = None,
+                              end_date: Optional[datetime] = None,
+                              user_id: Optional[str] = None,
+                              event_types: Optional[List[AuditEventType]] = None,
+                              compliance_framework: Optional[ComplianceFramework] = None,
+                              severity_filter: Optional[List[str]] = None,
+                              limit: int = 1000, offset: int = 0,
+                              cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Retrieve one page of audit events, newest first.
         
-        # Build query
-        query = self.db.audit_events.archived == False
+        Returns ``events``, ``has_more``, ``next_cursor``, ``total_count``
+        and ``total_count_estimate``. Passing the ``next_cursor`` of a page as
+        ``cursor`` fetches the following page by seeking past its last
+        (timestamp, id) rather than skipping ``offset`` rows, so deep pages
+        cost the same as the first; the counts then cover the events from the
+        cursor on. Raises ValueError for a malformed cursor.
+        
+        Matching events are counted only up to ``AUDIT_EXACT_COUNT_LIMIT``.
+        Past that ``total_count`` is None, and ``total_count_estimate`` comes
+        from the planner statistics on PostgreSQL when nothing is filtered.
+        """
+        
+        # Build query, folding the filters together once
+        predicates = [self.db.audit_events.archived == False]
         
         if start_date:
-            query &= (self.db.audit_events.timestamp >= start_date)
+            predicates.append(self.db.audit_events.timestamp >= start_date)
         if end_date:
-            query &= (self.db.audit_events.timestamp <= end_date)
+            predicates.append(self.db.audit_events.timestamp <= end_date)
         if user_id:
-            query &= (self.db.audit_events.user_id == user_id)
+            predicates.append(self.db.audit_events.user_id == user_id)
         if event_types:
-            type_values = [et.value for et in event_types]
-            query &= self.db.audit_events.event_type.belongs(type_values)
+            type_values = tuple(et.value for et in event_types)
+            predicates.append(self.db.audit_events.event_type.belongs(type_values))
         if severity_filter:
-            query &= self.db.audit_events.severity.belongs(severity_filter)
+            predicates.append(self.db.audit_events.severity.belongs(tuple(severity_filter)))
+        
+        if cursor:
+            predicates.append(keyset_after(self.db.audit_events, self.db.audit_events.timestamp, cursor))
+            offset = 0
+        
+        filtered = len(predicates) > 1
+        query = reduce(operator.and_, predicates)
         
-        # Execute query
-        events = self.db(query).select(
-            orderby=~self.db.audit_events.timestamp,
-            limitby=(offset, offset + limit)
+        # Execute query, reading one row past the page to know if another follows
+        rows = self.db(query).select(
+            self.db.audit_events.ALL,
+            orderby=~self.db.audit_events.timestamp | ~self.db.audit_events.id,
+            limitby=(offset, offset + limit + 1)
         )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        total, estimate = self._count_events(query, filtered)
         
         result = []
-        for event in events:
+        for event in rows:
             event_data = {
                 'event_id': event.event_id,
                 'event_type': event.event_type,
@@ -413,46 +671,104 @@ class AuditLogger:
             
             result.append(event_data)
         
-        return result
+        # The cursor follows the last row read, which may have been filtered out above
+        next_cursor = None
+        if has_more:
+            last = rows.last()
+            next_cursor = encode_page_cursor(last.timestamp, last.id)
+        
+        return {
+            'events': result,
+            'has_more': has_more,
+            'next_cursor': next_cursor,
+            'total_count': total,
+            'total_count_estimate': estimate
+        }
     
-    def get_audit_statistics(self, start_date: datetime, end_date: datetime,
-                           compliance_framework: Optional[ComplianceFramework] = None) -> Dict[str, Any]:
-        """Get audit statistics for compliance reporting."""
+    def _count_events(self, query, filtered: bool) -> Tuple[Optional[int], Optional[int]]:
+        """Count events matching ``query`` as ``(exact, estimate)``.
         
-        query = (self.db.audit_events.timestamp >= start_date) & \
-                (self.db.audit_events.timestamp <= end_date) & \
-                (self.db.audit_events.archived == False)
+        The count stops at ``AUDIT_EXACT_COUNT_LIMIT`` + 1 rows, so it never
+        walks the whole table; past the limit the exact count is None.
+        """
+        capped = self.db(query)._select(
+            self.db.audit_events.id, limitby=(0, AUDIT_EXACT_COUNT_LIMIT + 1)
+        ).rstrip(';')
+        count = self.db.executesql(f'SELECT COUNT(*) FROM ({capped}) capped')[0][0]
+        if count <= AUDIT_EXACT_COUNT_LIMIT:
+            return count, count
         
-        # Total events
-        total_events = self.db(query).count()
+        if not filtered and self.db._adapter.dbengine == 'postgres':
+            estimate = self.db.executesql(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = 'audit_events'"
+            )[0][0]
+            # reltuples is -1 until the table is first analyzed
+            if estimate >= 0:
+                return None, max(estimate, count)
+        return None, None
+    
+    def get_audit_statistics(self, start_date: datetime, end_date: datetime,
+                           compliance_framework: Optional[ComplianceFramework] = None) -> Dict[str, Any]:
+        """Get audit statistics for compliance reporting.
         
-        # Events by type
-        event_types = self.db(query).select(
-            self.db.audit_events.event_type,
-            self.db.audit_events.id.count(),
-            groupby=self.db.audit_events.event_type
+        Results are reused for ``AUDIT_STATS_CACHE_TTL`` seconds. Dates are
+        compared to the minute, so dashboards polling a rolling window
+        ("last 30 days" from now) share one result.
+        """
+        key = (
+            self._stats_generation,
+            start_date.isoformat(timespec='minutes'),
+            end_date.isoformat(timespec='minutes'),
+            compliance_framework.value if compliance_framework else None
         )
+        now = time.monotonic()
+        with self._stats_cache_lock:
+            entry = self._stats_cache.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
         
-        event_type_counts = {}
-        for row in event_types:
-            event_type_counts[row.audit_events.event_type] = row._extra[self.db.audit_events.id.count()]
+        stats = self._audit_statistics(start_date, end_date, compliance_framework)
+        with self._stats_cache_lock:
+            if len(self._stats_cache) >= AUDIT_STATS_CACHE_SIZE:
+                self._stats_cache = {k: v for k, v in self._stats_cache.items() if v[0] > now}
+            self._stats_cache[key] = (now + AUDIT_STATS_CACHE_TTL, stats)
+        return stats
+    
+    def invalidate_statistics_cache(self) -> None:
+        """Drop cached statistics so the next request recomputes them."""
+        with self._stats_cache_lock:
+            self._stats_generation += 1
+            self._stats_cache = {}
+    
+    def _audit_statistics(self, start_date: datetime, end_date: datetime,
+                          compliance_framework: Optional[ComplianceFramework] = None) -> Dict[str, Any]:
+        """Compute audit statistics for compliance reporting.
         
-        # Events by severity
-        severities = self.db(query).select(
-            self.db.audit_events.severity,
-            self.db.audit_events.id.count(),
-            groupby=self.db.audit_events.severity
-        )
+        Whole days already in the daily rollup are read from it; only the
+        partial days at either end of the window are counted from raw events.
+        """
         
-        severity_counts = {}
-        for row in severities:
-            severity_counts[row.audit_events.severity] = row._extra[self.db.audit_events.id.count()]
+        query = (self.db.audit_events.timestamp >= start_date) & \
+                (self.db.audit_events.timestamp <= end_date) & \
+                (self.db.audit_events.archived == False)
         
-        # High-risk events (risk_score >= 7)
-        high_risk_events = self.db(query & (self.db.audit_events.risk_score >= 7)).count()
+        first_day = start_date.date()
+        if start_date.time() != datetime.min.time():
+            first_day += timedelta(days=1)
+        rollup_end = min(end_date.date(), self._rollup_covered_until() or first_day)
         
-        # Failed events
-        failed_events = self.db(query & (self.db.audit_events.outcome == 'failure')).count()
+        if (rollup_end - first_day).days >= 2:
+            counts = self._rollup_counts(first_day, rollup_end)
+            head = (self.db.audit_events.timestamp >= start_date) & \
+                   (self.db.audit_events.timestamp < datetime.combine(first_day, datetime.min.time()))
+            tail = (self.db.audit_events.timestamp >= datetime.combine(rollup_end, datetime.min.time())) & \
+                   (self.db.audit_events.timestamp <= end_date)
+            for edge in (head, tail):
+                self._event_counts(edge & (self.db.audit_events.archived == False), counts)
+        else:
+            counts = self._event_counts(query)
+        
+        # Distinct counts cannot be summed across days, so these read raw events
         
         # Unique users
         unique_users = len(self.db(query & (self.db.audit_events.user_id != None)).select(
@@ -471,16 +787,136 @@ class AuditLogger:
                 'start_date': start_date.isoformat(),
                 'end_date': end_date.isoformat()
             },
-            'total_events': total_events,
-            'event_type_counts': event_type_counts,
-            'severity_counts': severity_counts,
-            'high_risk_events': high_risk_events,
-            'failed_events': failed_events,
+            'total_events': counts['total_events'],
+            'event_type_counts': counts['event_type_counts'],
+            'severity_counts': counts['severity_counts'],
+            'high_risk_events': counts['high_risk_events'],
+            'failed_events': counts['failed_events'],
             'unique_users': unique_users,
             'unique_ip_addresses': unique_ips,
             'compliance_framework': compliance_framework.value if compliance_framework else None
         }
     
+    def _daily_aggregates(self) -> Tuple[Expression, ...]:
+        """Count, high-risk (>= 7), failed and risk-sum aggregates over audit_events."""
+        events = self.db.audit_events
+        return (
+            events.id.count(),
+            Expression(self.db, f'SUM(CASE WHEN {events.risk_score.sqlsafe} >= 7 THEN 1 ELSE 0 END)', type='bigint'),
+            Expression(self.db, f"SUM(CASE WHEN {events.outcome.sqlsafe} = 'failure' THEN 1 ELSE 0 END)", type='bigint'),
+            events.risk_score.sum()
+        )
+    
+    @staticmethod
+    def _add_counts(counts: Dict[str, Any], event_type: str, severity: str,
+                    total: int, high_risk: int, failed: int) -> None:
+        """Fold one (event_type, severity) group into a statistics accumulator."""
+        counts['total_events'] += total
+        counts['event_type_counts'][event_type] = counts['event_type_counts'].get(event_type, 0) + total
+        counts['severity_counts'][severity] = counts['severity_counts'].get(severity, 0) + total
+        counts['high_risk_events'] += high_risk or 0
+        counts['failed_events'] += failed or 0
+    
+    @staticmethod
+    def _empty_counts() -> Dict[str, Any]:
+        """A statistics accumulator with nothing counted yet."""
+        return {'total_events': 0, 'event_type_counts': {}, 'severity_counts': {},
+                'high_risk_events': 0, 'failed_events': 0}
+    
+    def _event_counts(self, query, counts: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Count raw events matching ``query`` in a single grouped scan."""
+        counts = counts if counts is not None else self._empty_counts()
+        events = self.db.audit_events
+        total, high_risk, failed, _ = self._daily_aggregates()
+        
+        rows = self.db(query).select(
+            events.event_type, events.severity, total, high_risk, failed,
+            groupby=events.event_type | events.severity
+        )
+        for row in rows:
+            self._add_counts(counts, row.audit_events.event_type, row.audit_events.severity,
+                             row[total], row[high_risk], row[failed])
+        return counts
+    
+    def _rollup_counts(self, first_day: date, end_day: date) -> Dict[str, Any]:
+        """Sum the daily rollup over ``[first_day, end_day)``."""
+        counts = self._empty_counts()
+        daily = self.db.audit_events_daily
+        total = daily.event_count.sum()
+        high_risk = daily.high_risk_count.sum()
+        failed = daily.failed_count.sum()
+        
+        rows = self.db((daily.day >= first_day) & (daily.day < end_day)).select(
+            daily.event_type, daily.severity, total, high_risk, failed,
+            groupby=daily.event_type | daily.severity
+        )
+        for row in rows:
+            self._add_counts(counts, row.audit_events_daily.event_type, row.audit_events_daily.severity,
+                             row[total] or 0, row[high_risk], row[failed])
+        return counts
+    
+    def _rollup_covered_until(self) -> Optional[date]:
+        """First day the rollup does not cover yet, or None when it is empty."""
+        latest = self.db.audit_events_daily.day.max()
+        day = self.db().select(latest).first()[latest]
+        if day is None:
+            return None
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        return day + timedelta(days=1)
+    
+    def refresh_daily_rollup(self, since: Optional[date] = None) -> bool:
+        """Rebuild the daily rollup from ``since`` up to (not including) today.
+        
+        By default the last rolled-up day is recomputed, to pick up events
+        written around midnight, along with every completed day after it.
+        Pass an earlier ``since`` to rebuild history after archiving events.
+        """
+        db = self.db
+        events = db.audit_events
+        daily = db.audit_events_daily
+        try:
+            if since is None:
+                covered = self._rollup_covered_until()
+                if covered is not None:
+                    since = covered - timedelta(days=1)
+                else:
+                    oldest = events.timestamp.min()
+                    first = db(events.archived == False).select(oldest).first()[oldest]
+                    if first is None:
+                        return True
+                    since = first.date()
+            
+            start = datetime.combine(since, datetime.min.time())
+            end = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+            if start >= end:
+                return True
+            
+            day = Expression(db, f'DATE({events.timestamp.sqlsafe})', type='date')
+            total, high_risk, failed, risk_sum = self._daily_aggregates()
+            rows = db((events.timestamp >= start) & (events.timestamp < end) & (events.archived == False)).select(
+                day, events.event_type, events.severity, total, high_risk, failed, risk_sum,
+                groupby=day | events.event_type | events.severity
+            )
+            
+            db(daily.day >= since).delete()
+            daily.bulk_insert([{
+                'day': row[day],
+                'event_type': row.audit_events.event_type,
+                'severity': row.audit_events.severity,
+                'event_count': row[total],
+                'high_risk_count': row[high_risk] or 0,
+                'failed_count': row[failed] or 0,
+                'risk_score_sum': row[risk_sum] or 0
+            } for row in rows])
+            db.commit()
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to refresh audit rollup: {e}")
+            db.rollback()
+            return False
+    
     def calculate_daily_integrity(self, date: datetime.date) -> str:
         """Calculate daily integrity checksum for audit trail tamper detection."""
         
@@ -519,10 +955,80 @@ class AuditLogger:
         )
         self.db.commit()
         
+        # A newly stored record can change the outcome of a cached chunk
+        with self._integrity_cache_lock:
+            self._integrity_cache = {}
+        
         return checksum
     
     def verify_audit_integrity(self, start_date: datetime.date, end_date: datetime.date) -> Dict[str, Any]:
-        """Verify audit trail integrity for compliance audits."""
+        """Verify audit trail integrity for compliance audits.
+        
+        The period is split into chunks of ``AUDIT_INTEGRITY_CHUNK_DAYS`` days
+        verified concurrently; ``failed_chunks`` lists the chunks with a
+        failed or missing day.
+        """
+        
+        chunks = []
+        chunk_start = start_date
+        while chunk_start <= end_date:
+            chunk_end = min(chunk_start + timedelta(days=AUDIT_INTEGRITY_CHUNK_DAYS - 1), end_date)
+            chunks.append((chunk_start, chunk_end))
+            chunk_start = chunk_end + timedelta(days=1)
+        
+        if len(chunks) > 1:
+            chunk_results = list(self._integrity_workers.map(self._verify_chunk_in_worker, chunks))
+        else:
+            chunk_results = [self._verify_chunk(chunk) for chunk in chunks]
+        
+        results = {
+            'verified_dates': [],
+            'failed_dates': [],
+            'missing_dates': [],
+            'total_events_verified': 0,
+            'integrity_status': 'passed',
+            'failed_chunks': []
+        }
+        for (chunk_start, chunk_end), chunk in zip(chunks, chunk_results):
+            for key in ('verified_dates', 'failed_dates', 'missing_dates'):
+                results[key].extend(chunk[key])
+            results['total_events_verified'] += chunk['total_events_verified']
+            if chunk['integrity_status'] != 'passed':
+                results['integrity_status'] = 'failed'
+                results['failed_chunks'].append({
+                    'start_date': chunk_start.isoformat(),
+                    'end_date': chunk_end.isoformat()
+                })
+        
+        return results
+    
+    def _verify_chunk_in_worker(self, chunk: Tuple[date, date]) -> Dict[str, Any]:
+        try:
+            return self._verify_chunk(chunk)
+        finally:
+            # End the read transaction so the long-lived worker connection
+            # never holds an old snapshot
+            self.db.rollback()
+    
+    def _verify_chunk(self, chunk: Tuple[date, date]) -> Dict[str, Any]:
+        """Verify one chunk, reusing a recent result once the chunk is in the past."""
+        closed = chunk[1] < datetime.utcnow().date()
+        now = time.monotonic()
+        if closed:
+            with self._integrity_cache_lock:
+                entry = self._integrity_cache.get(chunk)
+                if entry and entry[0] > now:
+                    return entry[1]
+        
+        result = self._verify_integrity_range(*chunk)
+        if closed:
+            with self._integrity_cache_lock:
+                self._integrity_cache = {k: v for k, v in self._integrity_cache.items() if v[0] > now}
+                self._integrity_cache[chunk] = (now + AUDIT_INTEGRITY_CACHE_TTL, result)
+        return result
+    
+    def _verify_integrity_range(self, start_date: datetime.date, end_date: datetime.date) -> Dict[str, Any]:
+        """Verify the stored checksums of every day in a range."""
         
         results = {
             'verified_dates': [],
@@ -532,10 +1038,22 @@ class AuditLogger:
             'integrity_status': 'passed'
         }
         
+        # One read of the stored records and one scan of the events for the
+        # whole period, rather than two queries per day
+        integrity_records = {
+            record.day_date: record
+            for record in self.db(
+                (self.db.audit_integrity.day_date >= start_date) &
+                (self.db.audit_integrity.day_date <= end_date)
+            ).select()
+        }
+        checksums = self._recalculate_checksums(start_date, end_date)
+        empty_checksum = hashlib.sha256(b"").hexdigest()
+        
         current_date = start_date
         while current_date <= end_date:
             # Check if integrity record exists
-            integrity_record = self.db(self.db.audit_integrity.day_date == current_date).select().first()
+            integrity_record = integrity_records.get(current_date)
             
             if not integrity_record:
                 results['missing_dates'].append(current_date.isoformat())
@@ -543,8 +1061,7 @@ class AuditLogger:
                 current_date += timedelta(days=1)
                 continue
             
-            # Recalculate checksum for verification
-            calculated_checksum = self._recalculate_daily_checksum(current_date)
+            calculated_checksum = checksums.get(current_date, empty_checksum)
             
             if calculated_checksum == integrity_record.checksum:
                 results['verified_dates'].append(current_date.isoformat())
@@ -557,24 +1074,37 @@ class AuditLogger:
         
         return results
     
-    def _recalculate_daily_checksum(self, date: datetime.date) -> str:
-        """Recalculate checksum for a specific date."""
+    def _recalculate_checksums(self, start_date: datetime.date, end_date: datetime.date) -> Dict[date, str]:
+        """Recalculate the checksum of every day in a period from a single scan.
         
-        start_datetime = datetime.combine(date, datetime.min.time())
-        end_datetime = datetime.combine(date, datetime.max.time())
-        
-        events = self.db(
-            (self.db.audit_events.timestamp >= start_datetime) &
-            (self.db.audit_events.timestamp <= end_datetime)
-        ).select(orderby=self.db.audit_events.timestamp)
+        Rows are streamed and hashed incrementally per day, which gives the
+        same digest as hashing each day's concatenated event strings.
+        """
+        events = self.db.audit_events
+        hashes: Dict[date, Any] = {}
         
-        checksum_data = ""
-        for event in events:
-            event_string = f"{event.event_id}{event.event_type}{event.timestamp}{event.user_id}{event.action}"
-            checksum_data += event_string
+        for event in self.db(
+            (events.timestamp >= datetime.combine(start_date, datetime.min.time())) &
+            (events.timestamp <= datetime.combine(end_date, datetime.max.time()))
+        ).iterselect(events.event_id, events.event_type, events.timestamp, events.user_id, events.action,
+                     orderby=events.timestamp):
+            day = event.timestamp.date()
+            digest = hashes.get(day)
+            if digest is None:
+                digest = hashes[day] = hashlib.sha256()
+            digest.update(
+                f"{event.event_id}{event.event_type}{event.timestamp}{event.user_id}{event.action}".encode()
+            )
         
-        return hashlib.sha256(checksum_data.encode()).hexdigest()
+        return {day: digest.hexdigest() for day, digest in hashes.items()}
+    
+    def _recalculate_daily_checksum(self, date: datetime.date) -> str:
+        """Recalculate checksum for a specific date."""
+        return self._recalculate_checksums(date, date).get(date, hashlib.sha256(b"").hexdigest())
 
 
 # Global audit logger instance
-audit_logger = AuditLogger()
\ No newline at end of file
+audit_logger = AuditLogger()
+
+# Queued events would otherwise die with the daemon writer thread at exit
+atexit.register(audit_logger.close)
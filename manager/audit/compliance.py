@@ -7,6 +7,7 @@ import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from . import audit_logger, AuditEventType, ComplianceFramework
@@ -14,6 +15,17 @@ from database import get_db
 
 logger = logging.getLogger(__name__)
 
+# Report type recorded for each supported framework
+REPORT_TYPES = {
+    'SOC2': 'security_audit',
+    'GDPR': 'privacy_audit',
+    'HIPAA': 'phi_audit',
+    'PCI_DSS': 'cardholder_data_audit',
+}
+
+# Reports queued through the API are generated by this many background threads
+COMPLIANCE_REPORT_WORKERS = int(os.getenv('COMPLIANCE_REPORT_WORKERS', '2'))
+
 
 class ComplianceReporter:
     """Generate compliance reports for various frameworks."""
@@ -23,12 +35,65 @@ class ComplianceReporter:
         self.audit_logger = audit_logger
         self.reports_dir = Path(os.getenv('COMPLIANCE_REPORTS_DIR', '/var/log/sasewaddle/compliance'))
         self.reports_dir.mkdir(parents=True, exist_ok=True)
+        
+        self._generators = {
+            'SOC2': self.generate_soc2_report,
+            'GDPR': self.generate_gdpr_report,
+            'HIPAA': self.generate_hipaa_report,
+            'PCI_DSS': self.generate_pci_dss_report,
+        }
+        # pyDAL connections are per thread, so each worker opens its own on start
+        self._jobs = ThreadPoolExecutor(
+            max_workers=COMPLIANCE_REPORT_WORKERS,
+            thread_name_prefix='compliance-report',
+            initializer=self.db._adapter.reconnect
+        )
+    
+    def queue_report(self, framework: str, start_date: datetime, end_date: datetime,
+                     generated_by: str) -> str:
+        """Record a queued report and generate it in the background.
+        
+        Returns the report id at once; the report row moves through
+        ``queued``, ``running`` and ``completed`` (or ``failed``).
+        """
+        report_id = str(uuid.uuid4())
+        self.db.compliance_reports.insert(
+            report_id=report_id,
+            framework=framework,
+            report_type=REPORT_TYPES[framework],
+            start_date=start_date,
+            end_date=end_date,
+            generated_by=generated_by,
+            status='queued'
+        )
+        self.db.commit()
+        
+        self._jobs.submit(self._run_report_job, framework, report_id, start_date, end_date, generated_by)
+        return report_id
+    
+    def _run_report_job(self, framework: str, report_id: str, start_date: datetime,
+                        end_date: datetime, generated_by: str) -> None:
+        """Generate a queued report, marking its row failed if generation raises."""
+        report = self.db.compliance_reports.report_id == report_id
+        try:
+            self.db(report).update(status='running')
+            self.db.commit()
+            self._generators[framework](start_date, end_date, generated_by, report_id=report_id)
+        except Exception as e:
+            logger.error(f"Failed to generate {framework} compliance report {report_id}: {e}")
+            self.db.rollback()
+            try:
+                self.db(report).update(status='failed', completed_at=datetime.utcnow())
+                self.db.commit()
+            except Exception as mark_error:
+                logger.error(f"Failed to mark compliance report {report_id} failed: {mark_error}")
+                self.db.rollback()
     
     def generate_soc2_report(self, start_date: datetime, end_date: datetime, 
-                           generated_by: str) -> str:
+                           generated_by: str, report_id: Optional[str] = None) -> str:
         """Generate SOC 2 compliance report."""
         
-        report_id = str(uuid.uuid4())
+        report_id = report_id or str(uuid.uuid4())
         
         # SOC 2 focuses on security, availability, confidentiality
         soc2_events = [
@@ -96,10 +161,10 @@ class ComplianceReporter:
                                generated_by, report_data)
     
     def generate_gdpr_report(self, start_date: datetime, end_date: datetime,
-                           generated_by: str) -> str:
+                           generated_by: str, report_id: Optional[str] = None) -> str:
         """Generate GDPR compliance report."""
         
-        report_id = str(uuid.uuid4())
+        report_id = report_id or str(uuid.uuid4())
         
         # GDPR focuses on data protection and privacy
         gdpr_events = [
@@ -166,10 +231,10 @@ class ComplianceReporter:
                                generated_by, report_data)
     
     def generate_hipaa_report(self, start_date: datetime, end_date: datetime,
-                            generated_by: str) -> str:
+                            generated_by: str, report_id: Optional[str] = None) -> str:
         """Generate HIPAA compliance report."""
         
-        report_id = str(uuid.uuid4())
+        report_id = report_id or str(uuid.uuid4())
         
         # HIPAA focuses on healthcare data protection
         hipaa_events = [
@@ -224,10 +289,10 @@ class ComplianceReporter:
                                generated_by, report_data)
     
     def generate_pci_dss_report(self, start_date: datetime, end_date: datetime,
-                              generated_by: str) -> str:
+                              generated_by: str, report_id: Optional[str] = None) -> str:
         """Generate PCI DSS compliance report."""
         
-        report_id = str(uuid.uuid4())
+        report_id = report_id or str(uuid.uuid4())
         
         # PCI DSS focuses on payment card data security
         pci_events = [
@@ -300,9 +365,8 @@ class ComplianceReporter:
         csv_path = self.reports_dir / csv_filename
         self._generate_csv_summary(report_data, csv_path)
         
-        # Store report metadata in database
-        self.db.compliance_reports.insert(
-            report_id=report_id,
+        # Store report metadata in database, completing the row of a queued report
+        metadata = dict(
             framework=framework,
             report_type=report_type,
             start_date=start_date,
@@ -313,6 +377,8 @@ class ComplianceReporter:
             file_path=str(json_path),
             completed_at=datetime.utcnow()
         )
+        if not self.db(self.db.compliance_reports.report_id == report_id).update(**metadata):
+            self.db.compliance_reports.insert(report_id=report_id, **metadata)
         self.db.commit()
         
         logger.info(f"Generated {framework} compliance report: {report_id}")
@@ -1,29 +1,124 @@
 """Database backup and restore functionality for SASEWaddle Manager."""
 
+import io
 import os
 import json
 import gzip
+import time
 import shutil
 import hashlib
 import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, BinaryIO, Callable, Iterator, TextIO, Tuple
 from pathlib import Path
 import logging
 from urllib.parse import urlparse
 
 from database import get_db, get_database_uri
+from .encryption import (
+    CHUNK_SIZE as ENCRYPTION_CHUNK_SIZE, ENCRYPTED_MAGIC, EncryptedReader, EncryptedWriter, is_encrypted
+)
 from pydal import DAL
 
 try:
     import boto3
+    from boto3.s3.transfer import TransferConfig
     from botocore.exceptions import ClientError, NoCredentialsError
     S3_AVAILABLE = True
 except ImportError:
     S3_AVAILABLE = False
 
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INOTIFY_AVAILABLE = False
+
+try:
+    from apscheduler.executors.pool import ThreadPoolExecutor as SchedulerThreadPool
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.cron import CronTrigger
+    APSCHEDULER_AVAILABLE = True
+except ImportError:
+    APSCHEDULER_AVAILABLE = False
+
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Leading bytes used to tell backup formats apart on restore and upload
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+# Any file create_backup can write starts with one of these
+BACKUP_MAGICS = (ZSTD_MAGIC, GZIP_MAGIC, ENCRYPTED_MAGIC, b'{')
+
+# How long a bucket connection test result is reused by status checks
+S3_STATUS_CACHE_TTL = float(os.getenv('BACKUP_S3_STATUS_CACHE_TTL', '30'))
+
+# Scheduled backups that can run at the same time
+BACKUP_SCHEDULER_WORKERS = int(os.getenv('BACKUP_SCHEDULER_WORKERS', '4'))
+
+# Most keys one S3 delete_objects request accepts
+S3_DELETE_BATCH_SIZE = 1000
+
+# File extensions create_backup can produce, newest format first
+BACKUP_EXTENSIONS = ('.json.zst', '.json.gz', '.json', '.json.zst.enc', '.json.gz.enc', '.json.enc')
+
 logger = logging.getLogger(__name__)
 
+class _ChecksumWriter(io.RawIOBase):
+    """Pass-through writer that hashes and counts the bytes written."""
+    
+    def __init__(self, fileobj: BinaryIO, algorithm: str):
+        super().__init__()
+        self._fileobj = fileobj
+        self._hash = blake3.blake3() if algorithm == 'blake3' else hashlib.sha256()
+        self.size = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._fileobj.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+        return len(data)
+    
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+    
+    def close(self):
+        if not self.closed:
+            try:
+                self._fileobj.close()
+            finally:
+                super().close()
+
+
+class _ClosingGzipFile(gzip.GzipFile):
+    """GzipFile that also closes the file object it reads from."""
+    
+    def close(self):
+        fileobj = self.fileobj
+        try:
+            super().close()
+        finally:
+            if fileobj is not None:
+                fileobj.close()
+
+
 class S3Config:
     """S3 configuration for backup storage."""
     
@@ -38,6 +133,9 @@ class S3Config:
         # Optional: For custom S3-compatible providers
         self.use_ssl = os.getenv('BACKUP_S3_USE_SSL', 'true').lower() == 'true'
         self.verify_ssl = os.getenv('BACKUP_S3_VERIFY_SSL', 'true').lower() == 'true'
+        # Multipart transfer tuning for large backups
+        self.multipart_chunk_mb = int(os.getenv('BACKUP_S3_MULTIPART_CHUNK_MB', '64'))
+        self.max_concurrency = int(os.getenv('BACKUP_S3_MAX_CONCURRENCY', '16'))
 
 
 class BackupManager:
@@ -56,10 +154,102 @@ class BackupManager:
         # Initialize S3 configuration
         self.s3_config = S3Config()
         self.s3_client = None
+        self.s3_transfer_config = None
+        self._s3_status = None
+        self._s3_status_lock = threading.Lock()
+        
+        # Local backup metadata, reused until the backup directory changes
+        self._local_backups = None
+        self._local_backups_version = None
+        self._local_backups_lock = threading.Lock()
+        self._dir_generation = 0
+        self._dir_watched = self._watch_backup_dir()
+        
+        # Cron scheduler for automatic backups, started on first use
+        self._scheduler = None
+        self._scheduler_lock = threading.Lock()
         
         if self.s3_config.enabled:
             self._init_s3_client()
     
+    def _watch_backup_dir(self) -> bool:
+        """Count changes to the backup directory from an inotify thread."""
+        if not INOTIFY_AVAILABLE:
+            return False
+        
+        try:
+            inotify = INotify()
+            inotify.add_watch(
+                str(self.backup_dir),
+                inotify_flags.CREATE | inotify_flags.DELETE | inotify_flags.MOVED_TO
+                | inotify_flags.MOVED_FROM | inotify_flags.CLOSE_WRITE
+            )
+        except OSError as e:
+            logger.warning(f"Could not watch backup directory, falling back to mtime checks: {e}")
+            return False
+        
+        def _watch():
+            while True:
+                if inotify.read():
+                    self._dir_generation += 1
+        
+        threading.Thread(target=_watch, name='backup-dir-watch', daemon=True).start()
+        return True
+    
+    def _backup_dir_generation(self) -> int:
+        """Value that changes whenever backups are added, removed or rewritten."""
+        if self._dir_watched:
+            return self._dir_generation
+        # Without inotify the directory mtime still catches adds, deletes and renames
+        return self.backup_dir.stat().st_mtime_ns
+    
+    def local_backups_version(self) -> str:
+        """Fingerprint of the local backup listing, the same in every process.
+        
+        Hashes the name, mtime and size of each ``.meta`` file, so it survives
+        restarts and matches across workers (unlike the directory generation,
+        which is a per-process counter) while still changing whenever the
+        listing would. Recomputed only when the backup directory changes.
+        """
+        generation = self._backup_dir_generation()
+        with self._local_backups_lock:
+            if self._local_backups_version and self._local_backups_version[0] == generation:
+                return self._local_backups_version[1]
+        
+        digest = hashlib.sha256()
+        for meta_file in sorted(self.backup_dir.glob("*.meta")):
+            try:
+                stat = meta_file.stat()
+            except FileNotFoundError:
+                continue
+            digest.update(f"{meta_file.name}\0{stat.st_mtime_ns}\0{stat.st_size}\n".encode('utf-8'))
+        version = digest.hexdigest()
+        
+        with self._local_backups_lock:
+            self._local_backups_version = (generation, version)
+        return version
+    
+    def _list_local_backups(self) -> List[Dict[str, Any]]:
+        """Read local backup metadata, reusing the last read while the directory is unchanged."""
+        generation = self._backup_dir_generation()
+        with self._local_backups_lock:
+            if self._local_backups and self._local_backups[0] == generation:
+                return [dict(backup) for backup in self._local_backups[1]]
+        
+        backups = []
+        for meta_file in self.backup_dir.glob("*.meta"):
+            try:
+                with open(meta_file, 'r') as f:
+                    metadata = json.load(f)
+                    metadata['storage_location'] = 'local'
+                    backups.append(metadata)
+            except Exception as e:
+                logger.warning(f"Could not read metadata file {meta_file}: {e}")
+        
+        with self._local_backups_lock:
+            self._local_backups = (generation, backups)
+        return [dict(backup) for backup in backups]
+    
     def _init_s3_client(self):
         """Initialize S3 client for backup storage."""
         if not S3_AVAILABLE:
@@ -87,6 +277,15 @@ class BackupManager:
             
             self.s3_client = session.client('s3', **client_config)
             
+            # Parallel multipart uploads and ranged downloads for large files
+            part_size = self.s3_config.multipart_chunk_mb * 1024 * 1024
+            self.s3_transfer_config = TransferConfig(
+                multipart_threshold=part_size,
+                multipart_chunksize=part_size,
+                max_concurrency=self.s3_config.max_concurrency,
+                use_threads=True
+            )
+            
             # Test connection and create bucket if needed
             self._ensure_s3_bucket()
             
@@ -99,6 +298,22 @@ class BackupManager:
             logger.error(f"Failed to initialize S3 client: {e}")
             raise
     
+    def check_s3_connection(self) -> str:
+        """Test access to the backup bucket, reusing a recent result."""
+        with self._s3_status_lock:
+            if self._s3_status and self._s3_status[0] > time.monotonic():
+                return self._s3_status[1]
+        
+        try:
+            self.s3_client.head_bucket(Bucket=self.s3_config.bucket)
+            result = "success"
+        except Exception as e:
+            result = f"failed: {str(e)}"
+        
+        with self._s3_status_lock:
+            self._s3_status = (time.monotonic() + S3_STATUS_CACHE_TTL, result)
+        return result
+    
     def _ensure_s3_bucket(self):
         """Ensure the S3 bucket exists."""
         try:
@@ -130,17 +345,26 @@ class BackupManager:
         compress: bool = True,
         encrypt: bool = False,
         encryption_key: Optional[str] = None,
-        upload_to_s3: Optional[bool] = None
+        upload_to_s3: Optional[bool] = None,
+        compression: str = 'zstd',
+        local_copy: bool = True
     ) -> Dict[str, Any]:
         """
         Create a full database backup.
         
+        Rows are serialized, compressed, encrypted and checksummed as they are
+        read, in a single pass with no intermediate files.
+        
         Args:
             backup_name: Custom backup name (auto-generated if not provided)
-            compress: Whether to compress the backup with gzip
+            compress: Whether to compress the backup
+            compression: Compression format, 'zstd' or 'gzip' (gzip is used
+                when zstandard is not installed)
             encrypt: Whether to encrypt the backup
             encryption_key: Encryption key (required if encrypt=True)
             upload_to_s3: Override S3 upload setting (defaults to S3 config)
+            local_copy: Keep the backup in the backup directory; when False
+                it is streamed straight to S3 and only stored there
             
         Returns:
             Backup metadata including file path and checksum
@@ -153,100 +377,95 @@ class BackupManager:
                 timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
                 backup_name = f"sasewaddle_backup_{timestamp}"
             
+            if compression not in ('zstd', 'gzip'):
+                raise ValueError(f"Unsupported compression: {compression}")
+            if not compress:
+                compression = None
+            elif compression == 'zstd' and not ZSTD_AVAILABLE:
+                logger.warning("zstandard not installed, falling back to gzip compression")
+                compression = 'gzip'
+            
+            if encrypt and not encryption_key:
+                raise ValueError("Encryption key required for encrypted backups")
+            
+            should_upload_s3 = upload_to_s3 if upload_to_s3 is not None else self.s3_config.enabled
+            should_upload_s3 = bool(should_upload_s3 and self.s3_client)
+            if not local_copy and not should_upload_s3:
+                raise ValueError("Backups without a local copy must be uploaded to S3")
+            
             # Determine file extension
             ext = ".json"
-            if compress:
+            if compression == 'zstd':
+                ext += ".zst"
+            elif compression == 'gzip':
                 ext += ".gz"
             if encrypt:
                 ext += ".enc"
             
             backup_file = self.backup_dir / f"{backup_name}{ext}"
+            checksum_algorithm = 'blake3' if BLAKE3_AVAILABLE else 'sha256'
             
-            # Export all tables
-            backup_data = {
-                "metadata": {
-                    "version": "1.0",
-                    "created_at": datetime.utcnow().isoformat(),
-                    "db_uri": self._sanitize_db_uri(get_database_uri()),
-                    "tables": []
-                },
-                "data": {}
-            }
-            
-            # Backup each table
-            for table_name in db.tables:
-                table = db[table_name]
-                rows = db(table).select()
-                
-                # Convert rows to JSON-serializable format
-                table_data = []
-                for row in rows:
-                    row_dict = {}
-                    for field in table.fields:
-                        value = row[field]
-                        # Handle datetime objects
-                        if isinstance(value, datetime):
-                            value = value.isoformat()
-                        row_dict[field] = value
-                    table_data.append(row_dict)
-                
-                backup_data["data"][table_name] = table_data
-                backup_data["metadata"]["tables"].append({
-                    "name": table_name,
-                    "row_count": len(table_data)
-                })
-            
-            # Convert to JSON
-            json_data = json.dumps(backup_data, indent=2)
-            
-            # Compress if requested
-            if compress:
-                json_bytes = json_data.encode('utf-8')
-                with gzip.open(backup_file, 'wb') as f:
-                    f.write(json_bytes)
+            # Write to disk, or to S3 through a pipe when no local copy is kept
+            s3_upload = None
+            if local_copy:
+                sink = open(backup_file, 'wb')
             else:
-                with open(backup_file, 'w') as f:
-                    f.write(json_data)
+                sink, s3_upload = self._open_s3_upload(backup_file.name, backup_name)
+            checksummed = _ChecksumWriter(sink, checksum_algorithm)
             
-            # Encrypt if requested
-            if encrypt:
-                if not encryption_key:
-                    raise ValueError("Encryption key required for encrypted backups")
-                self._encrypt_file(backup_file, encryption_key)
-            
-            # Calculate checksum
-            checksum = self._calculate_checksum(backup_file)
+            try:
+                with self._open_backup_writer(checksummed, compression, encryption_key if encrypt else None) as f:
+                    tables = self._dump_tables(db, f)
+                    f.write(', "metadata": ')
+                    json.dump({
+                        "version": "1.0",
+                        "created_at": datetime.utcnow().isoformat(),
+                        "db_uri": self._sanitize_db_uri(get_database_uri()),
+                        "tables": tables
+                    }, f)
+                    f.write('}')
+            except Exception:
+                if local_copy:
+                    backup_file.unlink(missing_ok=True)
+                else:
+                    s3_upload(abort=True)
+                raise
             
             # Upload to S3 if enabled
             s3_info = None
-            should_upload_s3 = upload_to_s3 if upload_to_s3 is not None else self.s3_config.enabled
-            
-            if should_upload_s3 and self.s3_client:
+            if s3_upload:
+                s3_info = s3_upload()
+            elif should_upload_s3:
                 s3_info = self._upload_backup_to_s3(backup_file, backup_name)
             
             # Create metadata
             metadata = {
                 "backup_name": backup_name,
-                "file_path": str(backup_file),
+                "file_path": str(backup_file) if local_copy else None,
                 "created_at": datetime.utcnow().isoformat(),
-                "compressed": compress,
+                "compressed": compression is not None,
+                "compression": compression,
                 "encrypted": encrypt,
-                "checksum": checksum,
-                "size_bytes": backup_file.stat().st_size,
-                "table_count": len(backup_data["metadata"]["tables"]),
-                "total_rows": sum(t["row_count"] for t in backup_data["metadata"]["tables"]),
+                "checksum": checksummed.hexdigest(),
+                "checksum_algorithm": checksum_algorithm,
+                "size_bytes": checksummed.size,
+                "table_count": len(tables),
+                "total_rows": sum(t["row_count"] for t in tables),
                 "s3_info": s3_info
             }
             
             metadata_file = backup_file.with_suffix('.meta')
-            with open(metadata_file, 'w') as f:
-                json.dump(metadata, f, indent=2)
+            if local_copy:
+                with open(metadata_file, 'w') as f:
+                    json.dump(metadata, f, indent=2)
+                # Don't wait for the directory watcher to see our own change
+                self._dir_generation += 1
             
             # Also upload metadata to S3 if backup was uploaded
             if s3_info:
-                self._upload_metadata_to_s3(metadata_file, backup_name)
+                self._upload_metadata_to_s3(metadata, metadata_file.name, backup_name)
             
-            logger.info(f"Backup created successfully: {backup_file}")
+            logger.info(f"Backup created successfully: {backup_file.name}")
             if s3_info:
                 logger.info(f"Backup uploaded to S3: {s3_info['s3_key']}")
             
@@ -256,6 +475,34 @@ class BackupManager:
             logger.error(f"Backup failed: {e}")
             raise
     
+    def _dump_tables(self, db: DAL, f: TextIO) -> List[Dict[str, Any]]:
+        """
+        Write the opening of the backup document and every table's rows as
+        they are read. Returns each table's row count for the metadata.
+        """
+        tables = []
+        f.write('{"data": {')
+        for index, table_name in enumerate(db.tables):
+            table = db[table_name]
+            f.write((', ' if index else '') + json.dumps(table_name) + ': [')
+            
+            row_count = 0
+            for row in db(table).iterselect():
+                row_dict = {}
+                for field in table.fields:
+                    value = row[field]
+                    # Handle datetime objects
+                    if isinstance(value, datetime):
+                        value = value.isoformat()
+                    row_dict[field] = value
+                f.write((', ' if row_count else '') + json.dumps(row_dict))
+                row_count += 1
+            
+            f.write(']')
+            tables.append({"name": table_name, "row_count": row_count})
+        f.write('}')
+        return tables
+    
     def restore_backup(
         self,
         backup_path: str,
@@ -293,27 +540,20 @@ class BackupManager:
                 with open(metadata_file, 'r') as f:
                     metadata = json.load(f)
                 
-                # Verify checksum if requested
-                if verify_checksum and 'checksum' in metadata:
-                    actual_checksum = self._calculate_checksum(backup_file)
+                # Verify checksum if requested; encrypted backups skip it
+                # since every chunk's authentication tag is checked on decrypt
+                if verify_checksum and 'checksum' in metadata and not (decrypt and self._is_encrypted(backup_file)):
+                    # Backups without an algorithm predate BLAKE3 checksums
+                    algorithm = metadata.get('checksum_algorithm', 'sha256')
+                    actual_checksum = self._calculate_checksum(backup_file, algorithm)
                     if actual_checksum != metadata['checksum']:
                         raise ValueError("Backup file checksum verification failed")
             
-            # Decrypt if needed
-            if decrypt:
-                if not decryption_key:
-                    raise ValueError("Decryption key required for encrypted backups")
-                backup_file = self._decrypt_file(backup_file, decryption_key)
-            
-            # Decompress and load data
-            if backup_file.suffix == '.gz':
-                with gzip.open(backup_file, 'rb') as f:
-                    json_data = f.read().decode('utf-8')
-            else:
-                with open(backup_file, 'r') as f:
-                    json_data = f.read()
-            
-            backup_data = json.loads(json_data)
+            # Decrypt, decompress and load data in one pass
+            if decrypt and not decryption_key:
+                raise ValueError("Decryption key required for encrypted backups")
+            with self._open_backup_reader(backup_file, decryption_key if decrypt else None) as f:
+                backup_data = json.load(f)
             
             # Validate backup format
             if 'metadata' not in backup_data or 'data' not in backup_data:
@@ -389,17 +629,8 @@ class BackupManager:
         Returns:
             List of backup metadata
         """
-        backups = []
-        
         # Find local backups
-        for meta_file in self.backup_dir.glob("*.meta"):
-            try:
-                with open(meta_file, 'r') as f:
-                    metadata = json.load(f)
-                    metadata['storage_location'] = 'local'
-                    backups.append(metadata)
-            except Exception as e:
-                logger.warning(f"Could not read metadata file {meta_file}: {e}")
+        backups = self._list_local_backups()
         
         # Add S3 backups if enabled and requested
         if include_s3 and self.s3_client:
@@ -417,7 +648,7 @@ class BackupManager:
                     # No metadata file, use basic info
                     s3_backup.update({
                         'created_at': s3_backup['last_modified'],
-                        'compressed': s3_backup['filename'].endswith('.gz'),
+                        'compressed': s3_backup['filename'].endswith(('.gz', '.zst')),
                         'encrypted': s3_backup['filename'].endswith('.enc')
                     })
                     backups.append(s3_backup)
@@ -433,6 +664,47 @@ class BackupManager:
         
         return unique_backups
     
+    def get_backup(self, backup_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a single local backup by name.
+        
+        Probes the known backup extensions directly instead of listing the
+        backup directory.
+        
+        Args:
+            backup_name: Name of the backup
+            
+        Returns:
+            Backup metadata, or None if no local backup has that name
+        """
+        if not backup_name or os.sep in backup_name:
+            return None
+        
+        for ext in BACKUP_EXTENSIONS:
+            backup_file = self.backup_dir / f"{backup_name}{ext}"
+            try:
+                stat = backup_file.stat()
+            except OSError:
+                continue
+            
+            try:
+                with open(backup_file.with_suffix('.meta'), 'r') as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                # No metadata sidecar (e.g. an uploaded file), use basic info
+                metadata = {
+                    'backup_name': backup_name,
+                    'file_path': str(backup_file),
+                    'created_at': datetime.utcfromtimestamp(stat.st_mtime).isoformat(),
+                    'compressed': ext.startswith(('.json.zst', '.json.gz')),
+                    'encrypted': ext.endswith('.enc'),
+                    'size_bytes': stat.st_size
+                }
+            metadata['storage_location'] = 'local'
+            return metadata
+        
+        return None
+    
     def delete_backup(self, backup_name: str) -> bool:
         """
         Delete a backup and its metadata.
@@ -455,22 +727,99 @@ class BackupManager:
                 except Exception as e:
                     logger.error(f"Error deleting {backup_file}: {e}")
         
+        if deleted:
+            self._dir_generation += 1
         return deleted
     
-    def schedule_backup(self, cron_expression: str, **backup_kwargs) -> str:
+    def schedule_backup(self, cron_expression: str, max_instances: int = 1, **backup_kwargs) -> str:
         """
         Schedule automatic backups using cron expression.
         
+        Each schedule runs on its own scheduler worker, so a slow backup or
+        upload does not hold back other schedules. Runs of one schedule never
+        overlap beyond ``max_instances``, and missed runs are coalesced.
+        
         Args:
-            cron_expression: Cron expression for scheduling
+            cron_expression: Cron expression for scheduling (UTC)
+            max_instances: Runs of this schedule allowed at the same time
             **backup_kwargs: Arguments to pass to create_backup
             
         Returns:
             Schedule ID
         """
-        # This would integrate with a scheduler like APScheduler
-        # For now, return a placeholder
-        return f"schedule_{datetime.utcnow().timestamp()}"
+        return self.schedule_backups([
+            dict(backup_kwargs, cron_expression=cron_expression, max_instances=max_instances)
+        ])[0]
+    
+    def schedule_backups(self, schedules: List[Dict[str, Any]]) -> List[str]:
+        """
+        Schedule several automatic backups at once.
+        
+        Every cron expression is checked before any job is added, so either
+        all schedules are registered or none are.
+        
+        Args:
+            schedules: Dicts with ``cron_expression``, optional ``max_instances``
+                and any create_backup arguments
+            
+        Returns:
+            Schedule IDs, in the order given
+        """
+        if not APSCHEDULER_AVAILABLE:
+            raise RuntimeError("APScheduler required for scheduled backups")
+        
+        jobs = []
+        for schedule in schedules:
+            backup_kwargs = dict(schedule)
+            cron_expression = backup_kwargs.pop('cron_expression')
+            max_instances = backup_kwargs.pop('max_instances', 1)
+            # Raises ValueError for an invalid expression
+            trigger = CronTrigger.from_crontab(cron_expression, timezone='UTC')
+            jobs.append((f"schedule_{uuid.uuid4().hex[:12]}", cron_expression, trigger, max_instances, backup_kwargs))
+        
+        scheduler = self._get_scheduler()
+        added = []
+        try:
+            for schedule_id, cron_expression, trigger, max_instances, backup_kwargs in jobs:
+                scheduler.add_job(
+                    self._run_scheduled_backup,
+                    trigger,
+                    id=schedule_id,
+                    args=[schedule_id],
+                    kwargs=backup_kwargs,
+                    max_instances=max_instances
+                )
+                added.append(schedule_id)
+                logger.info(f"Scheduled backup {schedule_id}: {cron_expression}")
+        except Exception:
+            for schedule_id in added:
+                scheduler.remove_job(schedule_id)
+            raise
+        
+        return added
+    
+    def _get_scheduler(self) -> 'BackgroundScheduler':
+        """Start the backup scheduler on first use."""
+        with self._scheduler_lock:
+            if self._scheduler is None:
+                self._scheduler = BackgroundScheduler(
+                    executors={'default': SchedulerThreadPool(BACKUP_SCHEDULER_WORKERS)},
+                    job_defaults={'coalesce': True, 'misfire_grace_time': 3600, 'max_instances': 1},
+                    timezone='UTC'
+                )
+                self._scheduler.start()
+            return self._scheduler
+    
+    def _run_scheduled_backup(self, schedule_id: str, **backup_kwargs):
+        """Scheduler job: create one backup, named after its schedule."""
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        try:
+            self.create_backup(backup_name=f"sasewaddle_backup_{timestamp}_{schedule_id}", **backup_kwargs)
+        except Exception as e:
+            logger.error(f"Scheduled backup {schedule_id} failed: {e}")
+        finally:
+            # End the read transaction this worker thread's connection opened
+            get_db().rollback()
     
     def _sanitize_db_uri(self, uri: str) -> str:
         """Remove sensitive information from database URI."""
@@ -478,35 +827,78 @@ class BackupManager:
         import re
         return re.sub(r'://[^:]+:[^@]+@', '://***:***@', uri)
     
-    def _calculate_checksum(self, file_path: Path) -> str:
-        """Calculate SHA256 checksum of a file."""
-        sha256 = hashlib.sha256()
-        with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                sha256.update(chunk)
-        return sha256.hexdigest()
-    
-    def _encrypt_file(self, file_path: Path, key: str) -> Path:
+    @contextmanager
+    def _open_backup_writer(
+        self, sink: BinaryIO, compression: Optional[str], encryption_key: Optional[str] = None
+    ) -> Iterator[TextIO]:
         """
-        Encrypt a file using AES encryption.
+        Text stream that compresses, optionally encrypts and writes to ``sink``.
         
-        Note: This is a placeholder. In production, use proper encryption
-        library like cryptography.fernet
+        Every layer, down to the sink, is closed on exit so the compressed
+        frame and the final encrypted chunk are always completed.
         """
-        # Placeholder for encryption logic
-        logger.warning("Encryption not yet implemented - file not encrypted")
-        return file_path
+        layers = [sink]
+        if encryption_key:
+            layers.append(EncryptedWriter(layers[-1], encryption_key, closefd=False))
+        if compression == 'zstd':
+            # threads=-1 compresses frames on every core
+            compressor = zstandard.ZstdCompressor(level=3, threads=-1)
+            layers.append(compressor.stream_writer(layers[-1], closefd=False))
+        elif compression == 'gzip':
+            layers.append(gzip.GzipFile(fileobj=layers[-1], mode='wb'))
+        
+        text = io.TextIOWrapper(layers[-1], encoding='utf-8')
+        try:
+            yield text
+        finally:
+            text.close()
+            for layer in reversed(layers[:-1]):
+                layer.close()
     
-    def _decrypt_file(self, file_path: Path, key: str) -> Path:
+    def _open_backup_reader(self, backup_file: Path, decryption_key: Optional[str] = None) -> TextIO:
         """
-        Decrypt a file.
+        Open a text stream over a backup, decrypting it if a key is given and
+        detecting its compression from the magic bytes.
         
-        Note: This is a placeholder. In production, use proper decryption
-        library like cryptography.fernet
+        Decryption raises ValueError if the key is wrong or the file was modified.
         """
-        # Placeholder for decryption logic
-        logger.warning("Decryption not yet implemented - assuming file not encrypted")
-        return file_path
+        raw = open(backup_file, 'rb')
+        if decryption_key:
+            if is_encrypted(raw.peek(4)[:4]):
+                raw = io.BufferedReader(EncryptedReader(raw, decryption_key), ENCRYPTION_CHUNK_SIZE)
+            else:
+                logger.warning(f"Backup {backup_file} is not encrypted, skipping decryption")
+        
+        magic = raw.peek(4)[:4]
+        if magic.startswith(ZSTD_MAGIC):
+            if not ZSTD_AVAILABLE:
+                raw.close()
+                raise RuntimeError("zstandard required to restore zstd-compressed backups")
+            reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+            return io.TextIOWrapper(io.BufferedReader(reader), encoding='utf-8')
+        if magic.startswith(GZIP_MAGIC):
+            # Legacy backups written before zstd became the default
+            return io.TextIOWrapper(_ClosingGzipFile(fileobj=raw, mode='rb'), encoding='utf-8')
+        return io.TextIOWrapper(raw, encoding='utf-8')
+    
+    def _calculate_checksum(self, file_path: Path, algorithm: str = 'sha256') -> str:
+        """Calculate the BLAKE3 or SHA256 checksum of a file."""
+        if algorithm == 'blake3':
+            if not BLAKE3_AVAILABLE:
+                raise RuntimeError("blake3 required to verify this backup's checksum")
+            # Multi-threaded, memory-mapped hashing of the whole file
+            return blake3.blake3(max_threads=blake3.blake3.AUTO).update_mmap(str(file_path)).hexdigest()
+        
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+    
+    def _is_encrypted(self, file_path: Path) -> bool:
+        """Whether a backup file was written by the encrypted backup format."""
+        with open(file_path, 'rb') as f:
+            return is_encrypted(f.read(4))
     
     def _upload_backup_to_s3(self, backup_file: Path, backup_name: str) -> Dict[str, Any]:
         """Upload backup file to S3."""
@@ -514,47 +906,102 @@ class BackupManager:
             s3_key = f"{self.s3_config.prefix}{backup_name}/{backup_file.name}"
             
             # Upload the backup file
-            with open(backup_file, 'rb') as f:
-                self.s3_client.upload_fileobj(
-                    f, 
-                    self.s3_config.bucket, 
-                    s3_key,
-                    ExtraArgs={
-                        'ContentType': 'application/octet-stream',
-                        'Metadata': {
-                            'backup-name': backup_name,
-                            'created-at': datetime.utcnow().isoformat()
-                        }
-                    }
-                )
-            
-            # Get object info
-            response = self.s3_client.head_object(Bucket=self.s3_config.bucket, Key=s3_key)
+            self.s3_client.upload_file(
+                str(backup_file),
+                self.s3_config.bucket,
+                s3_key,
+                ExtraArgs=self._backup_upload_args(backup_name),
+                Config=self.s3_transfer_config
+            )
             
-            return {
-                'bucket': self.s3_config.bucket,
-                's3_key': s3_key,
-                'etag': response['ETag'].strip('"'),
-                'size_bytes': response['ContentLength'],
-                'uploaded_at': datetime.utcnow().isoformat()
-            }
+            return self._s3_object_info(s3_key)
             
         except Exception as e:
             logger.error(f"Failed to upload backup to S3: {e}")
             raise
     
-    def _upload_metadata_to_s3(self, metadata_file: Path, backup_name: str):
-        """Upload metadata file to S3."""
-        try:
-            s3_key = f"{self.s3_config.prefix}{backup_name}/{metadata_file.name}"
-            
-            with open(metadata_file, 'rb') as f:
+    def _open_s3_upload(self, filename: str, backup_name: str) -> Tuple[BinaryIO, Callable[..., Optional[Dict[str, Any]]]]:
+        """
+        Start a multipart upload of a backup fed through a pipe.
+        
+        Returns the pipe's writable end and a ``finish`` callable that closes
+        it and waits for the upload: ``finish()`` returns the object info and
+        ``finish(abort=True)`` deletes whatever was uploaded.
+        """
+        s3_key = f"{self.s3_config.prefix}{backup_name}/{filename}"
+        read_fd, write_fd = os.pipe()
+        reader = os.fdopen(read_fd, 'rb')
+        writer = os.fdopen(write_fd, 'wb')
+        errors = []
+        
+        def _upload():
+            try:
                 self.s3_client.upload_fileobj(
-                    f,
+                    reader,
                     self.s3_config.bucket,
                     s3_key,
-                    ExtraArgs={'ContentType': 'application/json'}
+                    ExtraArgs=self._backup_upload_args(backup_name),
+                    Config=self.s3_transfer_config
                 )
+            except Exception as e:
+                errors.append(e)
+            finally:
+                reader.close()
+        
+        thread = threading.Thread(target=_upload, name='backup-s3-upload', daemon=True)
+        thread.start()
+        
+        def finish(abort: bool = False) -> Optional[Dict[str, Any]]:
+            if not writer.closed:
+                try:
+                    writer.close()
+                except OSError:
+                    # The upload already failed and closed the read end
+                    pass
+            thread.join()
+            if abort:
+                if not errors:
+                    self.s3_client.delete_object(Bucket=self.s3_config.bucket, Key=s3_key)
+                return None
+            if errors:
+                logger.error(f"Failed to upload backup to S3: {errors[0]}")
+                raise errors[0]
+            return self._s3_object_info(s3_key)
+        
+        return writer, finish
+    
+    def _backup_upload_args(self, backup_name: str) -> Dict[str, Any]:
+        return {
+            'ContentType': 'application/octet-stream',
+            'Metadata': {
+                'backup-name': backup_name,
+                'created-at': datetime.utcnow().isoformat()
+            }
+        }
+    
+    def _s3_object_info(self, s3_key: str) -> Dict[str, Any]:
+        """Describe an uploaded backup object for the backup metadata."""
+        response = self.s3_client.head_object(Bucket=self.s3_config.bucket, Key=s3_key)
+        
+        return {
+            'bucket': self.s3_config.bucket,
+            's3_key': s3_key,
+            'etag': response['ETag'].strip('"'),
+            'size_bytes': response['ContentLength'],
+            'uploaded_at': datetime.utcnow().isoformat()
+        }
+    
+    def _upload_metadata_to_s3(self, metadata: Dict[str, Any], filename: str, backup_name: str):
+        """Upload a backup's metadata to S3."""
+        try:
+            s3_key = f"{self.s3_config.prefix}{backup_name}/{filename}"
+            
+            self.s3_client.put_object(
+                Bucket=self.s3_config.bucket,
+                Key=s3_key,
+                Body=json.dumps(metadata, indent=2).encode('utf-8'),
+                ContentType='application/json'
+            )
             
             logger.debug(f"Uploaded metadata to S3: {s3_key}")
             
@@ -573,7 +1020,8 @@ class BackupManager:
             self.s3_client.download_file(
                 self.s3_config.bucket,
                 s3_key,
-                str(temp_path)
+                str(temp_path),
+                Config=self.s3_transfer_config
             )
             
             logger.info(f"Downloaded backup from S3: {s3_key} -> {temp_path}")
@@ -631,31 +1079,44 @@ class BackupManager:
         try:
             # List all objects for this backup
             prefix = f"{self.s3_config.prefix}{backup_name}/"
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.s3_config.bucket,
-                Prefix=prefix
-            )
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            keys = [
+                obj['Key']
+                for page in paginator.paginate(Bucket=self.s3_config.bucket, Prefix=prefix)
+                for obj in page.get('Contents', [])
+            ]
             
-            if 'Contents' not in response:
+            if not keys:
                 return False
             
-            # Delete all objects
-            objects_to_delete = [{'Key': obj['Key']} for obj in response['Contents']]
+            # delete_objects takes up to 1000 keys per request; larger
+            # backups are deleted in parallel batches
+            batches = [keys[i:i + S3_DELETE_BATCH_SIZE] for i in range(0, len(keys), S3_DELETE_BATCH_SIZE)]
+            if len(batches) == 1:
+                errors = self._delete_s3_objects(batches[0])
+            else:
+                with ThreadPoolExecutor(max_workers=min(len(batches), 8)) as executor:
+                    errors = [error for batch_errors in executor.map(self._delete_s3_objects, batches)
+                              for error in batch_errors]
             
-            if objects_to_delete:
-                self.s3_client.delete_objects(
-                    Bucket=self.s3_config.bucket,
-                    Delete={'Objects': objects_to_delete}
-                )
-                
-                logger.info(f"Deleted {len(objects_to_delete)} S3 objects for backup: {backup_name}")
-                return True
+            if errors:
+                logger.error(f"Failed to delete {len(errors)} S3 objects for backup {backup_name}: {errors[0]}")
+                return False
             
-            return False
+            logger.info(f"Deleted {len(keys)} S3 objects for backup: {backup_name}")
+            return True
             
         except Exception as e:
             logger.error(f"Failed to delete S3 backup: {e}")
             return False
+    
+    def _delete_s3_objects(self, keys: List[str]) -> List[Dict[str, Any]]:
+        """Delete one batch of keys, returning the per-key errors S3 reports."""
+        response = self.s3_client.delete_objects(
+            Bucket=self.s3_config.bucket,
+            Delete={'Objects': [{'Key': key} for key in keys], 'Quiet': True}
+        )
+        return response.get('Errors', [])
 
 
 # CLI interface for backup operations
@@ -670,6 +1131,7 @@ def backup_cli():
     backup_parser = subparsers.add_parser('create', help='Create a backup')
     backup_parser.add_argument('--name', help='Backup name')
     backup_parser.add_argument('--compress', action='store_true', help='Compress backup')
+    backup_parser.add_argument('--compression', choices=['zstd', 'gzip'], default='zstd', help='Compression format')
     backup_parser.add_argument('--encrypt', action='store_true', help='Encrypt backup')
     backup_parser.add_argument('--s3', action='store_true', help='Upload to S3')
     
@@ -700,6 +1162,7 @@ def backup_cli():
         result = manager.create_backup(
             backup_name=args.name,
             compress=args.compress,
+            compression=args.compression,
             encrypt=args.encrypt,
             upload_to_s3=args.s3
         )
@@ -0,0 +1,199 @@
+"""Streaming authenticated encryption for SASEWaddle backup files.
+
+Backups are encrypted in 1 MiB chunks with AES-256-GCM, or with
+ChaCha20-Poly1305 on CPUs without AES instructions. The key is derived
+once per file from the passphrase with scrypt. Each chunk's nonce is a
+random per-file prefix plus the chunk counter, and the associated data
+binds the file header, the counter and a final-chunk flag, so reordered,
+truncated or extended files fail to decrypt.
+
+File layout::
+
+    magic (4) | version (1) | cipher (1) | salt (16) | nonce prefix (8)
+    then per chunk: ciphertext length (4, big endian) | ciphertext + tag
+"""
+
+import io
+import os
+import struct
+import logging
+from typing import BinaryIO
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+logger = logging.getLogger(__name__)
+
+ENCRYPTED_MAGIC = b'SWBK'
+FORMAT_VERSION = 1
+CHUNK_SIZE = 1 << 20
+
+CIPHER_AES_GCM = 1
+CIPHER_CHACHA20_POLY1305 = 2
+_CIPHERS = {
+    CIPHER_AES_GCM: AESGCM,
+    CIPHER_CHACHA20_POLY1305: ChaCha20Poly1305,
+}
+
+_HEADER = struct.Struct('>4sBB16s8s')
+_LENGTH = struct.Struct('>I')
+_TAG_SIZE = 16
+
+
+def _has_aes_instructions() -> bool:
+    """Check the CPU flags for hardware AES (AES-NI on x86, aes on ARMv8)."""
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            for line in f:
+                if line.startswith(('flags', 'Features')):
+                    return 'aes' in line.split(':', 1)[1].split()
+    except OSError:
+        pass
+    # Without /proc/cpuinfo assume a modern CPU; AES-GCM is the safe default
+    return True
+
+
+DEFAULT_CIPHER = CIPHER_AES_GCM if _has_aes_instructions() else CIPHER_CHACHA20_POLY1305
+
+
+def _derive_key(passphrase: str, salt: bytes) -> bytes:
+    """Derive a 256-bit key from the passphrase; run once per file."""
+    return Scrypt(salt=salt, length=32, n=2 ** 14, r=8, p=1).derive(passphrase.encode('utf-8'))
+
+
+def _chunk_aad(header: bytes, index: int, final: bool) -> bytes:
+    return header + struct.pack('>Q?', index, final)
+
+
+class EncryptedWriter(io.RawIOBase):
+    """Writable stream that encrypts everything written to ``fileobj``.
+
+    The final chunk is only sealed on close, so the writer must be closed
+    for the output to be readable.
+    """
+
+    def __init__(self, fileobj: BinaryIO, passphrase: str, cipher: int = DEFAULT_CIPHER,
+                 closefd: bool = True):
+        super().__init__()
+        salt = os.urandom(16)
+        self._prefix = os.urandom(8)
+        self._header = _HEADER.pack(ENCRYPTED_MAGIC, FORMAT_VERSION, cipher, salt, self._prefix)
+        self._aead = _CIPHERS[cipher](_derive_key(passphrase, salt))
+        self._fileobj = fileobj
+        self._closefd = closefd
+        self._buffer = bytearray()
+        self._index = 0
+        fileobj.write(self._header)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        # Keep at least one full chunk buffered so close() can flag the last one
+        while len(self._buffer) > CHUNK_SIZE:
+            self._seal(bytes(self._buffer[:CHUNK_SIZE]), final=False)
+            del self._buffer[:CHUNK_SIZE]
+        return len(data)
+
+    def _seal(self, chunk: bytes, final: bool):
+        nonce = self._prefix + struct.pack('>I', self._index)
+        sealed = self._aead.encrypt(nonce, chunk, _chunk_aad(self._header, self._index, final))
+        self._fileobj.write(_LENGTH.pack(len(sealed)))
+        self._fileobj.write(sealed)
+        self._index += 1
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self._seal(bytes(self._buffer), final=True)
+            self._buffer.clear()
+            if self._closefd:
+                self._fileobj.close()
+            else:
+                self._fileobj.flush()
+        finally:
+            super().close()
+
+
+class EncryptedReader(io.RawIOBase):
+    """Readable stream that decrypts and authenticates an encrypted backup."""
+
+    def __init__(self, fileobj: BinaryIO, passphrase: str, closefd: bool = True):
+        super().__init__()
+        header = fileobj.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise ValueError("Encrypted backup header is truncated")
+        magic, version, cipher, salt, self._prefix = _HEADER.unpack(header)
+        if magic != ENCRYPTED_MAGIC or version != FORMAT_VERSION or cipher not in _CIPHERS:
+            raise ValueError("Not an encrypted backup file")
+
+        self._header = header
+        self._aead = _CIPHERS[cipher](_derive_key(passphrase, salt))
+        self._fileobj = fileobj
+        self._closefd = closefd
+        self._index = 0
+        self._pending = self._read_sealed()
+        self._plain = b''
+        self._offset = 0
+        self._done = False
+
+    def readable(self) -> bool:
+        return True
+
+    def _read_sealed(self) -> bytes:
+        length = self._fileobj.read(_LENGTH.size)
+        if not length:
+            return b''
+        if len(length) != _LENGTH.size:
+            raise ValueError("Encrypted backup is truncated")
+        (size,) = _LENGTH.unpack(length)
+        sealed = self._fileobj.read(size)
+        if len(sealed) != size or size < _TAG_SIZE:
+            raise ValueError("Encrypted backup is truncated")
+        return sealed
+
+    def _open_next(self) -> bool:
+        """Decrypt the next chunk; reading one ahead tells us if it is the last."""
+        if self._done:
+            return False
+        if not self._pending:
+            raise ValueError("Encrypted backup is truncated")
+
+        sealed = self._pending
+        self._pending = self._read_sealed()
+        final = not self._pending
+        nonce = self._prefix + struct.pack('>I', self._index)
+        try:
+            self._plain = self._aead.decrypt(nonce, sealed, _chunk_aad(self._header, self._index, final))
+        except InvalidTag:
+            raise ValueError("Backup decryption failed: wrong key or corrupted file")
+        self._offset = 0
+        self._index += 1
+        self._done = final
+        return True
+
+    def readinto(self, buffer) -> int:
+        while self._offset >= len(self._plain):
+            if not self._open_next():
+                return 0
+        count = min(len(buffer), len(self._plain) - self._offset)
+        buffer[:count] = self._plain[self._offset:self._offset + count]
+        self._offset += count
+        return count
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._closefd:
+                self._fileobj.close()
+        finally:
+            super().close()
+
+
+def is_encrypted(header: bytes) -> bool:
+    """Tell whether the leading bytes of a file are an encrypted backup header."""
+    return header.startswith(ENCRYPTED_MAGIC)
@@ -3,6 +3,7 @@
 import os
 from datetime import datetime
 from typing import Optional, List
+from urllib.parse import urlsplit, parse_qsl, urlencode
 from pydal import DAL, Field
 from pydal.validators import *
 import logging
@@ -12,6 +13,8 @@ logger = logging.getLogger(__name__)
 # Global database instances
 db: Optional[DAL] = None
 db_read: Optional[DAL] = None
+async_pool = None  # asyncpg pool for hot read paths (PostgreSQL only)
+async_pool_statements = []  # queries prepared on every new pool connection
 
 def get_database_uri() -> str:
     """Get primary database URI from environment variables."""
@@ -371,6 +374,170 @@ def define_schema() -> None:
         migrate='jwt_tokens.table'
     )
 
+async def initialize_async_pool() -> None:
+    """Create the shared asyncpg pool used by hot read paths on PostgreSQL.
+    
+    PyDAL stays in charge of schema and writes; the pool only serves reads,
+    from the read replica when one is configured. Other databases, or a pool
+    that fails to start, leave callers on their PyDAL path.
+    """
+    global async_pool
+    
+    if os.getenv('DB_TYPE', 'mysql') != 'postgresql':
+        return
+    if os.getenv('DB_ASYNC_POOL_ENABLED', 'true').lower() != 'true':
+        return
+    
+    try:
+        import asyncpg
+        
+        # asyncpg takes the connect timeout as an argument rather than a DSN parameter
+        parts = urlsplit(get_read_replica_uri() or get_database_uri())
+        params = dict(parse_qsl(parts.query))
+        timeout = float(params.pop('connect_timeout', 60))
+        dsn = parts._replace(query=urlencode(params)).geturl()
+        
+        async_pool = await asyncpg.create_pool(
+            dsn,
+            min_size=int(os.getenv('DB_ASYNC_POOL_MIN_SIZE', '10')),
+            max_size=int(os.getenv('DB_ASYNC_POOL_MAX_SIZE', '50')),
+            max_inactive_connection_lifetime=300,
+            statement_cache_size=int(os.getenv('DB_ASYNC_STATEMENT_CACHE_SIZE', '1024')),
+            init=_prepare_async_statements,
+            timeout=timeout
+        )
+        logger.info("asyncpg read pool initialized")
+        
+    except Exception as e:
+        logger.error(f"Failed to create asyncpg pool, reads will use PyDAL: {e}")
+        async_pool = None
+
+def prepare_on_async_connect(*statements: str) -> None:
+    """Register hot queries to prepare on each asyncpg connection as it opens.
+    
+    The prepared statements land in the connection's statement cache, so
+    later fetches of the same SQL text skip parse and plan from the first
+    request on.
+    """
+    async_pool_statements.extend(s for s in statements if s not in async_pool_statements)
+
+async def _prepare_async_statements(connection) -> None:
+    """asyncpg pool init hook preparing the registered statements."""
+    for statement in async_pool_statements:
+        try:
+            await connection.prepare(statement)
+        except Exception as e:
+            # The query is simply prepared on first use instead
+            logger.warning(f"Failed to prepare statement on new asyncpg connection: {e}")
+
+def get_async_pool():
+    """Get the asyncpg read pool, or None when reads should go through PyDAL."""
+    return async_pool
+
+async def close_async_pool() -> None:
+    """Close the asyncpg read pool."""
+    global async_pool
+    
+    if async_pool is not None:
+        await async_pool.close()
+        async_pool = None
+        logger.info("asyncpg read pool closed")
+
+def index_state(db: DAL, name: str, table: str) -> Optional[bool]:
+    """Whether an index exists and is usable: None when missing, False when invalid.
+
+    Only PostgreSQL has invalid indexes, left behind by a failed
+    CREATE INDEX CONCURRENTLY; they take up the name but serve no queries.
+    """
+    dialect = db._adapter.dbengine
+    if dialect == 'postgres':
+        rows = db.executesql(
+            'SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid '
+            'WHERE c.relname = %s AND pg_table_is_visible(c.oid)',
+            [name]
+        )
+        return bool(rows[0][0]) if rows else None
+    if dialect == 'mysql':
+        rows = db.executesql(
+            'SELECT 1 FROM information_schema.statistics '
+            'WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1',
+            [table, name]
+        )
+    else:
+        rows = db.executesql("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", [name])
+    return True if rows else None
+
+def _execute_autocommit(db: DAL, sql: str) -> None:
+    """Run a statement PostgreSQL refuses inside a transaction block (e.g. CONCURRENTLY)."""
+    db.commit()
+    connection = db._adapter.connection
+    connection.autocommit = True
+    try:
+        db.executesql(sql)
+    finally:
+        connection.autocommit = False
+
+def create_index(db: DAL, name: str, table: str, definition: str, unique: bool = False) -> bool:
+    """Create an index unless it exists; returns whether a usable index is in place.
+
+    On PostgreSQL the index is built CONCURRENTLY so existing tables stay
+    writable. A failed concurrent build leaves an invalid index under the
+    name, which IF NOT EXISTS would skip from then on, so an invalid index
+    is dropped and built again. Failures are logged rather than raised so
+    one index does not stop the rest; callers that depend on an index
+    check the result.
+    """
+    dialect = db._adapter.dbengine
+    kind = 'UNIQUE INDEX' if unique else 'INDEX'
+
+    try:
+        if dialect == 'postgres':
+            if index_state(db, name, table) is False:
+                logger.warning(f"Rebuilding invalid index {name} on {table}")
+                _execute_autocommit(db, f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+            _execute_autocommit(db, f'CREATE {kind} CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}')
+        elif dialect == 'mysql':
+            # No IF NOT EXISTS for indexes; InnoDB builds them online by default
+            if not index_state(db, name, table):
+                db.executesql(f'CREATE {kind} {name} ON {table} {definition}')
+            db.commit()
+        else:
+            db.executesql(f'CREATE {kind} IF NOT EXISTS {name} ON {table} {definition}')
+            db.commit()
+    except Exception as e:
+        logger.error(f"Failed to create index {name} on {table}: {e}")
+        db.rollback()
+
+    try:
+        state = index_state(db, name, table)
+        db.commit()
+        if state is False:
+            # Do not leave the failed build behind to be skipped on the next start
+            logger.error(f"Index {name} on {table} is invalid after building, dropping it")
+            drop_index(db, name, table)
+        return bool(state)
+    except Exception as e:
+        logger.error(f"Failed to check index {name} on {table}: {e}")
+        db.rollback()
+        return False
+
+def drop_index(db: DAL, name: str, table: str) -> None:
+    """Drop an index if it exists, without blocking writes on PostgreSQL."""
+    dialect = db._adapter.dbengine
+    try:
+        if dialect == 'postgres':
+            _execute_autocommit(db, f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+        elif dialect == 'mysql':
+            if index_state(db, name, table):
+                db.executesql(f'DROP INDEX {name} ON {table}')
+            db.commit()
+        else:
+            db.executesql(f'DROP INDEX IF EXISTS {name}')
+            db.commit()
+    except Exception as e:
+        logger.error(f"Failed to drop index {name} on {table}: {e}")
+        db.rollback()
+
 def get_db() -> DAL:
     """Get the primary database instance for write operations."""
     if db is None:
@@ -10,10 +10,12 @@ from py4web import action, request, response, abort, redirect, URL
 from py4web.core import app, Fixture
 import structlog
 
-from database import initialize_database, close_database
+from database import initialize_database, close_database, initialize_async_pool, close_async_pool
 from orchestrator.cluster_manager import ClusterManager
 from orchestrator.client_registry import ClientRegistry
 from api.routes import setup_routes
+from api.analytics_routes import refresh_dashboard_snapshots, ANALYTICS_SNAPSHOT_INTERVAL
+from analytics import ANALYTICS_RUN_MIGRATIONS, get_analytics_manager
 from web.routes import setup_web_routes
 from certs.certificate_manager import CertificateManager
 from auth.jwt_manager import JWTManager
@@ -42,6 +44,7 @@ async def lifespan(app):
     # Initialize database first
     logger.info("Initializing PyDAL database connection")
     initialize_database()
+    await initialize_async_pool()
     
     # Initialize core services with async/threading
     cluster_manager = ClusterManager()
@@ -72,6 +75,10 @@ async def lifespan(app):
         asyncio.create_task(_periodic_metrics_update())
     ]
     
+    # One worker keeps the shared dashboard snapshots warm
+    if ANALYTICS_RUN_MIGRATIONS:
+        background_tasks.append(asyncio.create_task(_periodic_dashboard_snapshot()))
+    
     logger.info("SASEWaddle Manager Service started successfully")
     
     yield
@@ -92,6 +99,7 @@ async def lifespan(app):
     )
     
     # Close database connections
+    await close_async_pool()
     close_database()
     
     # Shutdown thread pool
@@ -190,6 +198,20 @@ async def _periodic_health_check():
         except Exception as e:
             logger.error("Health check failed", error=str(e))
 
+async def _periodic_dashboard_snapshot():
+    """Background task rebuilding the cached analytics dashboard overviews"""
+    while True:
+        try:
+            await refresh_dashboard_snapshots()
+            await asyncio.sleep(ANALYTICS_SNAPSHOT_INTERVAL)
+            
+        except asyncio.CancelledError:
+            logger.info("Dashboard snapshot task cancelled")
+            break
+        except Exception as e:
+            logger.error("Dashboard snapshot refresh failed", error=str(e))
+            await asyncio.sleep(ANALYTICS_SNAPSHOT_INTERVAL)
+
 async def _periodic_metrics_update():
     """Background task for updating Prometheus metrics"""
     while True:
@@ -221,6 +243,11 @@ async def _periodic_metrics_update():
                 
                 manager_metrics.update_client_stats(client_count, client_type_counts, client_status_counts)
             
+            # Analytics ingest backlog and records lost to failed writes
+            analytics = await run_in_thread(get_analytics_manager)
+            ingest = analytics.ingest_stats()
+            manager_metrics.update_analytics_ingest(ingest['queued'], ingest['dropped'])
+            
             # Update system resources
             try:
                 import psutil
@@ -212,6 +212,26 @@ class ManagerMetrics:
             registry=self.registry
         )
         
+        self.cache_lookups_total = Counter(
+            'sasewaddle_manager_cache_lookups_total',
+            'Total response cache lookups',
+            ['cache', 'result'],  # result: hit, miss
+            registry=self.registry
+        )
+        
+        # Analytics Ingest Metrics
+        self.analytics_ingest_queued = Gauge(
+            'sasewaddle_manager_analytics_ingest_queued',
+            'Analytics records waiting for the background writer',
+            registry=self.registry
+        )
+        
+        self.analytics_records_dropped = Gauge(
+            'sasewaddle_manager_analytics_records_dropped',
+            'Analytics records dropped after failed writes since startup',
+            registry=self.registry
+        )
+        
         # System Resource Metrics
         self.memory_usage_bytes = Gauge(
             'sasewaddle_manager_memory_usage_bytes',
@@ -414,6 +434,13 @@ class ManagerMetrics:
         """Record Redis operation"""
         self.redis_operations_total.labels(operation=operation).inc()
     
+    def record_cache_lookup(self, cache: str, hit: bool):
+        """Record response cache hit or miss"""
+        self.cache_lookups_total.labels(
+            cache=cache,
+            result='hit' if hit else 'miss'
+        ).inc()
+    
     def record_error(self, component: str, error_type: str):
         """Record error occurrence"""
         self.errors_total.labels(
@@ -442,6 +469,11 @@ class ManagerMetrics:
         for cert_type, count in expiring.items():
             self.certificates_expiring_soon.labels(type=cert_type).set(count)
     
+    def update_analytics_ingest(self, queued: int, dropped: int):
+        """Update analytics ingest backlog and dropped record metrics"""
+        self.analytics_ingest_queued.set(queued)
+        self.analytics_records_dropped.set(dropped)
+    
     def update_system_resources(self, memory_bytes: int, cpu_percent: float):
         """Update system resource metrics"""
         self.memory_usage_bytes.set(memory_bytes)
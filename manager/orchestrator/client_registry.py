@@ -4,6 +4,7 @@ import secrets
 from typing import Dict, List, Optional, Set
 from datetime import datetime, timedelta
 import structlog
+from collections import Counter
 from dataclasses import dataclass, asdict
 import aioredis
 import hashlib
@@ -110,6 +111,15 @@ class ClientRegistry:
         
         return None
     
+    def mark_seen(self, client: Client) -> None:
+        """Record activity for an already authenticated client, in memory only.
+        
+        authenticate_client persists the same fields to Redis; callers that
+        skip it for a cached key still keep status and last_seen current.
+        """
+        client.last_seen = datetime.now()
+        client.status = 'active'
+    
     async def update_client_status(self, client_id: str, status: str, metadata: Dict = None):
         async with self._lock:
             if client_id in self.clients:
@@ -205,6 +215,10 @@ class ClientRegistry:
     async def get_client_count(self) -> int:
         return len(self.clients)
     
+    async def get_status_counts(self) -> Dict[str, int]:
+        """Count clients per status in a single pass."""
+        return dict(Counter(c.status for c in self.clients.values()))
+    
     async def is_healthy(self) -> bool:
         try:
             if self.redis:
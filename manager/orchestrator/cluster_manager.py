@@ -3,6 +3,7 @@ import json
 from typing import Dict, List, Optional, Set
 from datetime import datetime, timedelta
 import structlog
+from collections import Counter
 from dataclasses import dataclass, asdict
 import aioredis
 
@@ -157,6 +158,10 @@ class ClusterManager:
     async def get_cluster_count(self) -> int:
         return len(self.clusters)
     
+    async def get_status_counts(self) -> Dict[str, int]:
+        """Count clusters per status in a single pass."""
+        return dict(Counter(c.status for c in self.clusters.values()))
+    
     async def is_healthy(self) -> bool:
         try:
             if self.redis:
@@ -13,8 +13,7 @@ from typing import Dict, List
 # Add the parent directory to the path so we can import from manager modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import get_db
-from analytics import analytics_manager
+from analytics import get_analytics_manager
 
 # Configure logging
 logging.basicConfig(
@@ -28,7 +27,9 @@ class AnalyticsAggregator:
     """Aggregates analytics data into time-based summaries."""
     
     def __init__(self):
-        self.db = get_db()
+        # The analytics manager defines the analytics tables on the connection
+        self.analytics = get_analytics_manager()
+        self.db = self.analytics.db
         self.retention_days = int(os.getenv('ANALYTICS_RETENTION_DAYS', '90'))
     
     def aggregate_hourly_stats(self, target_hour: datetime = None):
@@ -238,27 +239,49 @@ class AnalyticsAggregator:
             self.db.rollback()
             return False
     
+    def _delete_in_batches(self, table, query, batch_size: int = 5000) -> int:
+        """Delete matching rows a batch at a time, committing between batches.
+        
+        Keeps each transaction short so pruning a large backlog does not hold
+        locks against the ingest writer for the whole run.
+        """
+        deleted = 0
+        while True:
+            ids = [row.id for row in self.db(query).select(table.id, limitby=(0, batch_size))]
+            if not ids:
+                break
+            deleted += self.db(table.id.belongs(ids)).delete()
+            self.db.commit()
+            if len(ids) < batch_size:
+                break
+        return deleted
+    
     def cleanup_old_data(self):
         """Clean up old analytics data beyond retention period."""
-        cutoff_date = datetime.utcnow() - timedelta(days=self.retention_days)
+        now = datetime.utcnow()
+        cutoff_date = now - timedelta(days=self.retention_days)
         
         logger.info(f"Cleaning up analytics data older than {cutoff_date}")
         
         try:
-            # Clean up old client analytics
-            client_deleted = self.db(self.db.client_analytics.created_at < cutoff_date).delete()
-            
-            # Clean up old headend analytics (keep recent heartbeats)
-            headend_deleted = self.db(self.db.headend_analytics.created_at < cutoff_date).delete()
+            # Clean up clients and headends that have not reported within the
+            # retention window (by last activity, so long-lived ones are kept)
+            client_deleted = self._delete_in_batches(
+                self.db.client_analytics,
+                self.db.client_analytics.last_seen < cutoff_date
+            )
+            headend_deleted = self._delete_in_batches(
+                self.db.headend_analytics,
+                self.db.headend_analytics.last_heartbeat < cutoff_date
+            )
             
             # Clean up old hourly traffic stats (keep daily/monthly)
-            hourly_cutoff = datetime.utcnow() - timedelta(days=30)  # Keep 30 days of hourly data
-            hourly_deleted = self.db(
+            hourly_cutoff = now - timedelta(days=30)  # Keep 30 days of hourly data
+            hourly_deleted = self._delete_in_batches(
+                self.db.traffic_stats,
                 (self.db.traffic_stats.stat_type == 'hourly') &
                 (self.db.traffic_stats.timestamp < hourly_cutoff)
-            ).delete()
-            
-            self.db.commit()
+            )
             
             logger.info(f"Cleaned up {client_deleted} client records, {headend_deleted} headend records, "
                        f"and {hourly_deleted} hourly stats")
@@ -318,17 +341,22 @@ def main():
     success_count = 0
     
     # Aggregate hourly stats for the last few hours (catch up)
-    current_hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    now = datetime.utcnow()
+    current_hour = now.replace(minute=0, second=0, microsecond=0)
     for i in range(1, 4):  # Last 3 hours
         hour = current_hour - timedelta(hours=i)
         if aggregator.aggregate_hourly_stats(hour):
             success_count += 1
     
     # Aggregate daily stats for yesterday
-    yesterday = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    yesterday = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
     if aggregator.aggregate_daily_stats(yesterday):
         success_count += 1
     
+    # Rebuild the OS distribution rollup served to the dashboard
+    if aggregator.analytics.refresh_os_rollup():
+        success_count += 1
+    
     # Clean up old data
     if aggregator.cleanup_old_data():
         success_count += 1
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Analytics backfill script for SASEWaddle Manager.
+Loads client or headend analytics records from a JSON Lines file (one record
+per line, e.g. exported from another manager) straight into the database.
+"""
+
+import os
+import sys
+import json
+import argparse
+import logging
+from datetime import timezone
+from typing import Any, Dict, Iterator, List
+
+# Add the parent directory to the path so we can import from manager modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import get_analytics_manager, INGEST_TABLES
+from api.payloads import parse_datetime
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Records per bulk load; large enough for the COPY path on PostgreSQL while
+# keeping memory bounded for big exports
+DEFAULT_CHUNK_SIZE = 50000
+
+
+def read_records(path: str, table: str) -> Iterator[Dict[str, Any]]:
+    """Yield the records of a JSON Lines file, parsing their timestamps."""
+    key, _, stamp_column = INGEST_TABLES[table]
+    with open(path, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict) or key not in record:
+                raise ValueError(f"Line {line_number}: {key} is required")
+            stamp = parse_datetime(record.get(stamp_column))
+            if stamp and stamp.tzinfo:
+                # Analytics timestamps are stored as naive UTC
+                stamp = stamp.astimezone(timezone.utc).replace(tzinfo=None)
+            record[stamp_column] = stamp
+            yield record
+
+
+def backfill(path: str, table: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Bulk load a JSON Lines file in chunks; returns the number of records written."""
+    analytics = get_analytics_manager()
+    written = 0
+    chunk: List[Dict[str, Any]] = []
+
+    def load() -> None:
+        nonlocal written
+        if not analytics.bulk_load(table, chunk):
+            raise RuntimeError(f"Failed to load records {written + 1}-{written + len(chunk)}")
+        written += len(chunk)
+        logger.info(f"Loaded {written} {table} records")
+        chunk.clear()
+
+    for record in read_records(path, table):
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            load()
+    if chunk:
+        load()
+    return written
+
+
+def main():
+    """Main backfill routine."""
+    parser = argparse.ArgumentParser(description='SASEWaddle Analytics Backfill')
+    parser.add_argument('table', choices=sorted(INGEST_TABLES), help='Analytics table to load')
+    parser.add_argument('file', help='JSON Lines file with one record per line')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='Records written per bulk load')
+    args = parser.parse_args()
+
+    try:
+        count = backfill(args.file, args.table, args.chunk_size)
+    except (OSError, ValueError, RuntimeError) as e:
+        logger.error(f"Analytics backfill failed: {e}")
+        return False
+
+    logger.info(f"Analytics backfill completed: {count} records loaded")
+    return True
+
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
@@ -9,6 +9,26 @@ from . import security_middleware
 
 logger = logging.getLogger(__name__)
 
+# WSGI environ key holding the client IP once resolved for a request
+CLIENT_IP_ENVIRON_KEY = 'sasewaddle.client_ip'
+
+
+def client_ip(environ: Dict[str, Any], default: str = 'unknown') -> str:
+    """The real client IP of a request, resolved once and kept in its environ.
+    
+    The first X-Forwarded-For hop wins (when behind a proxy/load balancer),
+    then X-Real-IP, then the socket address.
+    """
+    ip = environ.get(CLIENT_IP_ENVIRON_KEY)
+    if ip is None:
+        forwarded_for = environ.get('HTTP_X_FORWARDED_FOR')
+        if forwarded_for:
+            ip = forwarded_for.partition(',')[0].strip()
+        else:
+            ip = (environ.get('HTTP_X_REAL_IP') or '').strip() or environ.get('REMOTE_ADDR') or ''
+        environ[CLIENT_IP_ENVIRON_KEY] = ip
+    return ip or default
+
 
 class SecurityFixture(Fixture):
     """py4web Fixture for security middleware integration."""
@@ -56,19 +76,7 @@ class SecurityFixture(Fixture):
     
     def _get_client_ip(self) -> str:
         """Extract the real client IP address."""
-        # Check for forwarded headers (when behind proxy/load balancer)
-        forwarded_for = request.environ.get('HTTP_X_FORWARDED_FOR')
-        if forwarded_for:
-            # Take the first IP in the chain
-            return forwarded_for.split(',')[0].strip()
-        
-        # Check for real IP header
-        real_ip = request.environ.get('HTTP_X_REAL_IP')
-        if real_ip:
-            return real_ip.strip()
-        
-        # Fallback to remote address
-        return request.environ.get('REMOTE_ADDR', '127.0.0.1')
+        return client_ip(request.environ, '127.0.0.1')
 
 
 # Global security fixture instance
@@ -0,0 +1,65 @@
+"""
+Unit tests for analytics search cursors
+"""
+import os
+import sys
+import base64
+import json
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import AnalyticsManager, encode_search_cursor, decode_search_cursor
+
+
+def raw_cursor(positions):
+    """Encode arbitrary JSON the way encode_search_cursor does"""
+    return base64.urlsafe_b64encode(json.dumps(positions).encode('utf-8')).decode('ascii')
+
+
+class TestSearchCursor:
+    """Test keyset cursor encoding and validation"""
+
+    def test_round_trip(self):
+        """Test a cursor decodes to the positions it was built from"""
+        positions = {
+            'agents': ['2024-01-01T12:00:00', 'client-1'],
+            'headends': None
+        }
+        assert decode_search_cursor(encode_search_cursor(positions)) == positions
+
+    @pytest.mark.parametrize("cursor", [
+        "not base64!",
+        base64.urlsafe_b64encode(b"not json").decode('ascii'),
+        raw_cursor(['agents']),
+        raw_cursor({'agents': 'client-1'}),
+        raw_cursor({'agents': ['2024-01-01T12:00:00']}),
+        raw_cursor({'agents': ['2024-01-01T12:00:00', 'client-1', 'extra']}),
+        raw_cursor({'agents': [{'a': 1}, 'client-1']}),
+        raw_cursor({'agents': [20240101, 'client-1']}),
+    ])
+    def test_malformed_cursor(self, cursor):
+        """Test malformed cursors raise ValueError"""
+        with pytest.raises(ValueError):
+            decode_search_cursor(cursor)
+
+    def test_first_page_has_no_seek(self):
+        """Test the first page orders by the sort column and unique key"""
+        _, orderby, seek = AnalyticsManager._search_order(None, 'agents', 'hostname', None)
+        assert orderby == "COALESCE(hostname, ''), client_id"
+        assert seek == ('', [])
+
+    def test_seek_after_position(self):
+        """Test later pages seek past the last row of the previous page"""
+        _, orderby, (predicate, params) = AnalyticsManager._search_order(
+            None, 'agents', 'last_seen', ['2024-01-01T12:00:00', 'client-1']
+        )
+        assert orderby == 'last_seen DESC, client_id DESC'
+        assert predicate == '(last_seen, client_id) < (%s, %s)'
+        assert params[0].isoformat() == '2024-01-01T12:00:00'
+        assert params[1] == 'client-1'
+
+    def test_seek_rejects_bad_timestamp(self):
+        """Test a non-timestamp position on a time-ordered sort raises ValueError"""
+        with pytest.raises(ValueError):
+            AnalyticsManager._search_order(None, 'agents', 'last_seen', ['yesterday', 'client-1'])
@@ -0,0 +1,180 @@
+"""
+Unit tests for backup encryption and restore
+"""
+import io
+import os
+import sys
+import struct
+import pytest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("cryptography")
+
+from pydal import DAL, Field
+
+import backup
+from backup.encryption import (
+    EncryptedWriter, EncryptedReader, CHUNK_SIZE,
+    CIPHER_AES_GCM, CIPHER_CHACHA20_POLY1305
+)
+
+PASSPHRASE = "correct horse battery staple"
+# magic (4) | version (1) | cipher (1) | salt (16) | nonce prefix (8)
+HEADER_SIZE = 30
+
+
+def encrypt(payload, passphrase=PASSPHRASE, cipher=CIPHER_AES_GCM):
+    """Encrypt a payload in memory and return the encrypted file bytes"""
+    out = io.BytesIO()
+    with EncryptedWriter(out, passphrase, cipher=cipher, closefd=False) as writer:
+        writer.write(payload)
+    return out.getvalue()
+
+
+def decrypt(blob, passphrase=PASSPHRASE):
+    """Decrypt encrypted file bytes in memory"""
+    with EncryptedReader(io.BytesIO(blob), passphrase) as reader:
+        return reader.read()
+
+
+def split_chunks(blob):
+    """Split encrypted file bytes into the header and the length-prefixed chunks"""
+    header, chunks, offset = blob[:HEADER_SIZE], [], HEADER_SIZE
+    while offset < len(blob):
+        (size,) = struct.unpack('>I', blob[offset:offset + 4])
+        chunks.append(blob[offset:offset + 4 + size])
+        offset += 4 + size
+    return header, chunks
+
+
+class TestBackupEncryption:
+    """Test streaming backup encryption"""
+
+    def test_exact_multiple_has_no_trailing_chunk(self):
+        """Test a payload of whole chunks seals its last full chunk as final"""
+        header, chunks = split_chunks(encrypt(os.urandom(2 * CHUNK_SIZE)))
+        assert len(chunks) == 2
+        assert len(split_chunks(encrypt(b""))[1]) == 1
+
+    @pytest.mark.parametrize("size", [0, 1, CHUNK_SIZE, 2 * CHUNK_SIZE, 2 * CHUNK_SIZE + 17])
+    def test_round_trip(self, size):
+        """Test payloads decrypt to their plaintext, including chunk boundaries"""
+        payload = os.urandom(size)
+        assert decrypt(encrypt(payload)) == payload
+
+    def test_round_trip_chacha20(self):
+        """Test the ChaCha20-Poly1305 cipher round trips"""
+        payload = os.urandom(CHUNK_SIZE + 5)
+        assert decrypt(encrypt(payload, cipher=CIPHER_CHACHA20_POLY1305)) == payload
+
+    def test_chunked_writes(self):
+        """Test many small writes produce the same plaintext"""
+        out = io.BytesIO()
+        with EncryptedWriter(out, PASSPHRASE, closefd=False) as writer:
+            for _ in range(3000):
+                writer.write(b"x" * 1000)
+        assert decrypt(out.getvalue()) == b"x" * 3000000
+
+    def test_wrong_key(self):
+        """Test decrypting with the wrong passphrase fails"""
+        blob = encrypt(b"secret data")
+        with pytest.raises(ValueError):
+            decrypt(blob, "wrong passphrase")
+
+    def test_truncated_mid_chunk(self):
+        """Test a file cut inside a chunk fails"""
+        blob = encrypt(os.urandom(CHUNK_SIZE + 100))
+        with pytest.raises(ValueError):
+            decrypt(blob[:-10])
+
+    def test_truncated_at_chunk_boundary(self):
+        """Test a file missing its final chunk fails"""
+        header, chunks = split_chunks(encrypt(os.urandom(2 * CHUNK_SIZE + 100)))
+        assert len(chunks) == 3
+        with pytest.raises(ValueError):
+            decrypt(header + b"".join(chunks[:-1]))
+
+    def test_truncated_header(self):
+        """Test a file cut inside the header fails"""
+        with pytest.raises(ValueError):
+            decrypt(encrypt(b"data")[:HEADER_SIZE - 1])
+
+    def test_reordered_chunks(self):
+        """Test swapping two chunks fails"""
+        header, chunks = split_chunks(encrypt(os.urandom(2 * CHUNK_SIZE + 100)))
+        assert len(chunks) == 3
+        chunks[0], chunks[1] = chunks[1], chunks[0]
+        with pytest.raises(ValueError):
+            decrypt(header + b"".join(chunks))
+
+    def test_appended_chunk(self):
+        """Test a chunk appended after the final chunk fails"""
+        header, chunks = split_chunks(encrypt(os.urandom(CHUNK_SIZE + 100)))
+        assert len(chunks) == 2
+        with pytest.raises(ValueError):
+            decrypt(header + b"".join(chunks) + chunks[-1])
+
+
+class TestBackupRestore:
+    """Test restoring backups in each file format"""
+
+    ROWS = 25
+
+    @pytest.fixture
+    def db(self, tmp_path, monkeypatch):
+        """Create a SQLite database with a populated table"""
+        db = DAL(f"sqlite://{tmp_path / 'storage.sqlite'}", folder=str(tmp_path))
+        db.define_table('clients', Field('name'), Field('created_at', 'datetime'))
+        for i in range(self.ROWS):
+            db.clients.insert(name=f"client-{i}", created_at=datetime(2024, 1, 1, 12, i))
+        db.commit()
+        monkeypatch.setattr(backup, 'get_db', lambda: db)
+        monkeypatch.setattr(backup, 'get_database_uri', lambda: f"sqlite://{tmp_path / 'storage.sqlite'}")
+        yield db
+        db.close()
+
+    @pytest.fixture
+    def backup_manager(self, tmp_path, db):
+        """Create a backup manager writing to a temporary directory"""
+        return backup.BackupManager(str(tmp_path / "backups"))
+
+    def _assert_restored(self, db, result):
+        assert result["total_rows_restored"] == self.ROWS
+        assert not result["errors"]
+        assert db(db.clients).count() == self.ROWS
+        row = db(db.clients.name == "client-3").select().first()
+        assert row.created_at == datetime(2024, 1, 1, 12, 3)
+
+    def test_restore_zstd(self, db, backup_manager):
+        """Test restoring a zstd compressed backup"""
+        pytest.importorskip("zstandard")
+        created = backup_manager.create_backup("backup_zstd", compression='zstd', upload_to_s3=False)
+        assert created["file_path"].endswith(".json.zst")
+        db(db.clients).delete()
+        db.commit()
+        self._assert_restored(db, backup_manager.restore_backup(created["file_path"]))
+
+    def test_restore_gzip(self, db, backup_manager):
+        """Test restoring a gzip compressed backup"""
+        created = backup_manager.create_backup("backup_gzip", compression='gzip', upload_to_s3=False)
+        assert created["file_path"].endswith(".json.gz")
+        db(db.clients).delete()
+        db.commit()
+        self._assert_restored(db, backup_manager.restore_backup(created["file_path"]))
+
+    def test_restore_encrypted(self, db, backup_manager):
+        """Test restoring an encrypted backup and rejecting the wrong key"""
+        created = backup_manager.create_backup(
+            "backup_encrypted", encrypt=True, encryption_key=PASSPHRASE, upload_to_s3=False
+        )
+        assert created["file_path"].endswith(".enc")
+        with pytest.raises(ValueError):
+            backup_manager.restore_backup(created["file_path"], decrypt=True, decryption_key="wrong")
+        db(db.clients).delete()
+        db.commit()
+        result = backup_manager.restore_backup(
+            created["file_path"], decrypt=True, decryption_key=PASSPHRASE
+        )
+        self._assert_restored(db, result)
@@ -3,19 +3,57 @@ Web Authentication Decorators and Helpers for py4web
 """
 
 import functools
-from typing import Optional
-from py4web import request, response, redirect, URL, abort
+import hmac
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from py4web import request, response, redirect, URL, abort, HTTP
+from py4web.core import Fixture
 from auth.user_manager import UserManager, User, UserRole
 
 # Global user manager instance
 user_manager = UserManager()
 
+# Seconds a validated session is trusted before it is looked up again
+SESSION_CACHE_TTL = float(os.getenv('WEB_SESSION_CACHE_TTL', '5'))
+SESSION_CACHE_MAX_SIZE = 10000
+
+# session_id -> (expires at, user)
+_session_cache: Dict[str, Tuple[float, User]] = {}
+_session_cache_lock = threading.Lock()
+
 def get_current_user() -> Optional[User]:
     """Get current authenticated user from session"""
     session_id = request.get_cookie("sasewaddle_session")
     if not session_id:
         return None
     
+    # Requests in quick succession on one session share a single lookup
+    cached = _session_cache.get(session_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    
+    user = _validate_session(session_id)
+    if user and SESSION_CACHE_TTL > 0:
+        with _session_cache_lock:
+            if len(_session_cache) >= SESSION_CACHE_MAX_SIZE:
+                now = time.monotonic()
+                for key in [k for k, (expires, _) in _session_cache.items() if expires <= now]:
+                    del _session_cache[key]
+                if len(_session_cache) >= SESSION_CACHE_MAX_SIZE:
+                    _session_cache.clear()
+            _session_cache[session_id] = (time.monotonic() + SESSION_CACHE_TTL, user)
+    return user
+
+def invalidate_cached_session(session_id: str) -> None:
+    """Forget a cached session so its next request is validated again."""
+    with _session_cache_lock:
+        _session_cache.pop(session_id, None)
+
+def _validate_session(session_id: str) -> Optional[User]:
+    """Look a session up through the user manager"""
     # This would normally be async, but py4web decorators need sync
     # In production, consider using async/await patterns
     import asyncio
@@ -46,6 +84,53 @@ def require_auth(f):
     
     return decorated_function
 
+class AuthFixture(Fixture):
+    """py4web Fixture rejecting unauthenticated requests with a JSON 401.
+    
+    The user is resolved once per request and left on ``request.user``. With
+    ``api_key_env`` set, a request without a session may instead present the
+    key held in that environment variable as ``X-API-Key`` (service callers
+    such as headends); ``request.user`` is then None. With ``permission`` set,
+    users lacking it are rejected with a JSON 403 instead.
+    """
+    
+    def __init__(self, api_key_env: Optional[str] = None, permission: Optional[str] = None):
+        self.__prerequisites__ = []
+        self.api_key_env = api_key_env
+        self.permission = permission
+    
+    def on_request(self, context):
+        user = get_current_user()
+        if not user and not self._valid_api_key():
+            raise HTTP(
+                401,
+                json.dumps({"error": "Authentication required"}),
+                headers={'Content-Type': 'application/json'}
+            )
+        if self.permission and not (user and user_manager.has_permission(user, self.permission)):
+            raise HTTP(
+                403,
+                json.dumps({"error": f"{self.permission.capitalize()} permission required"}),
+                headers={'Content-Type': 'application/json'}
+            )
+        request.user = user
+    
+    def _valid_api_key(self) -> bool:
+        if not self.api_key_env:
+            return False
+        # An unset or empty key must never match, even an empty header
+        expected = os.getenv(self.api_key_env)
+        api_key = request.headers.get('X-API-Key')
+        if not expected or not api_key:
+            return False
+        return hmac.compare_digest(api_key.encode('utf-8'), expected.encode('utf-8'))
+
+# Fixture for JSON API routes that need a logged-in user
+auth_required = AuthFixture()
+
+# Fixture for JSON API routes restricted to administrators
+admin_required = AuthFixture(permission='admin')
+
 def require_role(role: UserRole):
     """Decorator to require specific role"""
     def decorator(f):
@@ -107,6 +192,7 @@ async def logout_user():
     """Logout current user"""
     session_id = request.get_cookie("sasewaddle_session")
     if session_id:
+        invalidate_cached_session(session_id)
         await user_manager.logout(session_id)
     
     # Clear cookie